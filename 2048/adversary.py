@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Adversarial spawns for the hard mode of 2048.
+
+In hard mode the new tile is not random: an adversary picks the empty cell and
+the value (2 or 4) that leave the player worst off. It runs a shallow minimax on
+the packed engines, where spawns are min nodes and player moves are max nodes,
+and scores the leaves with expectimax.heuristic. The search deepens
+iteratively with alpha-beta pruning; the spawns and moves that looked best at
+a shallower depth are tried first, so most branches are cut after the first
+few children. A millisecond budget caps each decision, so the 8x8 game gets
+its spawn before the slide animation ends.
+
+prefetch() starts the search on a background thread as soon as the slide is
+known, and spawn_for() collects the answer when the tile is due:
+
+    python adversary.py --size 8 --budget 60
+"""
+import argparse
+import functools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bitboard import DIRECTIONS
+from engines import engine_for_size
+from expectimax import CLOCK_CHECK_INTERVAL, SearchTimeout, heuristic
+from spawns import DEFAULT_SPAWN, spawn_exponents
+
+DEFAULT_TIME_BUDGET_MS = 60
+# Spawn plies searched at most; each one is followed by the player's reply
+DEFAULT_MAX_DEPTH = 3
+
+
+class _Search:
+    """The clock and node count of one search
+
+    A prefetch on the background thread and a fallback search on the main
+    thread can run at once, so each keeps its own.
+    """
+
+    def __init__(self, time_budget_ms):
+        self.started = time.perf_counter()
+        self.deadline = self.started + time_budget_ms / 1000 if time_budget_ms else None
+        self.nodes = 0
+
+    def visit(self):
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+
+class Adversary:
+    def __init__(self, engine, time_budget_ms=DEFAULT_TIME_BUDGET_MS, max_depth=DEFAULT_MAX_DEPTH, evaluate=None,
+                 spawn=DEFAULT_SPAWN):
+        self.engine = engine
+        # The adversary may place any tile the edition can spawn, whatever its odds
+        self.spawn_exponents = tuple(exponent for exponent, weight in spawn_exponents(spawn) if weight > 0)
+        self.time_budget_ms = time_budget_ms
+        self.max_depth = max_depth
+        self.evaluate = evaluate or functools.partial(heuristic, engine)
+        # Depth completed by the last worst_spawn() call to finish
+        self.depth_reached = 0
+        self._executor = None
+        self._prefetched = None
+
+    def _spawns(self, board):
+        return [
+            (board | (exponent << (4 * index)), index, exponent)
+            for index in self.engine.empty_cells(board)
+            for exponent in self.spawn_exponents
+        ]
+
+    def _max_node(self, search, board, depth, alpha, beta):
+        """The player's best reply to a spawn"""
+        search.visit()
+        move = self.engine.move
+        successors = []
+        for direction in DIRECTIONS:
+            new, _ = move(board, direction)
+            if new != board:
+                successors.append(new)
+        if not successors:
+            # A dead board is the adversary's best outcome
+            return 0.0
+        if depth <= 1:
+            return max(self.evaluate(new) for new in successors)
+
+        # Try the statically strongest move first, which raises alpha early
+        successors.sort(key=self.evaluate, reverse=True)
+        best = float("-inf")
+        for new in successors:
+            value = self._min_node(search, new, depth - 1, alpha, beta)
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                    if alpha >= beta:
+                        break
+        return best
+
+    def _min_node(self, search, board, depth, alpha, beta):
+        """The adversary's most damaging spawn after a move"""
+        search.visit()
+        children = self._spawns(board)
+        if not children:
+            return self.evaluate(board)
+        # Tiles that already look bad statically are the likeliest cutoffs
+        children.sort(key=lambda child: self.evaluate(child[0]))
+        best = float("inf")
+        for child, _, _ in children:
+            value = self._max_node(search, child, depth, alpha, beta)
+            if value < best:
+                best = value
+                if best < beta:
+                    beta = best
+                    if alpha >= beta:
+                        break
+        return best
+
+    def iter_search(self, board):
+        """Yield (depth, (index, exponent), value) after each completed depth
+
+        board is the position after the player's slide, before the spawn.
+        """
+        search = _Search(self.time_budget_ms)
+        started = search.started
+        children = self._spawns(board)
+        if not children:
+            return
+        children.sort(key=lambda child: self.evaluate(child[0]))
+        for depth in range(1, self.max_depth + 1):
+            values = {}
+            beta = float("inf")
+            try:
+                for child, index, exponent in children:
+                    value = self._max_node(search, child, depth, float("-inf"), beta)
+                    values[index, exponent] = value
+                    beta = min(beta, value)
+            except SearchTimeout:
+                return
+            # Children cut off above only have lower bounds, but every one of
+            # them is at least as good for the player as the worst spawn
+            children.sort(key=lambda child: values[child[1], child[2]])
+            worst = children[0]
+            yield depth, (worst[1], worst[2]), values[worst[1], worst[2]]
+
+            # Each spawn ply multiplies the work by roughly the number of
+            # spawns, so a depth that cannot finish in time is not started (an
+            # 8x8 board with room to spare stays at depth 1, a few milliseconds)
+            now = time.perf_counter()
+            if search.deadline is not None and now + (now - started) * len(children) > search.deadline:
+                return
+            started = now
+
+    def worst_spawn(self, board):
+        """(cell index, exponent) of the spawn to make, or None on a full board"""
+        spawn = None
+        depth_reached = 0
+        for depth_reached, spawn, _ in self.iter_search(board):
+            pass
+        self.depth_reached = depth_reached
+        if spawn is None:
+            # Not even depth 1 fitted in the budget; the statically worst
+            # spawn is still a fair guess
+            children = self._spawns(board)
+            if not children:
+                return None
+            _, index, exponent = min(children, key=lambda child: self.evaluate(child[0]))
+            spawn = (index, exponent)
+        return spawn
+
+    def prefetch(self, board):
+        """Start choosing the spawn for board on a background thread"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._prefetched = (board, self._executor.submit(self.worst_spawn, board))
+
+    def spawn_for(self, board):
+        """The prefetched answer if it was for this board, else a fresh search"""
+        prefetched, self._prefetched = self._prefetched, None
+        if prefetched is not None and prefetched[0] == board:
+            return prefetched[1].result()
+        return self.worst_spawn(board)
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._prefetched = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the hard-mode adversary on random positions")
+    parser.add_argument("--size", type=int, default=8, choices=(4, 8))
+    parser.add_argument("--budget", type=int, default=DEFAULT_TIME_BUDGET_MS, help="time budget in ms")
+    parser.add_argument("--positions", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = engine_for_size(args.size)
+    adversary = Adversary(engine, args.budget)
+    rng = random.Random(args.seed)
+    times = []
+    depths = []
+    for _ in range(args.positions):
+        board = engine.new_board(rng)
+        for _ in range(rng.randrange(400)):
+            directions = [d for d in DIRECTIONS if engine.move(board, d)[0] != board]
+            if not directions:
+                break
+            board = engine.spawn(engine.move(board, rng.choice(directions))[0], rng)
+        directions = [d for d in DIRECTIONS if engine.move(board, d)[0] != board]
+        if not directions:
+            continue
+        board = engine.move(board, rng.choice(directions))[0]
+        start = time.perf_counter()
+        adversary.worst_spawn(board)
+        times.append((time.perf_counter() - start) * 1000)
+        depths.append(adversary.depth_reached)
+    times.sort()
+    print(f"{args.size}x{args.size}, {len(times)} positions, budget {args.budget} ms")
+    print(f"  median {times[len(times) // 2]:.1f} ms, max {times[-1]:.1f} ms")
+    print("  depth reached: " + ", ".join(f"{d}: {depths.count(d)}" for d in sorted(set(depths))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Background process that streams expectimax hints to the game loop.
+
+The UI thread hands the board over after every committed move and then only
+polls for answers without blocking. The worker deepens its search one ply at a
+time and sends back the best move after each completed depth. Every request
+carries a generation number; bumping the shared generation (a new board or the
+player moving) makes the worker drop the stale search at its next clock check.
+"""
+import multiprocessing
+import queue
+import signal
+
+from engines import engine_for_size
+from expectimax import ExpectimaxSolver
+from spawns import DEFAULT_SPAWN
+
+DEFAULT_TIME_BUDGET_MS = 3000
+EXTRA_DEPTH = 2
+
+
+def _worker_main(size, time_budget_ms, spawn, requests, results, generation):
+    # A forked child inherits pygame's signal handlers, which would swallow
+    # the SIGTERM sent by terminate()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    solver = ExpectimaxSolver(engine_for_size(size), time_budget_ms, extra_depth=EXTRA_DEPTH, spawn=spawn)
+    while True:
+        request = requests.get()
+        # Skip straight to the newest request if several queued up
+        while True:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+        if request is None:
+            return
+        request_generation, board = request
+        if request_generation != generation.value:
+            continue
+
+        solver.should_stop = lambda: generation.value != request_generation
+        for depth, direction, _ in solver.iter_search(board):
+            results.put((request_generation, depth, direction))
+
+
+class HintWorker:
+    def __init__(self, size, time_budget_ms=DEFAULT_TIME_BUDGET_MS, spawn=DEFAULT_SPAWN):
+        self.size = size
+        self.time_budget_ms = time_budget_ms
+        self.spawn = spawn
+        self.requests = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.generation = multiprocessing.Value("i", 0, lock=False)
+        self.process = None
+        self.best = None
+
+    def start(self):
+        if self.process is None:
+            self.process = multiprocessing.Process(
+                target=_worker_main,
+                args=(self.size, self.time_budget_ms, self.spawn, self.requests, self.results, self.generation),
+                daemon=True,
+            )
+            self.process.start()
+
+    def submit(self, board):
+        """Start analysing a packed board, cancelling whatever ran before"""
+        self.start()
+        self.generation.value += 1
+        self.best = None
+        self.requests.put((self.generation.value, board))
+
+    def cancel(self):
+        """Drop the current search, e.g. because the player just moved"""
+        self.generation.value += 1
+        self.best = None
+
+    def poll(self):
+        """Return the deepest (depth, direction) answer so far without blocking"""
+        current = self.generation.value
+        while True:
+            try:
+                result_generation, depth, direction = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if result_generation == current:
+                self.best = (depth, direction)
+        return self.best
+
+    def stop(self):
+        if self.process is None:
+            return
+        self.cancel()
+        self.requests.put(None)
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
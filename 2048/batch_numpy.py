@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""NumPy-vectorised stepping of many 2048 boards at once.
+
+The state is an (N, size, size) uint8 array of exponents (0 = empty, 1 = 2,
+2 = 4, ...). Every move rotates the boards so the move becomes "left", slides
+all rows together and rotates back. The slide loops over the size columns, not
+over boards, and keeps Game2048.move_tile's rule that a merged tile can merge
+again with the next equal tile. Spawns pick one empty cell per board with
+random keys and an argmax, and draw the tile from a spawns distribution
+(90% 2 / 10% 4 by default).
+"""
+import sys
+import time
+
+import numpy as np
+
+from spawns import DEFAULT_SPAWN, spawn_exponents
+
+# Directions match Game2048.move: 0: up, 1: right, 2: down, 3: left
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+
+
+def _orient(cells, direction):
+    """View the boards so that the given move slides towards column 0"""
+    if direction == LEFT:
+        return cells
+    if direction == RIGHT:
+        return cells[:, :, ::-1]
+    if direction == UP:
+        return cells.transpose(0, 2, 1)
+    return cells.transpose(0, 2, 1)[:, :, ::-1]
+
+
+def _unorient(cells, direction):
+    if direction == LEFT:
+        return cells
+    if direction == RIGHT:
+        return cells[:, :, ::-1]
+    if direction == UP:
+        return cells.transpose(0, 2, 1)
+    return cells[:, :, ::-1].transpose(0, 2, 1)
+
+
+def slide_rows(rows):
+    """Slide an (M, size) array of exponent rows left; return (rows, scores)"""
+    count, size = rows.shape
+    # Stable sort on "is empty" packs the tiles to the left in order
+    order = np.argsort(rows == 0, axis=1, kind="stable")
+    packed = np.take_along_axis(rows, order, axis=1)
+
+    out = np.zeros_like(rows)
+    top = np.zeros(count, dtype=np.intp)
+    scores = np.zeros(count, dtype=np.int64)
+    index = np.arange(count)
+    for col in range(size):
+        value = packed[:, col]
+        occupied = value != 0
+        if not occupied.any():
+            break
+        previous = out[index, np.maximum(top - 1, 0)]
+        merge = occupied & (top > 0) & (previous == value)
+        push = occupied & ~merge
+
+        merged_rows = index[merge]
+        out[merged_rows, top[merge] - 1] += 1
+        scores[merge] += np.left_shift(1, value[merge].astype(np.int64) + 1)
+
+        pushed_rows = index[push]
+        out[pushed_rows, top[push]] = value[push]
+        top += push
+    return out, scores
+
+
+def move_boards(cells, direction):
+    """Apply one move to every board; return (cells, scores, moved)"""
+    count, size, _ = cells.shape
+    oriented = np.ascontiguousarray(_orient(cells, direction)).reshape(-1, size)
+    slid, scores = slide_rows(oriented)
+    new = np.ascontiguousarray(_unorient(slid.reshape(count, size, size), direction))
+    moved = (new != cells).reshape(count, -1).any(axis=1)
+    return new, scores.reshape(count, size).sum(axis=1), moved
+
+
+def can_move(cells):
+    """Boards that still have an empty cell or an adjacent equal pair"""
+    empty = (cells == 0).reshape(len(cells), -1).any(axis=1)
+    horizontal = ((cells[:, :, 1:] == cells[:, :, :-1]) & (cells[:, :, 1:] != 0)).reshape(len(cells), -1).any(axis=1)
+    vertical = ((cells[:, 1:, :] == cells[:, :-1, :]) & (cells[:, 1:, :] != 0)).reshape(len(cells), -1).any(axis=1)
+    return empty | horizontal | vertical
+
+
+def spawn(cells, rng, mask=None, distribution=DEFAULT_SPAWN):
+    """Add a tile drawn from distribution to a random empty cell of every (masked) board, in place"""
+    count, size, _ = cells.shape
+    rows = np.arange(count) if mask is None else np.flatnonzero(mask)
+    if len(rows) == 0:
+        return
+    flat = cells.reshape(count, size * size)
+    empty = flat[rows] == 0
+    keys = rng.random(empty.shape)
+    keys[~empty] = -1.0
+    position = keys.argmax(axis=1)
+    has_room = empty.any(axis=1)
+    exponents, weights = zip(*spawn_exponents(distribution))
+    # Walk the distribution like spawns.pick_value: the first pair whose
+    # cumulative probability exceeds the draw
+    choice = np.searchsorted(np.cumsum(weights), rng.random(len(rows)), side="right")
+    values = np.array(exponents, dtype=cells.dtype)[np.minimum(choice, len(exponents) - 1)]
+    flat[rows[has_room], position[has_room]] = values[has_room]
+
+
+class BoardBatch:
+    def __init__(self, count, size=4, seed=None, distribution=DEFAULT_SPAWN):
+        self.size = size
+        self.distribution = distribution
+        self.rng = np.random.default_rng(seed)
+        self.cells = np.zeros((count, size, size), dtype=np.uint8)
+        self.scores = np.zeros(count, dtype=np.int64)
+        self.alive = np.ones(count, dtype=bool)
+        spawn(self.cells, self.rng, distribution=distribution)
+        spawn(self.cells, self.rng, distribution=distribution)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def step(self, directions):
+        """Advance every live board by one move and spawn where it moved
+
+        directions is a single direction or an (N,) array with one per board.
+        Returns the boolean array of boards that actually moved.
+        """
+        directions = np.broadcast_to(np.asarray(directions), self.alive.shape)
+        moved = np.zeros(len(self.cells), dtype=bool)
+        for direction in (UP, RIGHT, DOWN, LEFT):
+            selected = np.flatnonzero(self.alive & (directions == direction))
+            if len(selected) == 0:
+                continue
+            new, gained, did_move = move_boards(self.cells[selected], direction)
+            self.cells[selected] = new
+            self.scores[selected] += gained
+            moved[selected] = did_move
+        spawn(self.cells, self.rng, moved, self.distribution)
+        self.alive &= can_move(self.cells)
+        return moved
+
+    def values(self):
+        """Tile values rather than exponents, like Game2048.grid"""
+        return np.where(self.cells > 0, np.left_shift(1, self.cells.astype(np.int64)), 0)
+
+    def max_tiles(self):
+        return np.left_shift(1, self.cells.reshape(len(self.cells), -1).max(axis=1).astype(np.int64))
+
+
+def benchmark(count=100000, size=4, steps=20, seed=0):
+    """Step a batch with random moves and return boards stepped per second"""
+    batch = BoardBatch(count, size, seed)
+    rng = np.random.default_rng(seed + 1)
+    start = time.perf_counter()
+    for _ in range(steps):
+        batch.step(rng.integers(0, 4, count))
+    return count * steps / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for size in (4, 8):
+        print(f"{size}x{size}: {benchmark(count, size):,.0f} boards stepped/sec")
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""Benchmark suite for the 2048 engines across grid sizes.
+
+Every implementation plays the same kind of seeded random game and reports:
+
+- moves_per_sec: turns (slide, spawn and game-over check) per second
+- spawn_us: one spawn, averaged while boards fill from empty to full
+- game_over_us: one game-over check on the positions reached in play
+- bytes_per_board: memory held by one board's state
+
+Implementations:
+
+- list: core.GameCore, the grid rules behind game_2048.py and
+  game_2048_updated.py, without their tiles and animations
+- packed: bitboard (4x4) and rowpack (8x8)
+- sparse: huge_board.SparseBoard
+- batch: batch_numpy.BoardBatch, costs divided per board
+
+Each case runs a warmup pass first and keeps the best of a few repeats. Results
+are written as JSON and can be checked against a stored baseline:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+SIZES = (4, 8, 16)
+IMPLEMENTATIONS = ("list", "packed", "sparse", "batch")
+DEFAULT_TURNS = 2000
+DEFAULT_REPEATS = 3
+DEFAULT_SEED = 0
+BATCH_BOARDS = 4096
+# Game-over checks are timed this many at a time, they are too quick for one
+CHECK_CALLS = 16
+# Higher is better for these metrics, lower for every other one
+HIGHER_IS_BETTER = {"moves_per_sec"}
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes held by obj and everything it references, counted once"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, np.ndarray)):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    for name in getattr(type(obj), "__slots__", ()):
+        if hasattr(obj, name):
+            size += deep_sizeof(getattr(obj, name), seen)
+    return size
+
+
+class ListGame:
+    """core.GameCore, the list-of-lists rules both GUI editions run, at any size"""
+
+    def __init__(self, size):
+        from core import GameConfig, GameCore
+        self.config = GameConfig(size, 2048)
+        self.game_class = GameCore
+
+    def new(self, seed):
+        return self.game_class(self.config, seed)
+
+    def empty(self, seed):
+        game = self.game_class(self.config, seed)
+        for row in range(self.config.size):
+            for col in range(self.config.size):
+                game.set_cell(row, col, 0)
+        return game
+
+    def turn(self, game, direction):
+        # One turn of Game2048.move, without the animations
+        moved, _ = game.slide(direction)
+        if moved:
+            game.add_random_tile()
+            game.check_game_over()
+        return game, moved
+
+    def spawn(self, game):
+        if not game.cell_index:
+            return game, False
+        game.add_random_tile()
+        return game, True
+
+    def game_over(self, game):
+        return game.check_game_over()
+
+    def nbytes(self, game):
+        return deep_sizeof((game.grid, game.cell_index))
+
+
+class PackedGame:
+    """bitboard or rowpack boards held as plain ints"""
+
+    def __init__(self, size):
+        from engines import engine_for_size
+        self.engine = engine_for_size(size)
+
+    def new(self, seed):
+        return self.engine.new_board(random.Random(seed)), random.Random(seed + 1)
+
+    def empty(self, seed):
+        return 0, random.Random(seed)
+
+    def turn(self, state, direction):
+        board, rng = state
+        engine = self.engine
+        new, _ = engine.move(board, direction)
+        if new == board:
+            return state, False
+        board = engine.spawn(new, rng)
+        engine.is_game_over(board)
+        return (board, rng), True
+
+    def spawn(self, state):
+        board, rng = state
+        if not self.engine.count_empty(board):
+            return state, False
+        return (self.engine.spawn(board, rng), rng), True
+
+    def game_over(self, state):
+        return self.engine.is_game_over(state[0])
+
+    def nbytes(self, state):
+        return sys.getsizeof(state[0])
+
+
+class SparseGame:
+    def __init__(self, size):
+        from huge_board import SparseBoard
+        self.board_class = SparseBoard
+        self.size = size
+
+    def new(self, seed):
+        return self.board_class(self.size, seed)
+
+    def empty(self, seed):
+        board = self.board_class(self.size, seed)
+        board.positions = board.positions[:0]
+        board.exponents = board.exponents[:0]
+        return board
+
+    def turn(self, board, direction):
+        return board, board.move(direction)
+
+    def spawn(self, board):
+        return board, board.spawn()
+
+    def game_over(self, board):
+        return not board.can_move()
+
+    def nbytes(self, board):
+        return deep_sizeof((board.positions, board.exponents))
+
+
+GAMES = {"list": ListGame, "packed": PackedGame, "sparse": SparseGame}
+
+
+def _timer_overhead():
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(1000):
+        start = clock()
+        samples.append(clock() - start)
+    return min(samples)
+
+
+def _play(game, turns, seed, overhead):
+    """Play seeded random turns; returns the timings and sampled board sizes"""
+    clock = time.perf_counter_ns
+    rng = random.Random(seed)
+    games = 0
+    state = game.new(seed)
+    turn_ns = 0
+    check_ns = 0
+    checks = 0
+    played = 0
+    sizes = []
+    while played < turns:
+        directions = [0, 1, 2, 3]
+        rng.shuffle(directions)
+        moved = False
+        for direction in directions:
+            start = clock()
+            state, moved = game.turn(state, direction)
+            turn_ns += clock() - start - overhead
+            if moved:
+                break
+        start = clock()
+        for _ in range(CHECK_CALLS):
+            over = game.game_over(state)
+        check_ns += clock() - start - overhead
+        checks += CHECK_CALLS
+        if moved:
+            played += 1
+            if played % 64 == 0:
+                sizes.append(game.nbytes(state))
+        if over or not moved:
+            games += 1
+            state = game.new(seed + games)
+    if not sizes:
+        sizes.append(game.nbytes(state))
+    return turn_ns, played, check_ns / checks, sum(sizes) / len(sizes)
+
+
+def _fill(game, boards, seed, overhead):
+    """Average spawn cost while boards fill up from empty"""
+    clock = time.perf_counter_ns
+    total = 0
+    spawns = 0
+    for index in range(boards):
+        state = game.empty(seed + index)
+        while True:
+            start = clock()
+            state, spawned = game.spawn(state)
+            elapsed = clock() - start - overhead
+            if not spawned:
+                break
+            total += elapsed
+            spawns += 1
+    return total / spawns
+
+
+def bench_game(game, turns, repeats, seed):
+    overhead = _timer_overhead()
+    fill_boards = max(1, turns // 100)
+    # Warmup: fill caches (rowpack's row cache, fonts, lazy imports) first
+    _play(game, max(1, turns // 10), seed, overhead)
+    _fill(game, 1, seed, overhead)
+    results = []
+    for _ in range(repeats):
+        # Like timeit, keep the garbage collector out of the measurements
+        gc.collect()
+        gc.disable()
+        try:
+            turn_ns, played, check_ns, nbytes = _play(game, turns, seed, overhead)
+            spawn_ns = _fill(game, fill_boards, seed, overhead)
+        finally:
+            gc.enable()
+        results.append({
+            "moves_per_sec": played / (turn_ns / 1e9),
+            "spawn_us": spawn_ns / 1000,
+            "game_over_us": check_ns / 1000,
+            "bytes_per_board": nbytes,
+        })
+    return _best(results)
+
+
+def _best(results):
+    # Noise only ever slows a run down, so keep the best value of each metric
+    return {
+        metric: (max if metric in HIGHER_IS_BETTER else min)(result[metric] for result in results)
+        for metric in results[0]
+    }
+
+
+def bench_batch(size, turns, repeats, seed, boards=BATCH_BOARDS):
+    """BoardBatch costs per board, so they line up with the single-board engines"""
+    import batch_numpy
+
+    steps = max(1, turns * 4 // boards)
+    results = []
+    for repeat in range(repeats + 1):
+        batch = batch_numpy.BoardBatch(boards, size, seed)
+        rng = np.random.default_rng(seed + 1)
+        start = time.perf_counter()
+        for _ in range(steps):
+            batch.step(rng.integers(0, 4, boards))
+        step_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch_numpy.can_move(batch.cells)
+        check_seconds = time.perf_counter() - start
+
+        cells = np.zeros((boards, size, size), dtype=np.uint8)
+        start = time.perf_counter()
+        for _ in range(size * size):
+            batch_numpy.spawn(cells, rng)
+        spawn_seconds = time.perf_counter() - start
+
+        if repeat == 0:
+            continue  # warmup
+        results.append({
+            "moves_per_sec": boards * steps / step_seconds,
+            "spawn_us": spawn_seconds / (boards * size * size) * 1e6,
+            "game_over_us": check_seconds / boards * 1e6,
+            "bytes_per_board": batch.cells.nbytes / boards,
+        })
+    return _best(results)
+
+
+def run(sizes=SIZES, implementations=IMPLEMENTATIONS, turns=DEFAULT_TURNS, repeats=DEFAULT_REPEATS,
+        seed=DEFAULT_SEED, progress=None):
+    """Benchmark every available implementation/size pair; returns the report"""
+    results = {}
+    for name in implementations:
+        for size in sizes:
+            key = f"{name}/{size}"
+            if name == "batch":
+                results[key] = bench_batch(size, turns, repeats, seed)
+            else:
+                try:
+                    game = GAMES[name](size)
+                except ValueError:
+                    continue  # no such engine at this size
+                results[key] = bench_game(game, turns, repeats, seed)
+            if progress:
+                progress(key, results[key])
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "turns": turns,
+            "repeats": repeats,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.15):
+    """Per-metric changes against a baseline report
+
+    Returns (case, metric, old, new, change) rows, where change is the relative
+    change in the "better" direction (negative means slower or bigger), and
+    the rows that got worse by more than tolerance.
+    """
+    rows = []
+    regressions = []
+    for key, metrics in report["results"].items():
+        old_metrics = baseline["results"].get(key)
+        if old_metrics is None:
+            continue
+        for metric, new in metrics.items():
+            old = old_metrics.get(metric)
+            if not old:
+                continue
+            change = (new - old) / old
+            if metric not in HIGHER_IS_BETTER:
+                change = -change
+            row = (key, metric, old, new, change)
+            rows.append(row)
+            if change < -tolerance:
+                regressions.append(row)
+    return rows, regressions
+
+
+def print_result(key, result):
+    print(f"{key:<10} {result['moves_per_sec']:>14,.0f} moves/s  {result['spawn_us']:>9.2f} us spawn  "
+          f"{result['game_over_us']:>9.2f} us check  {result['bytes_per_board']:>10,.0f} B/board")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the 2048 engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--impl", nargs="+", default=list(IMPLEMENTATIONS), choices=IMPLEMENTATIONS)
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.impl, args.turns, args.repeats, args.seed, progress=print_result)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.tolerance)
+        print()
+        for key, metric, old, new, change in rows:
+            flag = "  REGRESSION" if change < -args.tolerance else ""
+            print(f"{key:<10} {metric:<16} {old:>14,.2f} -> {new:>14,.2f}  {change:+7.1%}{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Display-free bitboard engine for the 4x4 2048 game.
+
+The whole board is packed into one 64-bit integer holding a 4-bit exponent per
+cell (0 = empty, 1 = 2, 2 = 4, ... 15 = 32768). Cell (row, col) lives in nibble
+row * 4 + col. Moves are applied through 65,536-entry row/column transition
+tables and follow the same merge rules as Game2048.move_tile.
+"""
+import sys
+
+from packed import MAX_EXPONENT, PackedHelpers
+from table_cache import load_tables
+
+SIZE = 4
+CELLS = SIZE * SIZE
+ROW_BITS = 16
+ROW_MASK = 0xFFFF
+COL_MASK = 0x000F000F000F000F
+
+# Directions match Game2048.move: 0: up, 1: right, 2: down, 3: left
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+DIRECTIONS = (UP, RIGHT, DOWN, LEFT)
+DIRECTION_NAMES = ("Up", "Right", "Down", "Left")
+
+
+def slide_exponents(cells):
+    """Slide a line of exponents towards index 0 and return (line, score)"""
+    # Game2048.move_tile lets a freshly merged tile merge again with the next
+    # equal tile ([2, 2, 4] -> [8]), so a move is a plain stack merge
+    stack = []
+    score = 0
+    for exponent in cells:
+        if exponent == 0:
+            continue
+        if stack and stack[-1] == exponent and exponent < MAX_EXPONENT:
+            stack[-1] = exponent + 1
+            score += 1 << (exponent + 1)
+        else:
+            stack.append(exponent)
+    return stack + [0] * (len(cells) - len(stack)), score
+
+
+def unpack_row(row, width=SIZE):
+    """Split a packed row into a list of exponents"""
+    return [(row >> (4 * i)) & 0xF for i in range(width)]
+
+
+def pack_row(cells):
+    """Pack a list of exponents into a row integer"""
+    row = 0
+    for i, exponent in enumerate(cells):
+        row |= exponent << (4 * i)
+    return row
+
+
+def reverse_row(row):
+    """Reverse the nibble order of a 16-bit row"""
+    return ((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12)
+
+
+def spread_column(row):
+    """Place the four nibbles of a 16-bit row down column 0 of a board"""
+    return (row & 0xF) | ((row & 0xF0) << 12) | ((row & 0xF00) << 24) | ((row & 0xF000) << 36)
+
+
+def _build_tables():
+    row_left = [0] * 65536
+    row_score = [0] * 65536
+    row_length = [0] * 65536
+    for row in range(65536):
+        cells, score = slide_exponents(unpack_row(row))
+        row_left[row] = pack_row(cells)
+        row_score[row] = score
+        row_length[row] = SIZE - cells.count(0)
+    row_reverse = [reverse_row(row) for row in range(65536)]
+    left_delta = [row ^ row_left[row] for row in range(65536)]
+    right_delta = [row ^ row_reverse[row_left[row_reverse[row]]] for row in range(65536)]
+    return (
+        row_left,
+        row_score,
+        row_length,
+        row_reverse,
+        left_delta,
+        right_delta,
+        [spread_column(delta) for delta in left_delta],
+        [spread_column(delta) for delta in right_delta],
+        [row_score[row_reverse[row]] for row in range(65536)],
+    )
+
+
+# The tables are built once and then mapped from the on-disk cache; bump this
+# whenever _build_tables changes
+TABLE_VERSION = 1
+
+# ROW_LEFT, ROW_SCORE and ROW_LENGTH describe a 4-cell line slid towards nibble 0:
+# the resulting line, the score gained and how many tiles are left in it.
+# XOR deltas keep move() to one lookup and one xor per line
+(
+    ROW_LEFT,
+    ROW_SCORE,
+    ROW_LENGTH,
+    ROW_REVERSE,
+    ROW_LEFT_DELTA,
+    ROW_RIGHT_DELTA,
+    COL_UP_DELTA,
+    COL_DOWN_DELTA,
+    SCORE_RIGHT,
+) = (table.tolist() for table in load_tables("bitboard-rows", TABLE_VERSION, 9, 65536, _build_tables))
+SCORE_LEFT = ROW_SCORE
+
+
+def move(board, direction):
+    """Apply a move and return (new_board, score_gained)"""
+    # Unrolled over the four lines; this is the hot path of every search
+    if direction == LEFT or direction == RIGHT:
+        if direction == LEFT:
+            deltas, scores = ROW_LEFT_DELTA, SCORE_LEFT
+        else:
+            deltas, scores = ROW_RIGHT_DELTA, SCORE_RIGHT
+        r0 = board & 0xFFFF
+        r1 = (board >> 16) & 0xFFFF
+        r2 = (board >> 32) & 0xFFFF
+        r3 = board >> 48
+        board ^= deltas[r0] | (deltas[r1] << 16) | (deltas[r2] << 32) | (deltas[r3] << 48)
+        return board, scores[r0] + scores[r1] + scores[r2] + scores[r3]
+
+    if direction == UP:
+        deltas, scores = COL_UP_DELTA, SCORE_LEFT
+    else:
+        deltas, scores = COL_DOWN_DELTA, SCORE_RIGHT
+    t = board & COL_MASK
+    c0 = (t | (t >> 12) | (t >> 24) | (t >> 36)) & 0xFFFF
+    t = (board >> 4) & COL_MASK
+    c1 = (t | (t >> 12) | (t >> 24) | (t >> 36)) & 0xFFFF
+    t = (board >> 8) & COL_MASK
+    c2 = (t | (t >> 12) | (t >> 24) | (t >> 36)) & 0xFFFF
+    t = (board >> 12) & COL_MASK
+    c3 = (t | (t >> 12) | (t >> 24) | (t >> 36)) & 0xFFFF
+    board ^= deltas[c0] | (deltas[c1] << 4) | (deltas[c2] << 8) | (deltas[c3] << 12)
+    return board, scores[c0] + scores[c1] + scores[c2] + scores[c3]
+
+
+# Delta swaps for a nibble transpose: swap 1x1, then 2x2 blocks
+_TRANSPOSE_STEPS = (
+    (12, 0x0000F0F00000F0F0),
+    (24, 0x00000000FF00FF00),
+)
+
+
+def transpose(board):
+    """Swap rows and columns of a packed 4x4 board"""
+    for distance, mask in _TRANSPOSE_STEPS:
+        t = (board ^ (board >> distance)) & mask
+        board ^= t ^ (t << distance)
+    return board
+
+
+def mirror(board):
+    """Reverse every row (left-right reflection)"""
+    return (
+        ROW_REVERSE[board & 0xFFFF]
+        | (ROW_REVERSE[(board >> 16) & 0xFFFF] << 16)
+        | (ROW_REVERSE[(board >> 32) & 0xFFFF] << 32)
+        | (ROW_REVERSE[board >> 48] << 48)
+    )
+
+
+def flip(board):
+    """Reverse the order of the rows (top-bottom reflection)"""
+    return (
+        ((board & 0xFFFF) << 48)
+        | (((board >> 16) & 0xFFFF) << 32)
+        | (((board >> 32) & 0xFFFF) << 16)
+        | (board >> 48)
+    )
+
+
+# Everything else only needs the move function; see packed.py
+_helpers = PackedHelpers(SIZE, move)
+get_cell = _helpers.get_cell
+set_cell = _helpers.set_cell
+count_empty = _helpers.count_empty
+empty_cells = _helpers.empty_cells
+spawn = _helpers.spawn
+new_board = _helpers.new_board
+can_move = _helpers.can_move
+is_game_over = _helpers.is_game_over
+max_exponent = _helpers.max_exponent
+max_tile = _helpers.max_tile
+from_grid = _helpers.from_grid
+to_grid = _helpers.to_grid
+sample_boards = _helpers.sample_boards
+
+
+def benchmark(seconds=2.0, seed=0):
+    """Apply moves to sampled positions for a while and return moves per second"""
+    return _helpers.benchmark(seconds, seed, 10000)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"{benchmark(seconds):,.0f} moves/sec")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Incremental empty-cell and mergeable-pair index for a 2048 grid.
+
+Game2048 reports every cell it changes to the index, which then updates only
+what that cell affects:
+
+- a Fenwick tree over "is empty" flags, so the k-th empty cell in row-major
+  order is found in O(log cells) without scanning the grid;
+- counts of equal neighbour pairs per row and per column, so "is there any
+  move left" is a lookup instead of a neighbour scan.
+
+The index is a sequence of the empty (row, col) cells in row-major order, the
+same list add_random_tile used to build, so rng.choice(index) picks exactly
+the cell it used to and seeded games and replays are unchanged.
+"""
+
+
+class CellIndex:
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.values = [0] * self.cells
+        # Fenwick tree over empty flags: with every cell empty, node i covers
+        # i & -i cells
+        self.tree = [0] + [i & -i for i in range(1, self.cells + 1)]
+        self.top_bit = 1 << (self.cells.bit_length() - 1)
+        self.empty = self.cells
+        self.row_pairs = [0] * size
+        self.col_pairs = [0] * size
+        self.pairs = 0
+
+    def __len__(self):
+        return self.empty
+
+    def __getitem__(self, k):
+        """The k-th empty cell as (row, col), counting in row-major order"""
+        if not 0 <= k < self.empty:
+            raise IndexError("empty cell index out of range")
+        tree = self.tree
+        position = 0
+        remaining = k + 1
+        bit = self.top_bit
+        while bit:
+            step = position + bit
+            if step <= self.cells and tree[step] < remaining:
+                position = step
+                remaining -= tree[step]
+            bit >>= 1
+        return divmod(position, self.size)
+
+    def _mark(self, index, delta):
+        self.empty += delta
+        index += 1
+        tree = self.tree
+        while index <= self.cells:
+            tree[index] += delta
+            index += index & -index
+
+    def _count_pairs(self, row, col, value, sign):
+        if not value:
+            return
+        values = self.values
+        size = self.size
+        index = row * size + col
+        if col > 0 and values[index - 1] == value:
+            self.row_pairs[row] += sign
+            self.pairs += sign
+        if col < size - 1 and values[index + 1] == value:
+            self.row_pairs[row] += sign
+            self.pairs += sign
+        if row > 0 and values[index - size] == value:
+            self.col_pairs[col] += sign
+            self.pairs += sign
+        if row < size - 1 and values[index + size] == value:
+            self.col_pairs[col] += sign
+            self.pairs += sign
+
+    def set(self, row, col, value):
+        """Record that a cell now holds value (0 for empty)"""
+        index = row * self.size + col
+        old = self.values[index]
+        if old == value:
+            return
+        self._count_pairs(row, col, old, -1)
+        self.values[index] = value
+        self._count_pairs(row, col, value, 1)
+        if not old:
+            self._mark(index, -1)
+        elif not value:
+            self._mark(index, 1)
+
+    def can_move(self):
+        """True while there is an empty cell or two equal neighbours"""
+        return self.empty > 0 or self.pairs > 0
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""Rules shared by every 2048 edition, driven by a GameConfig.
+
+A GameConfig holds what differs between editions: the board size, the tile
+that wins and the spawn distribution. GameCore keeps the grid, score, seeded
+RNG and move log, and applies moves and spawns by those rules. It never draws
+anything: the pygame editions subclass it and animate their tiles from the
+on_spawn / on_slide / on_merge hooks, so the classic 4x4 game and the 8x8
+edition run the same rules code.
+
+Spawns draw a cell with rng.choice over the empty cells and then one
+rng.random() for the value, in that order, so seeded games still replay on
+the packed engines (see replay.py). In hard mode an adversary.Adversary picks
+every spawn instead; those games do not replay from their move log.
+"""
+import random
+
+from cell_index import CellIndex
+from engines import ENGINES
+from replay import MoveLog, new_seed
+from spawns import DEFAULT_SPAWN, check_spawn, pick_value
+
+# Directions match bitboard and replay: 0: up, 1: right, 2: down, 3: left
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+
+
+class GameConfig:
+    def __init__(self, size, win_tile, spawn=DEFAULT_SPAWN):
+        if size < 2:
+            raise ValueError(f"Board size must be at least 2, got {size}")
+        self.size = size
+        self.win_tile = win_tile
+        # Handed on to the engines, advisors and adversary of this edition
+        self.spawn = check_spawn(spawn)
+
+    def __repr__(self):
+        return f"GameConfig(size={self.size}, win_tile={self.win_tile}, spawn={self.spawn})"
+
+    def spawn_value(self, rng):
+        """A new tile's value from a single rng.random() draw"""
+        return pick_value(self.spawn, rng.random())
+
+    def engine(self):
+        """The packed engine for this size (its tables load from the cache), or None"""
+        return ENGINES.get(self.size)
+
+
+CLASSIC = GameConfig(4, 2048)
+EDITION_8X8 = GameConfig(8, 8192)
+
+
+def line_cells(size, direction):
+    """Every line of the board as a list of (row, col), leading edge first"""
+    forward = range(size)
+    backward = range(size - 1, -1, -1)
+    if direction == UP:
+        return [[(row, col) for row in forward] for col in forward]
+    if direction == DOWN:
+        return [[(row, col) for row in backward] for col in forward]
+    if direction == LEFT:
+        return [[(row, col) for col in forward] for row in forward]
+    return [[(row, col) for col in backward] for row in forward]
+
+
+class GameCore:
+    # Subclasses may swap in a random.Random subclass that draws the same stream
+    rng_class = random.Random
+
+    def __init__(self, config, seed=None, adversary=None):
+        self.config = config
+        # Hard mode: an Adversary on config.engine() chooses the spawns
+        self.adversary = adversary
+        self.size = config.size
+        self.lines = [line_cells(config.size, direction) for direction in (UP, RIGHT, DOWN, LEFT)]
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new game with two tiles; subclasses set up their tiles first"""
+        size = self.size
+        # Each game owns its RNG, so the seed and the move log replay it exactly
+        self.seed = new_seed() if seed is None else seed
+        self.rng = self.rng_class(self.seed)
+        self.log = MoveLog(size, self.seed)
+        self.grid = [[0 for _ in range(size)] for _ in range(size)]
+        # Empty cells and equal neighbours, kept current by set_cell
+        self.cell_index = CellIndex(size)
+        self.score = 0
+        self.best_score = 0
+        self.max_tile = 0
+        self.game_over = False
+        self.won = False
+        self.can_continue = False
+
+        self.add_random_tile()
+        self.add_random_tile()
+
+    def set_cell(self, row, col, value):
+        self.grid[row][col] = value
+        self.cell_index.set(row, col, value)
+
+    def add_random_tile(self):
+        # The index lists the empty cells in row-major order, without a scan
+        if self.cell_index:
+            spawn = self.adversary_spawn() if self.adversary is not None else None
+            if spawn is None:
+                row, col = self.rng.choice(self.cell_index)
+                value = self.config.spawn_value(self.rng)
+            else:
+                row, col, value = spawn
+            self.set_cell(row, col, value)
+            self.max_tile = max(self.max_tile, value)
+            self.on_spawn(row, col, value)
+
+    def packed_board(self):
+        """The grid on the packed engine; ValueError past its largest tile"""
+        return self.adversary.engine.from_grid(self.grid)
+
+    def prefetch_spawn(self):
+        """Let the adversary start on the next spawn while the slide animates"""
+        try:
+            self.adversary.prefetch(self.packed_board())
+        except ValueError:
+            pass
+
+    def adversary_spawn(self):
+        """(row, col, value) of the adversary's spawn, or None to spawn at random"""
+        try:
+            board = self.packed_board()
+        except ValueError:
+            # Tiles past 32768 do not pack, so the endgame falls back to chance
+            return None
+        spawn = self.adversary.spawn_for(board)
+        if spawn is None:
+            return None
+        index, exponent = spawn
+        row, col = divmod(index, self.size)
+        return row, col, 1 << exponent
+
+    def plan_move(self, direction):
+        """The (row, col, to_row, to_col, merged) steps of a move, in order
+
+        Each line is a stack merge from its leading edge, so a merged tile can
+        merge again with the next equal tile ([2, 2, 4] -> [8]). Applying the
+        steps in order never moves a tile onto another unless they merge.
+        """
+        grid = self.grid
+        steps = []
+        for line in self.lines[direction]:
+            stack = []
+            for position, (row, col) in enumerate(line):
+                value = grid[row][col]
+                if not value:
+                    continue
+                if stack and stack[-1] == value:
+                    to_row, to_col = line[len(stack) - 1]
+                    stack[-1] = value * 2
+                    steps.append((row, col, to_row, to_col, True))
+                else:
+                    stack.append(value)
+                    if len(stack) - 1 != position:
+                        to_row, to_col = line[len(stack) - 1]
+                        steps.append((row, col, to_row, to_col, False))
+        return steps
+
+    def slide(self, direction):
+        """Apply a move to the grid and log it; returns (moved, merges)"""
+        steps = self.plan_move(direction)
+        merges = 0
+        for row, col, to_row, to_col, merge in steps:
+            value = self.grid[row][col]
+            if merge:
+                merges += 1
+                value *= 2
+                self.set_cell(to_row, to_col, value)
+                self.score += value
+                self.best_score = max(self.best_score, self.score)
+                self.max_tile = max(self.max_tile, value)
+                if value == self.config.win_tile and not self.won:
+                    self.won = True
+                    self.on_win()
+                self.set_cell(row, col, 0)
+                self.on_merge(row, col, to_row, to_col, value)
+            else:
+                self.set_cell(to_row, to_col, value)
+                self.set_cell(row, col, 0)
+                self.on_slide(row, col, to_row, to_col)
+        if steps:
+            self.log.append(direction)
+        return bool(steps), merges
+
+    def check_game_over(self):
+        # An empty cell or an equal neighbour pair means a move is possible
+        if self.cell_index.can_move():
+            return False
+
+        self.game_over = True
+        self.on_game_over()
+        return True
+
+    # Hooks for the editions' tiles, sounds and animations
+
+    def on_spawn(self, row, col, value):
+        pass
+
+    def on_slide(self, row, col, to_row, to_col):
+        pass
+
+    def on_merge(self, row, col, to_row, to_col, value):
+        pass
+
+    def on_win(self):
+        pass
+
+    def on_game_over(self):
+        pass
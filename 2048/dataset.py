@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Streaming self-play dataset for 2048: fixed-size binary records in chunks.
+
+Every move becomes one record holding the packed board before the move, the
+move played, the points it scored, and the game's final score and max tile.
+Records of the game in progress are held until the game ends (so the outcome
+can be filled in) and are then copied into a preallocated chunk buffer. Full
+buffers go to a background thread that writes each one to its own chunk file;
+only a fixed number of buffers exists, so memory stays flat however many games
+run. Several writers (one per self-play worker) can share a directory: it is
+set up once with create_dataset(), which refuses a directory that already holds
+a dataset so a new run never mixes with the chunks of an old one.
+
+The reader memory-maps the chunk files and hands out NumPy record batches.
+
+    python selfplay.py --games 1000 --policy greedy --dataset data_4
+    python dataset.py data_4
+"""
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+from record_writer import RecordWriter
+
+DEFAULT_CHUNK_RECORDS = 1 << 16
+DEFAULT_BUFFERS = 3
+META_FILE = "dataset.json"
+CHUNK_PATTERN = "w{writer:03d}_chunk_{index:06d}.bin"
+
+
+def record_dtype(size):
+    return np.dtype([
+        ("writer", "<u2"),
+        ("game", "<u4"),
+        ("turn", "<u4"),
+        ("board", "u1", (size * size // 2,)),
+        ("move", "u1"),
+        ("reward", "<u4"),
+        ("final_score", "<u4"),
+        ("max_tile", "<u4"),
+    ])
+
+
+def unpack_boards(records, size):
+    """(N, size, size) exponent array from the packed board column"""
+    raw = records["board"]
+    cells = np.empty((len(raw), size * size), dtype=np.uint8)
+    cells[:, 0::2] = raw & 0xF
+    cells[:, 1::2] = raw >> 4
+    return cells.reshape(len(raw), size, size)
+
+
+def chunk_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, "w*_chunk_*.bin")))
+
+
+def create_dataset(directory, size):
+    """Set up an empty dataset directory; FileExistsError if it already holds one"""
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(os.path.join(directory, META_FILE)) or chunk_paths(directory):
+        raise FileExistsError(f"{directory} already holds a dataset; delete it or pick another directory")
+    with open(os.path.join(directory, META_FILE), "w") as f:
+        json.dump({"size": size, "dtype": record_dtype(size).descr}, f)
+
+
+class DatasetWriter:
+    def __init__(self, directory, size=4, writer_id=0, chunk_records=DEFAULT_CHUNK_RECORDS, buffers=DEFAULT_BUFFERS,
+                 create=True):
+        # create=False joins a directory another process set up with create_dataset()
+        self.directory = directory
+        self.size = size
+        self.writer_id = writer_id
+        self.dtype = record_dtype(size)
+        self.board_bytes = size * size // 2
+        self.chunk_records = chunk_records
+        self.records_written = 0
+        self.games = 0
+        self._game = []
+        self._chunk_index = 0
+
+        if create:
+            create_dataset(directory, size)
+        else:
+            with open(os.path.join(directory, META_FILE)) as f:
+                if json.load(f)["size"] != size:
+                    raise ValueError(f"{directory} holds a dataset of another board size")
+
+        self._writer = RecordWriter(self.dtype, chunk_records, buffers, self._write_chunk)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, board, move, reward):
+        """Add one move of the game in progress"""
+        self._game.append((board.to_bytes(self.board_bytes, "little"), move, reward))
+
+    def end_game(self, final_score, max_tile):
+        """Finish the game in progress and queue its records"""
+        game = self._game
+        self._game = []
+        count = len(game)
+        writer = self._writer
+        if count:
+            boards = np.frombuffer(b"".join(board for board, _, _ in game), dtype=np.uint8)
+            boards = boards.reshape(count, self.board_bytes)
+            moves = np.fromiter((move for _, move, _ in game), dtype=np.uint8, count=count)
+            rewards = np.fromiter((reward for _, _, reward in game), dtype=np.uint32, count=count)
+            start = 0
+            while start < count:
+                take = min(count - start, self.chunk_records - writer.filled)
+                part = writer.buffer[writer.filled:writer.filled + take]
+                part["writer"] = self.writer_id
+                part["game"] = self.games
+                part["turn"] = np.arange(start, start + take)
+                part["board"] = boards[start:start + take]
+                part["move"] = moves[start:start + take]
+                part["reward"] = rewards[start:start + take]
+                part["final_score"] = final_score
+                part["max_tile"] = max_tile
+                writer.filled += take
+                start += take
+                if writer.filled == self.chunk_records:
+                    self._flush()
+        self.games += 1
+
+    def _flush(self):
+        if self._writer.filled:
+            path = os.path.join(
+                self.directory, CHUNK_PATTERN.format(writer=self.writer_id, index=self._chunk_index)
+            )
+            self.records_written += self._writer.flush(path)
+            self._chunk_index += 1
+
+    @staticmethod
+    def _write_chunk(rows, path):
+        # Every chunk gets its own file
+        with open(path, "wb") as f:
+            rows.tofile(f)
+
+    def close(self):
+        """Write any partial chunk and wait for the writer thread"""
+        self._flush()
+        self._writer.close()
+
+
+class DatasetReader:
+    def __init__(self, directory):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        self.size = meta["size"]
+        self.dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+        self.paths = chunk_paths(directory)
+        self.chunks = [np.memmap(path, dtype=self.dtype, mode="r") for path in self.paths if os.path.getsize(path)]
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def batches(self, batch_size=4096):
+        """Yield record arrays of up to batch_size rows, straight from the maps"""
+        for chunk in self.chunks:
+            for start in range(0, len(chunk), batch_size):
+                yield chunk[start:start + batch_size]
+
+    def boards(self, records):
+        return unpack_boards(records, self.size)
+
+
+if __name__ == "__main__":
+    reader = DatasetReader(sys.argv[1])
+    games = set()
+    for batch in reader.batches():
+        games.update(zip(batch["writer"].tolist(), batch["game"].tolist()))
+    print(
+        f"{len(reader):,} records of {len(games):,} games in {len(reader.chunks)} chunks, "
+        f"{reader.size}x{reader.size} boards"
+    )
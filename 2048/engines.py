@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""Pick the packed-board engine that matches a grid size."""
+import bitboard
+import rowpack
+
+ENGINES = {
+    bitboard.SIZE: bitboard,
+    rowpack.SIZE: rowpack,
+}
+
+
+def engine_for_size(size):
+    """Return the engine module for a square board of the given size"""
+    try:
+        return ENGINES[size]
+    except KeyError:
+        raise ValueError(f"No packed engine for a {size}x{size} board") from None
+
+
+def engine_for_grid(grid):
+    return engine_for_size(len(grid))
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Symmetry-canonical evaluation cache for 2048 search, persisted to disk.
+
+A board and its 8 rotations/reflections always have the same value, so entries
+are keyed by the smallest of the 8 packed boards. Recent entries live in an
+in-memory LRU dictionary; save() writes everything to a compact open-addressing
+table which later sessions memory-map at startup and probe on a memory miss.
+
+Values are only as good as the evaluator that produced them, so the header
+records a digest of an evaluator ID string (expectimax.evaluator_id() for the
+built-in heuristic). A file written under another ID is not loaded: opening it
+starts an empty cache that replaces the file on the next save().
+
+File layout (little-endian):
+    header: magic, version, key size in bytes, slot count, entry count,
+            evaluator digest
+    slots:  key bytes + float32 value + uint8 search depth (all-zero key = empty)
+"""
+import hashlib
+import mmap
+import os
+import struct
+from collections import OrderedDict
+
+CACHE_MAGIC = b"2048EVC\0"
+CACHE_VERSION = 2
+HEADER = struct.Struct("<8sIIQQ16s")
+VALUE = struct.Struct("<fB")
+DEFAULT_CAPACITY = 1 << 20
+_MASK64 = (1 << 64) - 1
+
+
+class EvaluatorMismatch(ValueError):
+    """Raised when a cache file was written for a different evaluator"""
+
+
+def evaluator_digest(evaluator_id):
+    return hashlib.blake2b(evaluator_id.encode(), digest_size=16).digest()
+
+
+def symmetries(engine, board):
+    """The 8 dihedral images of a packed board"""
+    mirrored = engine.mirror(board)
+    transposed = engine.transpose(board)
+    transposed_mirrored = engine.mirror(transposed)
+    return (
+        board,
+        mirrored,
+        engine.flip(board),
+        engine.flip(mirrored),
+        transposed,
+        transposed_mirrored,
+        engine.flip(transposed),
+        engine.flip(transposed_mirrored),
+    )
+
+
+def canonical(engine, board):
+    """Smallest packed board among the 8 symmetries"""
+    return min(symmetries(engine, board))
+
+
+def _slot_hash(key):
+    # Fold wide keys down to 64 bits, then mix (splitmix64 finaliser)
+    folded = 0
+    while key:
+        folded ^= key & _MASK64
+        key >>= 64
+    folded = ((folded ^ (folded >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    folded = ((folded ^ (folded >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return folded ^ (folded >> 31)
+
+
+class EvalCache:
+    def __init__(self, engine, path=None, capacity=DEFAULT_CAPACITY, evaluator_id=""):
+        self.engine = engine
+        self.path = path
+        self.capacity = capacity
+        self.evaluator_id = evaluator_id
+        self.digest = evaluator_digest(evaluator_id)
+        # Set when the file at path belonged to another evaluator and was ignored
+        self.reset = False
+        self.key_bytes = engine.CELLS // 2
+        self.record_size = self.key_bytes + VALUE.size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._file = None
+        self._map = None
+        self._slots = 0
+        self._disk_entries = 0
+        if path and os.path.exists(path):
+            try:
+                self.load(path)
+            except EvaluatorMismatch:
+                self.reset = True
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, path):
+        """Memory-map a saved cache file so lookups can fall back to it"""
+        self.close()
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, key_bytes, slots, count, digest = HEADER.unpack_from(self._map, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or key_bytes != self.key_bytes:
+            self.close()
+            raise ValueError(f"{path} is not a {self.engine.SIZE}x{self.engine.SIZE} evaluation cache")
+        if digest != self.digest:
+            self.close()
+            raise EvaluatorMismatch(f"{path} was written for a different evaluator than {self.evaluator_id!r}")
+        self._slots = slots
+        self._disk_entries = count
+        self.path = path
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = None
+        self._file = None
+        self._slots = 0
+        self._disk_entries = 0
+
+    def _probe_disk(self, key):
+        if not self._slots:
+            return None
+        wanted = key.to_bytes(self.key_bytes, "little")
+        empty = bytes(self.key_bytes)
+        slot = _slot_hash(key) & (self._slots - 1)
+        while True:
+            offset = HEADER.size + slot * self.record_size
+            stored = self._map[offset:offset + self.key_bytes]
+            if stored == wanted:
+                return VALUE.unpack_from(self._map, offset + self.key_bytes)
+            if stored == empty:
+                return None
+            slot = (slot + 1) & (self._slots - 1)
+
+    def get(self, board, depth=0):
+        """Cached value searched to at least depth, or None"""
+        key = canonical(self.engine, board)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        else:
+            entry = self._probe_disk(key)
+            if entry is not None:
+                # Promote disk entries so hot positions stop paying for the probe
+                self.disk_hits += 1
+                self._store(key, entry)
+        if entry is None or entry[1] < depth:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def put(self, board, value, depth=0):
+        self._store(canonical(self.engine, board), (value, depth))
+
+    def _store(self, key, entry):
+        entries = self.entries
+        if key in entries:
+            entries.move_to_end(key)
+        elif len(entries) >= self.capacity:
+            entries.popitem(last=False)
+            self.evictions += 1
+        entries[key] = entry
+
+    def cached(self, evaluate):
+        """Wrap a board -> value function so its results go through the cache"""
+        def cached_evaluate(board):
+            value = self.get(board)
+            if value is None:
+                value = evaluate(board)
+                self.put(board, value)
+            return value
+        return cached_evaluate
+
+    def save(self, path=None):
+        """Write memory and mapped entries to disk and map the new file"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No cache file path given")
+
+        merged = {}
+        if self._slots:
+            empty = bytes(self.key_bytes)
+            for slot in range(self._slots):
+                offset = HEADER.size + slot * self.record_size
+                stored = self._map[offset:offset + self.key_bytes]
+                if stored != empty:
+                    merged[int.from_bytes(stored, "little")] = VALUE.unpack_from(
+                        self._map, offset + self.key_bytes
+                    )
+        for key, entry in self.entries.items():
+            if key and (key not in merged or merged[key][1] <= entry[1]):
+                merged[key] = entry
+
+        # Keep the table at most half full so probe chains stay short
+        slots = 16
+        while slots < 2 * len(merged):
+            slots *= 2
+        table = bytearray(HEADER.size + slots * self.record_size)
+        HEADER.pack_into(
+            table, 0, CACHE_MAGIC, CACHE_VERSION, self.key_bytes, slots, len(merged), self.digest
+        )
+        for key, (value, depth) in merged.items():
+            slot = _slot_hash(key) & (slots - 1)
+            while True:
+                offset = HEADER.size + slot * self.record_size
+                if not any(table[offset:offset + self.key_bytes]):
+                    break
+                slot = (slot + 1) & (slots - 1)
+            table[offset:offset + self.key_bytes] = key.to_bytes(self.key_bytes, "little")
+            VALUE.pack_into(table, offset + self.key_bytes, value, min(depth, 255))
+
+        self.close()
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(table)
+        os.replace(temp_path, path)
+        self.load(path)
+
+    def file_size(self):
+        if self.path and os.path.exists(self.path):
+            return os.path.getsize(self.path)
+        return 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self.entries),
+            "disk_entries": self._disk_entries,
+            "file_size": self.file_size(),
+            "reset": self.reset,
+        }
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Expectimax move advisor for the 4x4 and 8x8 2048 games.
+
+Player moves are max nodes and tile spawns are chance nodes weighted by the
+edition's spawn distribution (by default 90% 2s, 10% 4s). The search deepens iteratively until
+its millisecond budget runs out, goes deeper as the board fills up, cuts off
+branches whose probability mass is negligible and shares chance-node values
+through a transposition table keyed by the packed board.
+"""
+import functools
+import random
+import sys
+import time
+
+from bitboard import DIRECTIONS, unpack_row
+from engines import engine_for_grid, engine_for_size
+from spawns import DEFAULT_SPAWN, spawn_exponents
+
+# Heuristic weights for a single row (the same terms are applied to columns)
+SCORE_LOST_PENALTY = 200000.0
+SCORE_MONOTONICITY_POWER = 4.0
+SCORE_MONOTONICITY_WEIGHT = 47.0
+SCORE_SUM_POWER = 3.5
+SCORE_SUM_WEIGHT = 11.0
+SCORE_MERGES_WEIGHT = 700.0
+SCORE_EMPTY_WEIGHT = 270.0
+
+DEFAULT_TIME_BUDGET_MS = 100
+DEFAULT_PROBABILITY_CUTOFF = 1e-4
+TRANSPOSITION_TABLE_SIZE = 1 << 18
+# Nodes searched between two looks at the clock
+CLOCK_CHECK_INTERVAL = 64
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent"""
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def row_heuristic(row, width):
+    """Score one packed row: reward space and merges, punish disorder"""
+    cells = unpack_row(row, width)
+    total = 0.0
+    empty = 0
+    merges = 0
+    previous = 0
+    counter = 0
+    for exponent in cells:
+        total += exponent ** SCORE_SUM_POWER
+        if exponent == 0:
+            empty += 1
+            continue
+        if previous == exponent:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = exponent
+    if counter > 0:
+        merges += 1 + counter
+
+    # Penalise the cheaper of the two monotonicity violations, which keeps
+    # the score identical for a row and its mirror image
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for i in range(1, width):
+        a = cells[i - 1] ** SCORE_MONOTONICITY_POWER
+        b = cells[i] ** SCORE_MONOTONICITY_POWER
+        if cells[i - 1] > cells[i]:
+            monotonicity_left += a - b
+        else:
+            monotonicity_right += b - a
+
+    return (
+        SCORE_LOST_PENALTY
+        + SCORE_EMPTY_WEIGHT * empty
+        + SCORE_MERGES_WEIGHT * merges
+        - SCORE_MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right)
+        - SCORE_SUM_WEIGHT * total
+    )
+
+
+def heuristic(engine, board):
+    """Sum of row_heuristic over every row and column of a packed board"""
+    size = engine.SIZE
+    mask = engine.ROW_MASK
+    bits = engine.ROW_BITS
+    value = 0.0
+    for b in (board, engine.transpose(board)):
+        for row in range(size):
+            value += row_heuristic((b >> (bits * row)) & mask, size)
+    return value
+
+
+def evaluator_id(spawn=DEFAULT_SPAWN):
+    """Identify heuristic() and the spawn model for eval_cache.EvalCache files
+
+    Cached values are chance-node averages of heuristic(), so they go stale
+    when a weight or the spawn odds change.
+    """
+    weights = (
+        SCORE_LOST_PENALTY,
+        SCORE_MONOTONICITY_POWER,
+        SCORE_MONOTONICITY_WEIGHT,
+        SCORE_SUM_POWER,
+        SCORE_SUM_WEIGHT,
+        SCORE_MERGES_WEIGHT,
+        SCORE_EMPTY_WEIGHT,
+    )
+    return f"heuristic{weights!r} spawn={tuple(spawn)!r}"
+
+
+def adaptive_depth(empty, size):
+    """Search deeper as the board fills up and the branching factor drops"""
+    if size > 4:
+        # Every empty cell is a chance branch, so 8x8 boards stay shallow
+        # until they are nearly full
+        return 3 if empty <= 6 else 2
+    if empty <= 2:
+        return 6
+    if empty <= 4:
+        return 5
+    if empty <= 7:
+        return 4
+    return 3
+
+
+class ExpectimaxSolver:
+    def __init__(
+        self,
+        engine,
+        time_budget_ms=DEFAULT_TIME_BUDGET_MS,
+        max_depth=None,
+        probability_cutoff=DEFAULT_PROBABILITY_CUTOFF,
+        evaluate=None,
+        cache=None,
+        extra_depth=0,
+        add_rewards=False,
+        spawn=DEFAULT_SPAWN,
+    ):
+        self.engine = engine
+        self.time_budget_ms = time_budget_ms
+        self.max_depth = max_depth
+        # Plies searched beyond adaptive_depth when there is time to spare
+        self.extra_depth = extra_depth
+        self.probability_cutoff = probability_cutoff
+        self.evaluate = evaluate or functools.partial(heuristic, engine)
+        # An afterstate value function (ntuple.NTupleNetwork.evaluate) only
+        # scores what follows a move, so its moves must also count their reward
+        self.add_rewards = add_rewards
+        self.spawn_exponents = spawn_exponents(spawn)
+        self.table = {}
+        # Optional eval_cache.EvalCache shared across searches and sessions
+        self.cache = cache
+        self.deadline = None
+        self.should_stop = None
+        self.nodes = 0
+        self.table_hits = 0
+        self.depth_reached = 0
+
+    def _check_clock(self):
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        if self.should_stop is not None and self.should_stop():
+            raise SearchTimeout()
+
+    def _max_node(self, board, depth, probability):
+        self.nodes += 1
+        if self.nodes % CLOCK_CHECK_INTERVAL == 0:
+            self._check_clock()
+        move = self.engine.move
+        add_rewards = self.add_rewards
+        best = 0.0
+        for direction in DIRECTIONS:
+            new, reward = move(board, direction)
+            if new != board:
+                value = self._chance_node(new, depth - 1, probability)
+                if add_rewards:
+                    value += reward
+                if value > best:
+                    best = value
+        return best
+
+    def _chance_node(self, board, depth, probability):
+        if depth <= 0 or probability < self.probability_cutoff:
+            return self.evaluate(board)
+
+        entry = self.table.get(board)
+        if entry is not None and entry[0] >= depth:
+            self.table_hits += 1
+            return entry[1]
+        if self.cache is not None:
+            value = self.cache.get(board, depth)
+            if value is not None:
+                self.table[board] = (depth, value)
+                return value
+
+        cells = self.engine.empty_cells(board)
+        count = len(cells)
+        if count == 0:
+            return self.evaluate(board)
+        spawns = [(exponent, weight, probability * weight / count) for exponent, weight in self.spawn_exponents]
+        total = 0.0
+        for index in cells:
+            shift = 4 * index
+            for exponent, weight, branch_probability in spawns:
+                total += weight * self._max_node(board | (exponent << shift), depth, branch_probability)
+        value = total / count
+
+        if len(self.table) >= TRANSPOSITION_TABLE_SIZE:
+            self.table.clear()
+        self.table[board] = (depth, value)
+        if self.cache is not None:
+            self.cache.put(board, value, depth)
+        return value
+
+    def iter_search(self, board):
+        """Yield (depth, best_direction, values) after each completed depth
+
+        values maps every legal direction to its expected evaluation. The
+        generator stops once the time budget is spent or the depth limit for
+        the current number of empty cells is reached.
+        """
+        start = time.perf_counter()
+        self.deadline = start + self.time_budget_ms / 1000 if self.time_budget_ms else None
+        self.nodes = 0
+        self.table_hits = 0
+        self.depth_reached = 0
+        self.table.clear()
+
+        successors = []
+        for direction in DIRECTIONS:
+            new, reward = self.engine.move(board, direction)
+            if new != board:
+                successors.append((direction, new, reward if self.add_rewards else 0))
+        if not successors:
+            return
+
+        limit = adaptive_depth(self.engine.count_empty(board), self.engine.SIZE) + self.extra_depth
+        if self.max_depth is not None:
+            limit = min(limit, self.max_depth)
+
+        for depth in range(1, limit + 1):
+            try:
+                values = {
+                    direction: reward + self._chance_node(new, depth - 1, 1.0)
+                    for direction, new, reward in successors
+                }
+            except SearchTimeout:
+                return
+            self.depth_reached = depth
+            yield depth, max(values, key=values.get), values
+
+    def best_move(self, board):
+        """Best direction for a packed board, or None if no move is possible"""
+        best = None
+        for _, direction, _ in self.iter_search(board):
+            best = direction
+        if best is None:
+            # Not even depth 1 fitted in the budget; fall back to any legal move
+            for direction in DIRECTIONS:
+                if self.engine.move(board, direction)[0] != board:
+                    return direction
+        return best
+
+
+# One solver per board size so the row heuristic cache stays warm between hints
+_solvers = {}
+
+
+def suggest_move(grid, time_budget_ms=DEFAULT_TIME_BUDGET_MS, spawn=DEFAULT_SPAWN):
+    """Best direction (0: up, 1: right, 2: down, 3: left) for a Game2048 grid"""
+    engine = engine_for_grid(grid)
+    solver = _solvers.get((engine.SIZE, spawn))
+    if solver is None:
+        solver = _solvers[engine.SIZE, spawn] = ExpectimaxSolver(engine, spawn=spawn)
+    solver.time_budget_ms = time_budget_ms
+    return solver.best_move(engine.from_grid(grid))
+
+
+def play(size=4, time_budget_ms=DEFAULT_TIME_BUDGET_MS, seed=0, cache=None):
+    """Play one headless game with the solver and return (score, max_tile, moves)"""
+    engine = engine_for_size(size)
+    rng = random.Random(seed)
+    solver = ExpectimaxSolver(engine, time_budget_ms, cache=cache)
+    board = engine.new_board(rng)
+    score = 0
+    moves = 0
+    while True:
+        direction = solver.best_move(board)
+        if direction is None:
+            break
+        board, gained = engine.move(board, direction)
+        score += gained
+        moves += 1
+        board = engine.spawn(board, rng)
+    return score, engine.max_tile(board), moves
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_TIME_BUDGET_MS
+    cache = None
+    if len(sys.argv) > 3:
+        from eval_cache import EvalCache
+
+        cache = EvalCache(engine_for_size(size), sys.argv[3], evaluator_id=evaluator_id())
+        if cache.reset:
+            print(f"{sys.argv[3]} was built with other heuristic weights; starting a new cache")
+    start = time.perf_counter()
+    score, tile, moves = play(size, budget, cache=cache)
+    elapsed = time.perf_counter() - start
+    print(f"{size}x{size}: score {score}, max tile {tile}, {moves} moves in {elapsed:.1f}s")
+    if cache is not None:
+        cache.save()
+        print(f"Evaluation cache: {cache.stats()}")
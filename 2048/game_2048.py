@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
+import argparse
 import pygame
 import sys
-import random
 import math
 from pygame.locals import *
 
+from adversary import Adversary
+from bitboard import DIRECTION_NAMES
+from core import CLASSIC, GameCore
+from expectimax import suggest_move
+from replay import MoveLog
+
 # Initialize pygame
 pygame.init()
 
 # Constants
 SCREEN_WIDTH = 500
 SCREEN_HEIGHT = 600
-GRID_SIZE = 4
+CONFIG = CLASSIC
+GRID_SIZE = CONFIG.size
 CELL_SIZE = 100
 GRID_PADDING = 10
 ANIMATION_SPEED = 10
@@ -149,149 +156,49 @@ class Tile:
             text_rect = text.get_rect(center=(self.x + CELL_SIZE // 2, self.y + CELL_SIZE // 2))
             surface.blit(text, text_rect)
 
-class Game2048:
-    def __init__(self):
-        self.reset()
+class Game2048(GameCore):
+    def __init__(self, seed=None, adversary=None):
+        super().__init__(CONFIG, seed, adversary)
     
-    def reset(self):
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.tiles = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.score = 0
-        self.best_score = 0
-        self.game_over = False
-        self.won = False
-        self.can_continue = False
+    def reset(self, seed=None):
         self.moving = False
+        self.hint = None
         
         # Initialize tiles
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                self.tiles[row][col] = Tile(0, row, col)
+        self.tiles = [[Tile(0, row, col) for col in range(GRID_SIZE)] for row in range(GRID_SIZE)]
         
-        # Add initial tiles
-        self.add_random_tile()
-        self.add_random_tile()
+        # New rules state and the two opening tiles
+        super().reset(seed)
     
-    def add_random_tile(self):
-        empty_cells = []
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if self.grid[row][col] == 0:
-                    empty_cells.append((row, col))
-        
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            value = 2 if random.random() < 0.9 else 4
-            self.grid[row][col] = value
-            self.tiles[row][col] = Tile(value, row, col)
+    def on_spawn(self, row, col, value):
+        self.tiles[row][col] = Tile(value, row, col)
+    
+    def on_slide(self, row, col, to_row, to_col):
+        # Move the tile object
+        self.tiles[row][col].move_to(to_row, to_col)
+        self.tiles[to_row][to_col] = self.tiles[row][col]
+        self.tiles[row][col] = Tile(0, row, col)
+    
+    def on_merge(self, row, col, to_row, to_col, value):
+        self.tiles[to_row][to_col] = Tile(value, to_row, to_col)
+        self.tiles[to_row][to_col].merging = True
+        self.tiles[row][col] = Tile(0, row, col)
     
     def move(self, direction):
         if self.game_over or self.moving:
             return False
         
         self.moving = True
-        moved = False
-        
-        # 0: up, 1: right, 2: down, 3: left
-        if direction == 0:  # Up
-            for col in range(GRID_SIZE):
-                for row in range(1, GRID_SIZE):
-                    if self.grid[row][col] != 0:
-                        moved |= self.move_tile(row, col, -1, 0)
-        
-        elif direction == 1:  # Right
-            for row in range(GRID_SIZE):
-                for col in range(GRID_SIZE - 2, -1, -1):
-                    if self.grid[row][col] != 0:
-                        moved |= self.move_tile(row, col, 0, 1)
-        
-        elif direction == 2:  # Down
-            for col in range(GRID_SIZE):
-                for row in range(GRID_SIZE - 2, -1, -1):
-                    if self.grid[row][col] != 0:
-                        moved |= self.move_tile(row, col, 1, 0)
-        
-        elif direction == 3:  # Left
-            for row in range(GRID_SIZE):
-                for col in range(1, GRID_SIZE):
-                    if self.grid[row][col] != 0:
-                        moved |= self.move_tile(row, col, 0, -1)
+        moved, _ = self.slide(direction)
         
         if moved:
+            self.hint = None
             self.add_random_tile()
             self.check_game_over()
         
         self.moving = False
         return moved
     
-    def move_tile(self, row, col, dr, dc):
-        moved = False
-        curr_row, curr_col = row, col
-        value = self.grid[row][col]
-        
-        # Find the farthest position
-        while True:
-            next_row, next_col = curr_row + dr, curr_col + dc
-            if not (0 <= next_row < GRID_SIZE and 0 <= next_col < GRID_SIZE):
-                break
-            
-            if self.grid[next_row][next_col] == 0:
-                curr_row, curr_col = next_row, next_col
-                moved = True
-            elif self.grid[next_row][next_col] == value:
-                curr_row, curr_col = next_row, next_col
-                moved = True
-                break
-            else:
-                break
-        
-        if moved:
-            # Move the tile
-            if self.grid[curr_row][curr_col] == value:  # Merge
-                self.grid[curr_row][curr_col] = value * 2
-                self.score += value * 2
-                self.best_score = max(self.best_score, self.score)
-                
-                # Check for win
-                if value * 2 == 2048 and not self.won:
-                    self.won = True
-                
-                # Update tile
-                self.tiles[curr_row][curr_col] = Tile(value * 2, curr_row, curr_col)
-                self.tiles[curr_row][curr_col].merging = True
-            else:  # Just move
-                self.grid[curr_row][curr_col] = value
-                # Move the tile object
-                self.tiles[row][col].move_to(curr_row, curr_col)
-                self.tiles[curr_row][curr_col] = self.tiles[row][col]
-            
-            self.grid[row][col] = 0
-            self.tiles[row][col] = Tile(0, row, col)
-        
-        return moved
-    
-    def check_game_over(self):
-        # Check if the grid is full
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if self.grid[row][col] == 0:
-                    return False
-        
-        # Check if any moves are possible
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                value = self.grid[row][col]
-                
-                # Check adjacent cells
-                for dr, dc in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                    next_row, next_col = row + dr, col + dc
-                    if 0 <= next_row < GRID_SIZE and 0 <= next_col < GRID_SIZE:
-                        if self.grid[next_row][next_col] == value:
-                            return False
-        
-        self.game_over = True
-        return True
-    
     def update(self):
         # Update all tiles
         for row in range(GRID_SIZE):
@@ -357,7 +264,7 @@ class Game2048:
             "HOW TO PLAY: Use arrow keys to move tiles",
             "When two tiles with the same number touch,",
             "they merge into one!",
-            "Press R to restart, ESC to quit"
+            "Press R to restart, H for a hint, ESC to quit"
         ]
         
         y_offset = 450
@@ -366,6 +273,11 @@ class Game2048:
             surface.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, y_offset))
             y_offset += 25
         
+        # Draw the last hint under the title
+        if self.hint is not None:
+            hint_text = instruction_font.render(f"Hint: {DIRECTION_NAMES[self.hint]}", True, GRAY)
+            surface.blit(hint_text, (20, 75))
+        
         # Draw game over or win message
         if self.game_over:
             # Semi-transparent overlay
@@ -393,30 +305,48 @@ class Game2048:
             surface.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2, SCREEN_HEIGHT // 2 + 10))
             surface.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 40))
 
-def main():
-    game = Game2048()
+def main(seed=None, replay=None, rate=4.0, save_replay=None, hard=False):
+    # Hard mode: every spawn is the one that hurts the player most
+    adversary = Adversary(CONFIG.engine(), spawn=CONFIG.spawn) if hard else None
+    game = Game2048(replay.seed if replay else seed, adversary)
+    
+    # Moves of a replay are played back at `rate` moves per second
+    replay_moves = iter(replay) if replay else None
+    replay_due = 0.0
+    
+    def quit_game():
+        if save_replay:
+            game.log.save(save_replay)
+        pygame.quit()
+        sys.exit()
     
     # Main game loop
     while True:
         # Handle events
         for event in pygame.event.get():
             if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game()
             
             if event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
+                    quit_game()
+                
+                # The keyboard only takes over once a replay has finished
+                if replay_moves is not None:
+                    continue
                 
                 if event.key == K_r:
+                    if save_replay:
+                        game.log.save(save_replay)
                     game.reset()
                 
                 if event.key == K_c and game.won and not game.can_continue:
                     game.can_continue = True
                 
                 if not game.game_over or (game.won and not game.can_continue):
-                    if event.key == K_UP:
+                    if event.key == K_h:
+                        game.hint = suggest_move(game.grid, spawn=CONFIG.spawn)
+                    elif event.key == K_UP:
                         game.move(0)
                     elif event.key == K_RIGHT:
                         game.move(1)
@@ -425,6 +355,17 @@ def main():
                     elif event.key == K_LEFT:
                         game.move(3)
         
+        # Feed the replay every move that has come due since the last frame
+        if replay_moves is not None:
+            replay_due += rate * clock.get_time() / 1000
+            while replay_due >= 1:
+                direction = next(replay_moves, None)
+                if direction is None:
+                    replay_moves = None
+                    break
+                game.move(direction)
+                replay_due -= 1
+        
         # Update game state
         game.update()
         
@@ -435,4 +376,16 @@ def main():
         clock.tick(60)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="2048")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the first game")
+    parser.add_argument("--replay", default=None, help="play back a recorded move log")
+    parser.add_argument("--rate", type=float, default=4.0, help="replay speed in moves per second")
+    parser.add_argument("--save-replay", default=None, help="write the game's move log here on restart and quit")
+    parser.add_argument("--hard", action="store_true", help="an adversary places every new tile")
+    args = parser.parse_args()
+    if args.hard and (args.replay or args.save_replay):
+        parser.error("hard-mode spawns are not random, so they cannot be replayed")
+    replay = MoveLog.load(args.replay) if args.replay else None
+    if replay and replay.size != GRID_SIZE:
+        parser.error(f"{args.replay} is a {replay.size}x{replay.size} game")
+    main(args.seed, replay, args.rate, args.save_replay, args.hard)
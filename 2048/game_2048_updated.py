@@ -1,21 +1,37 @@
 #!/usr/bin/env python3
+import argparse
 import pygame
 import sys
-import random
-import math
+import time
+from collections import deque
 from pygame.locals import *
 
-# Initialize pygame
-pygame.init()
-pygame.mixer.init()
+import rowpack
+from adversary import Adversary
+from ai_worker import HintWorker
+from bitboard import DIRECTION_NAMES
+from core import EDITION_8X8, GameCore
+from history import CountingRandom, History
+from huge_board import MAX_SIZE, SparseBoard
+from replay import MoveLog
+from rollout import RolloutWorker
+from telemetry import NO_INTERVAL, TelemetryRecorder
+from tween import EASE_OUT_CUBIC, EASE_OUT_QUAD, sample
+from viewport import ZOOM_STEP, BoardRenderer, Camera
 
 # Constants
 SCREEN_WIDTH = 1100  # Increased window width to accommodate side panel
 SCREEN_HEIGHT = 800
-GRID_SIZE = 8  # Updated to 8x8 grid
+CONFIG = EDITION_8X8
+GRID_SIZE = CONFIG.size  # Updated to 8x8 grid
 CELL_SIZE = 80  # Slightly smaller cells to fit the larger grid
 GRID_PADDING = 10
-ANIMATION_SPEED = 25  # Increased sliding speed
+# Animation lengths in seconds, the same at any frame rate
+SLIDE_DURATION = 0.12
+POP_DURATION = 0.15
+POP_START_SCALE = 0.1
+# Moves pressed during an animation wait here (extra presses are dropped)
+MOVE_QUEUE_LIMIT = 2
 
 # Colors
 BLACK = (0, 0, 0)
@@ -60,283 +76,301 @@ TEXT_COLORS = {
     8192: (249, 246, 242)
 }
 
-# Load sound effects
-try:
-    move_sound = pygame.mixer.Sound('move.wav')
-    merge_sound = pygame.mixer.Sound('merge.wav')
-    game_over_sound = pygame.mixer.Sound('game_over.wav')
-    win_sound = pygame.mixer.Sound('win.wav')
-except:
-    # Create silent sounds if files not found
-    move_sound = pygame.mixer.Sound(buffer=bytearray(44))
-    merge_sound = pygame.mixer.Sound(buffer=bytearray(44))
-    game_over_sound = pygame.mixer.Sound(buffer=bytearray(44))
-    win_sound = pygame.mixer.Sound(buffer=bytearray(44))
-    print("Sound files not found. Using silent sounds.")
+def init_pygame():
+    """Open the window and load sounds and fonts.
 
-# Set up the display
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption('2048 - 8x8 Edition')
-clock = pygame.time.Clock()
+    Kept out of module level: hint workers started with the spawn or
+    forkserver method re-import this module and must not open a window.
+    """
+    global move_sound, merge_sound, game_over_sound, win_sound
+    global screen, clock, title_font, score_font, instruction_font, game_over_font
+    pygame.init()
+    pygame.mixer.init()
 
-# Fonts
-title_font = pygame.font.SysFont('Arial', 50, bold=True)
-score_font = pygame.font.SysFont('Arial', 30, bold=True)
-instruction_font = pygame.font.SysFont('Arial', 18)
-game_over_font = pygame.font.SysFont('Arial', 60, bold=True)
+    # Load sound effects
+    try:
+        move_sound = pygame.mixer.Sound('move.wav')
+        merge_sound = pygame.mixer.Sound('merge.wav')
+        game_over_sound = pygame.mixer.Sound('game_over.wav')
+        win_sound = pygame.mixer.Sound('win.wav')
+    except:
+        # Create silent sounds if files not found
+        move_sound = pygame.mixer.Sound(buffer=bytearray(44))
+        merge_sound = pygame.mixer.Sound(buffer=bytearray(44))
+        game_over_sound = pygame.mixer.Sound(buffer=bytearray(44))
+        win_sound = pygame.mixer.Sound(buffer=bytearray(44))
+        print("Sound files not found. Using silent sounds.")
 
-# Create fonts for different tile values
-tile_fonts = {}
-for value in [2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192]:
-    # Adjust font size based on number of digits
+    # Set up the display
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption('2048 - 8x8 Edition')
+    clock = pygame.time.Clock()
+
+    # Fonts
+    title_font = pygame.font.SysFont('Arial', 50, bold=True)
+    score_font = pygame.font.SysFont('Arial', 30, bold=True)
+    instruction_font = pygame.font.SysFont('Arial', 18)
+    game_over_font = pygame.font.SysFont('Arial', 60, bold=True)
+
+def tile_font_size(value):
+    # Adjust font size based on number of digits (at zoom 1)
     if value < 10:
-        size = 45
+        return 45
     elif value < 100:
-        size = 40
+        return 40
     elif value < 1000:
-        size = 35
+        return 35
     else:
-        size = 25
-    tile_fonts[value] = pygame.font.SysFont('Arial', size, bold=True)
+        return 25
+
+# The board is drawn through a camera into the area right of the side panel
+BOARD_VIEW = pygame.Rect(280, 0, SCREEN_WIDTH - 280, SCREEN_HEIGHT)
+BOARD_ORIGIN = (300, 50)
+camera = Camera(BOARD_VIEW, CELL_SIZE, GRID_PADDING, GRID_SIZE)
+camera.home(BOARD_ORIGIN)
+renderer = BoardRenderer(camera, TILE_COLORS, TEXT_COLORS, tile_font_size, GRID_COLOR, CELL_EMPTY_COLOR)
+
+# Side panel layout
+SCORE_BOX = pygame.Rect(20, 100, 240, 60)
+BEST_BOX = pygame.Rect(20, 170, 240, 60)
+INSTRUCTIONS = [
+    "HOW TO PLAY:",
+    "Use arrow keys to move tiles",
+    "When two tiles with the same",
+    "number touch, they merge!",
+    f"Reach {CONFIG.win_tile} to win!",
+    "",
+    "CONTROLS:",
+    "Arrow Keys: Move tiles",
+    "R: Restart game",
+    "C: Continue after winning",
+    "H: Toggle AI hints",
+    "M: Search / rollout hints",
+    "U / Z: Undo, Y: Redo",
+    "Wheel / drag: Zoom and pan",
+    "0: Reset view",
+    "ESC: Quit game"
+]
+HINT_Y = 250 + 22 * len(INSTRUCTIONS) + 20
 
 class Tile:
-    def __init__(self, value=0, row=0, col=0):
+    __slots__ = ("value", "row", "col", "x", "y", "target_x", "target_y", "start_x", "start_y",
+                 "move_start", "pop_start", "moving", "merging", "new", "scale")
+    
+    def __init__(self, value=0, row=0, col=0, now=0.0):
+        self.reset(value, row, col, now)
+    
+    def reset(self, value, row, col, now=0.0):
         self.value = value
         self.row = row
         self.col = col
-        # Position tiles on the right side of the screen
-        self.x = col * (CELL_SIZE + GRID_PADDING) + GRID_PADDING + 300  # Offset for side panel
-        self.y = row * (CELL_SIZE + GRID_PADDING) + GRID_PADDING + 50   # Reduced top offset
+        # Position in board space; the camera places it on screen
+        self.x = col * (CELL_SIZE + GRID_PADDING) + GRID_PADDING
+        self.y = row * (CELL_SIZE + GRID_PADDING) + GRID_PADDING
         self.target_x = self.x
         self.target_y = self.y
+        self.start_x = self.x
+        self.start_y = self.y
+        self.move_start = now
+        self.pop_start = now
         self.moving = False
         self.merging = False
         self.new = value != 0
-        self.scale = 0.1 if self.new else 1.0
+        self.scale = POP_START_SCALE if self.new else 1.0
     
-    def update(self):
+    def update(self, now):
+        """Advance to time `now`; returns True while the tile is still animating"""
         # Handle movement animation
         if self.moving:
-            dx = self.target_x - self.x
-            dy = self.target_y - self.y
-            distance = math.sqrt(dx * dx + dy * dy)
-            
-            if distance < ANIMATION_SPEED:
+            progress = (now - self.move_start) / SLIDE_DURATION
+            if progress >= 1.0:
                 self.x = self.target_x
                 self.y = self.target_y
                 self.moving = False
             else:
-                self.x += dx * ANIMATION_SPEED / distance
-                self.y += dy * ANIMATION_SPEED / distance
+                eased = sample(EASE_OUT_CUBIC, progress)
+                self.x = self.start_x + (self.target_x - self.start_x) * eased
+                self.y = self.start_y + (self.target_y - self.start_y) * eased
         
         # Handle new tile animation
-        if self.new and self.scale < 1.0:
-            self.scale += 0.1
-            if self.scale >= 1.0:
+        if self.new:
+            progress = (now - self.pop_start) / POP_DURATION
+            if progress >= 1.0:
                 self.scale = 1.0
                 self.new = False
+            else:
+                self.scale = POP_START_SCALE + (1.0 - POP_START_SCALE) * sample(EASE_OUT_QUAD, progress)
+        
+        return self.moving or self.new
     
-    def move_to(self, row, col):
+    def move_to(self, row, col, now):
         self.row = row
         self.col = col
-        self.target_x = col * (CELL_SIZE + GRID_PADDING) + GRID_PADDING + 300  # Offset for side panel
-        self.target_y = row * (CELL_SIZE + GRID_PADDING) + GRID_PADDING + 50   # Reduced top offset
+        self.start_x = self.x
+        self.start_y = self.y
+        self.move_start = now
+        self.target_x = col * (CELL_SIZE + GRID_PADDING) + GRID_PADDING
+        self.target_y = row * (CELL_SIZE + GRID_PADDING) + GRID_PADDING
         self.moving = True
-    
-    def draw(self, surface):
-        if self.value == 0:
-            return
-        
-        # Calculate position and size with animation
-        size = int(CELL_SIZE * self.scale)
-        pos_x = self.x + (CELL_SIZE - size) // 2
-        pos_y = self.y + (CELL_SIZE - size) // 2
-        
-        # Draw tile background
-        pygame.draw.rect(surface, TILE_COLORS.get(self.value, (60, 58, 50)), 
-                       (pos_x, pos_y, size, size), 0, 5)
-        
-        # Draw tile value
-        if self.value > 0:
-            font = tile_fonts.get(self.value, tile_fonts[8192])
-            text_color = TEXT_COLORS.get(self.value, WHITE)
-            text = font.render(str(self.value), True, text_color)
-            text_rect = text.get_rect(center=(self.x + CELL_SIZE // 2, self.y + CELL_SIZE // 2))
-            surface.blit(text, text_rect)
 
-class Game2048:
+class TilePool:
+    """Recycles Tile objects so moves and merges allocate nothing"""
+    
     def __init__(self):
-        self.reset()
+        self.free = []
     
-    def reset(self):
-        self.grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
+    def acquire(self, value, row, col, now):
+        if self.free:
+            tile = self.free.pop()
+            tile.reset(value, row, col, now)
+            return tile
+        return Tile(value, row, col, now)
+    
+    def release(self, tile):
+        self.free.append(tile)
+
+class Game2048(GameCore):
+    # Undo snapshots store a draw count instead of the whole generator state
+    rng_class = CountingRandom
+
+    def __init__(self, seed=None, telemetry=None, adversary=None):
+        # Static layer and rendered labels, kept across restarts
+        self.background = None
+        self.background_key = None
+        self.text_cache = {}
+        self.tile_pool = TilePool()
+        self.tiles = None
+        # Snapshots for undo/redo, preallocated once for every game
+        self.history = History(rowpack)
+        # Animations are timed on a monotonic clock, never by frame count
+        self.clock = time.monotonic
+        # Optional TelemetryRecorder that gets one record per committed turn
+        self.telemetry = telemetry
+        self.last_press = None
+        super().__init__(CONFIG, seed, adversary)
+    
+    def reset(self, seed=None):
+        # Hand the previous game's tiles back to the pool
+        if self.tiles:
+            for tile_row in self.tiles:
+                for tile in tile_row:
+                    if tile:
+                        self.tile_pool.release(tile)
+        # Empty cells hold None; only tiles in `animating` are updated per frame
         self.tiles = [[None for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        self.score = 0
-        self.best_score = 0
-        self.game_over = False
-        self.won = False
-        self.can_continue = False
+        self.animating = set()
         self.moving = False
         self.need_new_tile = False
-        
-        # Initialize tiles
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                self.tiles[row][col] = Tile(0, row, col)
-        
-        # Add initial tiles
-        self.add_random_tile()
-        self.add_random_tile()
+        self.pending_moves = deque()
+        self.hint = None
+        self.hint_depth = 0
+        # Counts committed turns so the AI worker knows when the board settled
+        self.turn = 0
+        self.last_direction = None
+        # (merges, points, key interval, stall) of the move being animated
+        self.move_stats = None
+        if self.telemetry:
+            self.telemetry.new_game()
+        
+        # New rules state and the two opening tiles
+        super().reset(seed)
+        self.history.clear()
+        self.save_snapshot()
     
-    def add_random_tile(self):
-        empty_cells = []
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if self.grid[row][col] == 0:
-                    empty_cells.append((row, col))
-        
-        if empty_cells:
-            row, col = random.choice(empty_cells)
-            value = 2 if random.random() < 0.9 else 4
-            self.grid[row][col] = value
-            self.tiles[row][col] = Tile(value, row, col)
+    def place_tile(self, row, col, value):
+        # A new or merged tile pops in, so it starts out animating
+        tile = self.tile_pool.acquire(value, row, col, self.clock())
+        self.tiles[row][col] = tile
+        self.animating.add(tile)
+        return tile
+    
+    def remove_tile(self, row, col):
+        tile = self.tiles[row][col]
+        self.tiles[row][col] = None
+        self.animating.discard(tile)
+        self.tile_pool.release(tile)
+    
+    def on_spawn(self, row, col, value):
+        self.place_tile(row, col, value)
+    
+    def on_slide(self, row, col, to_row, to_col):
+        # Move the tile object
+        tile = self.tiles[row][col]
+        tile.move_to(to_row, to_col, self.clock())
+        self.tiles[to_row][to_col] = tile
+        self.tiles[row][col] = None
+        self.animating.add(tile)
+    
+    def on_merge(self, row, col, to_row, to_col, value):
+        # Both merged tiles go back to the pool for the new one
+        self.remove_tile(to_row, to_col)
+        self.remove_tile(row, col)
+        self.place_tile(to_row, to_col, value).merging = True
+    
+    def on_win(self):
+        win_sound.play()
     
-    def move(self, direction):
+    def on_game_over(self):
+        game_over_sound.play()
+    
+    def move(self, direction, key_interval=NO_INTERVAL, stall=0.0):
         if self.game_over or self.moving:
             return False
         
         self.moving = True
-        moved = False
-        merged = False
-        
-        # 0: up, 1: right, 2: down, 3: left
-        if direction == 0:  # Up
-            for col in range(GRID_SIZE):
-                for row in range(1, GRID_SIZE):
-                    if self.grid[row][col] != 0:
-                        result = self.move_tile(row, col, -1, 0)
-                        moved |= result[0]
-                        merged |= result[1]
-        
-        elif direction == 1:  # Right
-            for row in range(GRID_SIZE):
-                for col in range(GRID_SIZE - 2, -1, -1):
-                    if self.grid[row][col] != 0:
-                        result = self.move_tile(row, col, 0, 1)
-                        moved |= result[0]
-                        merged |= result[1]
-        
-        elif direction == 2:  # Down
-            for col in range(GRID_SIZE):
-                for row in range(GRID_SIZE - 2, -1, -1):
-                    if self.grid[row][col] != 0:
-                        result = self.move_tile(row, col, 1, 0)
-                        moved |= result[0]
-                        merged |= result[1]
-        
-        elif direction == 3:  # Left
-            for row in range(GRID_SIZE):
-                for col in range(1, GRID_SIZE):
-                    if self.grid[row][col] != 0:
-                        result = self.move_tile(row, col, 0, -1)
-                        moved |= result[0]
-                        merged |= result[1]
+        score = self.score
+        moved, merges = self.slide(direction)
         
         if moved:
+            self.hint = None
+            self.last_direction = direction
+            self.move_stats = (merges, self.score - score, key_interval, stall)
+            
             # Play move sound
             move_sound.play()
-            if merged:
+            if merges:
                 merge_sound.play()
             
-            # Set flag to add a new tile after animations complete
+            # Set flag to add a new tile after animations complete; in hard
+            # mode the adversary searches for it while the tiles slide
             self.need_new_tile = True
+            if self.adversary is not None:
+                self.prefetch_spawn()
         else:
             # No movement occurred, so we're not moving anymore
             self.moving = False
         
         return moved
     
-    def move_tile(self, row, col, dr, dc):
-        moved = False
-        merged = False
-        curr_row, curr_col = row, col
-        value = self.grid[row][col]
-        
-        # Find the farthest position
-        while True:
-            next_row, next_col = curr_row + dr, curr_col + dc
-            if not (0 <= next_row < GRID_SIZE and 0 <= next_col < GRID_SIZE):
-                break
-            
-            if self.grid[next_row][next_col] == 0:
-                curr_row, curr_col = next_row, next_col
-                moved = True
-            elif self.grid[next_row][next_col] == value:
-                curr_row, curr_col = next_row, next_col
-                moved = True
-                merged = True
-                break
-            else:
-                break
-        
-        if moved:
-            # Move the tile
-            if self.grid[curr_row][curr_col] == value:  # Merge
-                self.grid[curr_row][curr_col] = value * 2
-                self.score += value * 2
-                self.best_score = max(self.best_score, self.score)
-                
-                # Check for win - updated to 8192
-                if value * 2 == 8192 and not self.won:
-                    self.won = True
-                    win_sound.play()
-                
-                # Update tile
-                self.tiles[curr_row][curr_col] = Tile(value * 2, curr_row, curr_col)
-                self.tiles[curr_row][curr_col].merging = True
-            else:  # Just move
-                self.grid[curr_row][curr_col] = value
-                # Move the tile object
-                self.tiles[row][col].move_to(curr_row, curr_col)
-                self.tiles[curr_row][curr_col] = self.tiles[row][col]
-            
-            self.grid[row][col] = 0
-            self.tiles[row][col] = Tile(0, row, col)
-        
-        return moved, merged
+    def queue_move(self, direction, pressed=None):
+        """Move now, or once the running animation ends; True if moved now
+        
+        pressed is the time of the keypress on self.clock, for telemetry.
+        """
+        key_interval = NO_INTERVAL
+        if pressed is not None:
+            if self.last_press is not None:
+                key_interval = pressed - self.last_press
+            self.last_press = pressed
+        if not self.moving:
+            return self.move(direction, key_interval)
+        if len(self.pending_moves) < MOVE_QUEUE_LIMIT:
+            self.pending_moves.append((direction, pressed, key_interval))
+        return False
     
-    def check_game_over(self):
-        # Check if the grid is full
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if self.grid[row][col] == 0:
-                    return False
-        
-        # Check if any moves are possible
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                value = self.grid[row][col]
-                
-                # Check adjacent cells
-                for dr, dc in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                    next_row, next_col = row + dr, col + dc
-                    if 0 <= next_row < GRID_SIZE and 0 <= next_col < GRID_SIZE:
-                        if self.grid[next_row][next_col] == value:
-                            return False
+    def update(self, now=None):
+        if now is None:
+            now = self.clock()
         
-        self.game_over = True
-        game_over_sound.play()
-        return True
-    
-    def update(self):
-        # Update all tiles
+        # Update only the tiles that are animating
         any_moving = False
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if self.tiles[row][col]:
-                    self.tiles[row][col].update()
-                    if self.tiles[row][col].moving:
-                        any_moving = True
+        finished = []
+        for tile in self.animating:
+            if not tile.update(now):
+                finished.append(tile)
+            elif tile.moving:
+                any_moving = True
+        self.animating.difference_update(finished)
         
         # If no tiles are moving and we need to add a new tile
         if not any_moving and self.need_new_tile:
@@ -344,9 +378,92 @@ class Game2048:
             self.check_game_over()
             self.need_new_tile = False
             self.moving = False
+            self.turn += 1
+            self.save_snapshot()
+            if self.telemetry and self.move_stats:
+                merges, gained, key_interval, stall = self.move_stats
+                self.telemetry.record(self.turn, self.last_direction, merges, len(self.cell_index),
+                                      gained, self.max_tile, key_interval, stall)
+            
+            # Start the next queued move straight away, unless the game
+            # stopped for a win or a loss
+            if self.won and not self.can_continue:
+                self.pending_moves.clear()
+            while self.pending_moves and not self.game_over:
+                direction, pressed, key_interval = self.pending_moves.popleft()
+                stall = now - pressed if pressed is not None else 0.0
+                if self.move(direction, key_interval, stall):
+                    break
     
-    def draw(self, surface):
-        # Draw background
+    def save_snapshot(self):
+        try:
+            board = rowpack.from_grid(self.grid)
+        except ValueError:
+            # Past 32768 the board no longer packs, so there is nothing to undo to
+            self.history.clear()
+            return
+        self.history.push(board, self.score, len(self.log), self.turn, self.last_direction, self.rng.words)
+    
+    def restore_snapshot(self, snapshot):
+        board, score, moves, turn, direction, rng_words = snapshot
+        # Drop queued moves and animations, then rebuild the tiles in place
+        self.pending_moves.clear()
+        self.animating.clear()
+        self.need_new_tile = False
+        self.moving = False
+        grid = rowpack.to_grid(board)
+        for row in range(GRID_SIZE):
+            for col in range(GRID_SIZE):
+                if self.tiles[row][col]:
+                    self.remove_tile(row, col)
+                value = grid[row][col]
+                self.set_cell(row, col, value)
+                if value:
+                    # Restored tiles appear at rest, without the pop-in
+                    tile = self.tiles[row][col] = self.tile_pool.acquire(value, row, col, 0.0)
+                    tile.new = False
+                    tile.scale = 1.0
+        self.score = score
+        self.max_tile = max(max(grid_row) for grid_row in grid)
+        self.move_stats = None
+        self.rng.rewind(rng_words)
+        self.log.truncate(moves)
+        self.last_direction = direction
+        self.game_over = not self.cell_index.can_move()
+        self.won = any(value >= CONFIG.win_tile for grid_row in grid for value in grid_row)
+        self.hint = None
+        self.turn = turn
+    
+    def undo(self):
+        """Step back one move; True if there was one to undo"""
+        if self.moving:
+            self.settle()
+        snapshot = self.history.undo()
+        if snapshot is None:
+            return False
+        self.restore_snapshot(snapshot)
+        return True
+    
+    def redo(self):
+        """Play an undone move again, with the same spawn as before"""
+        if self.moving:
+            self.settle()
+        snapshot = self.history.redo()
+        if snapshot is None:
+            return False
+        self.log.append(snapshot[4])
+        self.restore_snapshot(snapshot)
+        return True
+    
+    def settle(self):
+        # Finish the slide at once, so fast replays need not wait for it
+        for tile in self.animating:
+            tile.x, tile.y = tile.target_x, tile.target_y
+            tile.moving = False
+        self.update()
+    
+    def draw_background(self, surface):
+        # Everything here only changes with the window size, theme or camera
         surface.fill(LIGHT_GRAY)
         
         # Draw side panel background
@@ -361,70 +478,66 @@ class Game2048:
         surface.blit(subtitle_text, (20, 70))
         
         # Draw score boxes
-        score_box = pygame.Rect(20, 100, 240, 60)
-        best_box = pygame.Rect(20, 170, 240, 60)
-        
-        pygame.draw.rect(surface, (187, 173, 160, 100), score_box, 0, 5)
-        pygame.draw.rect(surface, (187, 173, 160, 100), best_box, 0, 5)
+        pygame.draw.rect(surface, (187, 173, 160, 100), SCORE_BOX, 0, 5)
+        pygame.draw.rect(surface, (187, 173, 160, 100), BEST_BOX, 0, 5)
         
         score_label = score_font.render("SCORE", True, WHITE)
         best_label = score_font.render("BEST", True, WHITE)
         
-        surface.blit(score_label, (score_box.centerx - score_label.get_width() // 2, score_box.y + 5))
-        surface.blit(best_label, (best_box.centerx - best_label.get_width() // 2, best_box.y + 5))
-        
-        score_value = score_font.render(str(self.score), True, WHITE)
-        best_value = score_font.render(str(self.best_score), True, WHITE)
-        
-        surface.blit(score_value, (score_box.centerx - score_value.get_width() // 2, score_box.y + 30))
-        surface.blit(best_value, (best_box.centerx - best_value.get_width() // 2, best_box.y + 30))
+        surface.blit(score_label, (SCORE_BOX.centerx - score_label.get_width() // 2, SCORE_BOX.y + 5))
+        surface.blit(best_label, (BEST_BOX.centerx - best_label.get_width() // 2, BEST_BOX.y + 5))
         
         # Draw instructions
-        instructions = [
-            "HOW TO PLAY:",
-            "Use arrow keys to move tiles",
-            "When two tiles with the same",
-            "number touch, they merge!",
-            "Reach 8192 to win!",
-            "",
-            "CONTROLS:",
-            "Arrow Keys: Move tiles",
-            "R: Restart game",
-            "C: Continue after winning",
-            "ESC: Quit game"
-        ]
-        
         y_offset = 250
-        for instruction in instructions:
+        for instruction in INSTRUCTIONS:
             text = instruction_font.render(instruction, True, WHITE)
             surface.blit(text, (20, y_offset))
             y_offset += 22
         
-        # Draw grid background
-        grid_rect = pygame.Rect(
-            300,  # Left side panel width
-            50,   # Top margin
-            (CELL_SIZE + GRID_PADDING) * GRID_SIZE + GRID_PADDING,
-            (CELL_SIZE + GRID_PADDING) * GRID_SIZE + GRID_PADDING
-        )
-        pygame.draw.rect(surface, GRID_COLOR, grid_rect, 0, 5)
-        
-        # Draw empty cells
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                cell_rect = pygame.Rect(
-                    col * (CELL_SIZE + GRID_PADDING) + GRID_PADDING + 300,  # Offset for side panel
-                    row * (CELL_SIZE + GRID_PADDING) + GRID_PADDING + 50,   # Reduced top offset
-                    CELL_SIZE,
-                    CELL_SIZE
-                )
-                pygame.draw.rect(surface, CELL_EMPTY_COLOR, cell_rect, 0, 5)
-        
-        # Draw tiles
-        for row in range(GRID_SIZE):
-            for col in range(GRID_SIZE):
-                if self.tiles[row][col]:
-                    self.tiles[row][col].draw(surface)
+        # Draw the grid and empty cells through the camera, clipped to its view
+        surface.set_clip(camera.view)
+        renderer.draw_grid(surface)
+        surface.set_clip(None)
+    
+    def invalidate_background(self):
+        """Force the static layer to be redrawn, e.g. after a theme change"""
+        self.background_key = None
+    
+    def cached_text(self, name, text, font):
+        # Re-render a changing label only when its text actually changes
+        entry = self.text_cache.get(name)
+        if entry is None or entry[0] != text:
+            entry = self.text_cache[name] = (text, font.render(text, True, WHITE))
+        return entry[1]
+    
+    def draw(self, surface):
+        # Blit the cached static layer, rebuilding it if the layout changed
+        key = (surface.get_size(), camera.zoom, camera.x, camera.y)
+        if key != self.background_key:
+            self.background = pygame.Surface(surface.get_size()).convert()
+            self.draw_background(self.background)
+            self.background_key = key
+        surface.blit(self.background, (0, 0))
+        
+        score_value = self.cached_text("score", str(self.score), score_font)
+        best_value = self.cached_text("best", str(self.best_score), score_font)
+        
+        surface.blit(score_value, (SCORE_BOX.centerx - score_value.get_width() // 2, SCORE_BOX.y + 30))
+        surface.blit(best_value, (BEST_BOX.centerx - best_value.get_width() // 2, BEST_BOX.y + 30))
+        
+        # Draw the last hint below the instructions
+        if self.hint is not None:
+            hint_text = self.cached_text("hint", f"Hint: {DIRECTION_NAMES[self.hint]} ({self.hint_depth})", score_font)
+            surface.blit(hint_text, (20, HINT_Y))
+        
+        # Draw tiles through the camera, clipped to its view; the renderer
+        # skips tiles outside it and blits cached sprites in one batch
+        surface.set_clip(camera.view)
+        renderer.draw_tiles(surface, (
+            (tile.value, tile.x, tile.y, tile.scale)
+            for tile_row in self.tiles for tile in tile_row if tile
+        ))
+        surface.set_clip(None)
         
         # Draw game over or win message
         if self.game_over:
@@ -453,46 +566,262 @@ class Game2048:
             surface.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2, SCREEN_HEIGHT // 2 + 10))
             surface.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 40))
 
-def main():
-    game = Game2048()
+def handle_camera_event(event, view_camera):
+    """Zoom with the wheel or +/-, pan by dragging; returns True if used"""
+    if event.type == MOUSEWHEEL:
+        view_camera.zoom_at(ZOOM_STEP ** event.y, pygame.mouse.get_pos())
+    elif event.type == MOUSEMOTION and event.buttons[0] and view_camera.view.collidepoint(event.pos):
+        view_camera.pan(*event.rel)
+    elif event.type == KEYDOWN and event.key in (K_EQUALS, K_PLUS, K_KP_PLUS):
+        view_camera.zoom_at(ZOOM_STEP, view_camera.view.center)
+    elif event.type == KEYDOWN and event.key in (K_MINUS, K_KP_MINUS):
+        view_camera.zoom_at(1 / ZOOM_STEP, view_camera.view.center)
+    else:
+        return False
+    return True
+
+def make_advisor(mode):
+    # Rollouts stay cheap on 8x8, where a deep expectimax is too slow
+    if mode == "rollout":
+        return RolloutWorker(GRID_SIZE, spawn=CONFIG.spawn)
+    return HintWorker(GRID_SIZE, spawn=CONFIG.spawn)
+
+def main(seed=None, replay=None, rate=4.0, save_replay=None, hint_mode="expectimax", telemetry_dir=None, hard=False):
+    telemetry = TelemetryRecorder(telemetry_dir, GRID_SIZE) if telemetry_dir else None
+    # Hard mode: every spawn is the one that hurts the player most
+    adversary = Adversary(CONFIG.engine(), spawn=CONFIG.spawn) if hard else None
+    game = Game2048(replay.seed if replay else seed, telemetry, adversary)
+    
+    # Moves of a replay are played back at `rate` moves per second
+    replay_moves = iter(replay) if replay else None
+    replay_due = 0.0
+    
+    # AI hints run in separate processes; the loop below only polls them
+    worker = make_advisor(hint_mode)
+    advisor_on = False
+    advisor_turn = None
+    moves_seen = len(game.log)
+    
+    def quit_game():
+        worker.stop()
+        if adversary:
+            adversary.stop()
+        if telemetry:
+            telemetry.close()
+        if save_replay:
+            game.log.save(save_replay)
+        pygame.quit()
+        sys.exit()
     
     # Main game loop
     while True:
         # Handle events
         for event in pygame.event.get():
             if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
+                quit_game()
+            
+            if handle_camera_event(event, camera):
+                continue
             
             if event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
+                    quit_game()
+                
+                if event.key == K_0:
+                    camera.home(BOARD_ORIGIN)
+                
+                # The keyboard only takes over once a replay has finished
+                if replay_moves is not None:
+                    continue
                 
                 if event.key == K_r:
+                    if save_replay:
+                        game.log.save(save_replay)
                     game.reset()
+                    worker.cancel()
+                    advisor_turn = None
+                
+                if event.key in (K_u, K_z):
+                    if game.undo():
+                        advisor_turn = None
+                elif event.key == K_y:
+                    if game.redo():
+                        advisor_turn = None
                 
                 if event.key == K_c and game.won and not game.can_continue:
                     game.can_continue = True
                 
-                if not game.moving and (not game.game_over) and (not game.won or game.can_continue):
+                if event.key == K_h:
+                    advisor_on = not advisor_on
+                    if not advisor_on:
+                        worker.cancel()
+                        game.hint = None
+                    advisor_turn = None
+                
+                if event.key == K_m:
+                    worker.stop()
+                    hint_mode = "rollout" if hint_mode == "expectimax" else "expectimax"
+                    worker = make_advisor(hint_mode)
+                    game.hint = None
+                    advisor_turn = None
+                
+                if (not game.game_over) and (not game.won or game.can_continue):
+                    direction = None
                     if event.key == K_UP:
-                        game.move(0)
+                        direction = 0
                     elif event.key == K_RIGHT:
-                        game.move(1)
+                        direction = 1
                     elif event.key == K_DOWN:
-                        game.move(2)
+                        direction = 2
                     elif event.key == K_LEFT:
-                        game.move(3)
+                        direction = 3
+                    
+                    # Presses during an animation are queued, not lost
+                    if direction is not None:
+                        game.queue_move(direction, game.clock())
+        
+        # Feed the replay every move that has come due since the last frame;
+        # when more than one is due the slide animations are skipped
+        if replay_moves is not None:
+            replay_due += rate * clock.get_time() / 1000
+            while replay_due >= 1:
+                if game.moving:
+                    game.settle()
+                direction = next(replay_moves, None)
+                if direction is None:
+                    replay_moves = None
+                    break
+                game.move(direction)
+                replay_due -= 1
         
         # Update game state
         game.update()
         
+        # The old analysis is stale the moment a move starts
+        if len(game.log) != moves_seen:
+            moves_seen = len(game.log)
+            worker.cancel()
+        
+        # Hand the settled board to the AI worker once per turn and pick up
+        # whatever depth it has reached so far
+        if advisor_on and not game.game_over:
+            if not game.moving and advisor_turn != game.turn:
+                advisor_turn = game.turn
+                try:
+                    worker.submit(rowpack.from_grid(game.grid))
+                except ValueError:
+                    # Past 32768 the board no longer packs, so the advisors
+                    # cannot search it
+                    advisor_on = False
+                    worker.cancel()
+                    game.hint = None
+            answer = worker.poll() if advisor_on else None
+            if answer is not None:
+                game.hint_depth, game.hint = answer
+        
         # Draw everything
         game.draw(screen)
         
         pygame.display.update()
         clock.tick(60)
 
+def draw_huge(surface, board, huge_renderer, best_score):
+    surface.fill(LIGHT_GRAY)
+    
+    # Draw the board first so the side panel covers anything left of the view
+    surface.set_clip(huge_renderer.camera.view)
+    huge_renderer.draw_sparse(surface, *board.tiles())
+    surface.set_clip(None)
+    
+    side_panel = pygame.Rect(0, 0, 280, SCREEN_HEIGHT)
+    pygame.draw.rect(surface, GRID_COLOR, side_panel)
+    
+    title_text = title_font.render("2048", True, WHITE)
+    surface.blit(title_text, (20, 20))
+    subtitle_text = instruction_font.render(f"{board.size}x{board.size} Huge Board", True, WHITE)
+    surface.blit(subtitle_text, (20, 70))
+    
+    lines = [
+        f"Score: {board.score}",
+        f"Best: {best_score}",
+        f"Tiles: {len(board)}",
+        f"Max tile: {board.max_tile()}",
+        "",
+        "CONTROLS:",
+        "Arrow Keys: Move tiles",
+        "Wheel / drag: Zoom and pan",
+        "0: Show whole board",
+        "R: Restart game",
+        "ESC: Quit game"
+    ]
+    y_offset = 110
+    for line in lines:
+        text = instruction_font.render(line, True, WHITE)
+        surface.blit(text, (20, y_offset))
+        y_offset += 22
+    
+    if board.game_over:
+        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((255, 255, 255, 200))
+        surface.blit(overlay, (0, 0))
+        game_over_text = game_over_font.render("Game Over!", True, (119, 110, 101))
+        surface.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, SCREEN_HEIGHT // 2 - 50))
+
+def huge_main(size, seed=None, save_replay=None):
+    # Sparse board without tile animation, viewed through its own camera
+    board = SparseBoard(size, seed)
+    best_score = 0
+    huge_camera = Camera(BOARD_VIEW, CELL_SIZE, GRID_PADDING, size)
+    huge_camera.fit()
+    huge_renderer = BoardRenderer(huge_camera, TILE_COLORS, TEXT_COLORS, tile_font_size, GRID_COLOR, CELL_EMPTY_COLOR)
+    pygame.display.set_caption(f'2048 - {size}x{size} Huge Board')
+    
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE):
+                if save_replay:
+                    board.log.save(save_replay)
+                pygame.quit()
+                sys.exit()
+            
+            if handle_camera_event(event, huge_camera):
+                continue
+            
+            if event.type == KEYDOWN:
+                if event.key == K_0:
+                    huge_camera.fit()
+                elif event.key == K_r:
+                    if save_replay:
+                        board.log.save(save_replay)
+                    board = SparseBoard(size)
+                elif event.key in (K_UP, K_RIGHT, K_DOWN, K_LEFT):
+                    board.move((K_UP, K_RIGHT, K_DOWN, K_LEFT).index(event.key))
+                    best_score = max(best_score, board.score)
+        
+        draw_huge(screen, board, huge_renderer, best_score)
+        pygame.display.update()
+        clock.tick(60)
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="2048 - 8x8 Edition")
+    parser.add_argument("--size", type=int, default=GRID_SIZE, help="other sizes (up to 256) play a sparse huge board")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the first game")
+    parser.add_argument("--replay", default=None, help="play back a recorded move log")
+    parser.add_argument("--rate", type=float, default=4.0, help="replay speed in moves per second")
+    parser.add_argument("--save-replay", default=None, help="write the game's move log here on restart and quit")
+    parser.add_argument("--hint", default="expectimax", choices=("expectimax", "rollout"), help="AI hint mode")
+    parser.add_argument("--telemetry", default=None, help="directory to write a per-move telemetry log to")
+    parser.add_argument("--hard", action="store_true", help="an adversary places every new tile")
+    args = parser.parse_args()
+    if not 2 <= args.size <= MAX_SIZE:
+        parser.error(f"--size must be between 2 and {MAX_SIZE}")
+    if args.hard and (args.size != GRID_SIZE or args.replay or args.save_replay):
+        parser.error("hard mode needs the 8x8 board and cannot be replayed")
+    if args.size != GRID_SIZE:
+        init_pygame()
+        huge_main(args.size, args.seed, args.save_replay)
+    replay = MoveLog.load(args.replay) if args.replay else None
+    if replay and replay.size != GRID_SIZE:
+        parser.error(f"{args.replay} is a {replay.size}x{replay.size} game")
+    init_pygame()
+    main(args.seed, replay, args.rate, args.save_replay, args.hint, args.telemetry, args.hard)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Undo/redo history for 2048 as a ring buffer of packed snapshots.
+
+A snapshot is one fixed-size record: the packed board, the score, the length
+of the move log, the turn counter, the move that led to it and how many words
+the game's RNG had drawn since it was seeded, so an undone move respawns the
+same tile when it is played again without a 625-word Mersenne Twister state in
+every record. All records live in one preallocated bytearray, so push, undo and
+redo copy one record; once the buffer is full the oldest snapshots are
+overwritten.
+
+A CountingRandom rewinds to a draw count from the nearest generator state it
+saved on the way (one every CHECKPOINT_WORDS words, at most MAX_CHECKPOINTS of
+them), so a rewind skips ahead at most CHECKPOINT_WORDS words however long the
+game is. Only a rewind further back than the oldest saved state replays the
+stream from the seed.
+"""
+import array
+import random
+import struct
+
+DEFAULT_CAPACITY = 4096
+NO_DIRECTION = 255
+# A spawn draws three or four words, so this is a state every ~70 moves and
+# the checkpoints (2.5 KB each) cover a full history of DEFAULT_CAPACITY moves
+CHECKPOINT_WORDS = 256
+MAX_CHECKPOINTS = 64
+
+
+class CountingRandom(random.Random):
+    """random.Random that counts the 32-bit words it draws
+
+    Overriding both random() and getrandbits() keeps choice() and randrange()
+    on the getrandbits path, so the stream matches a plain random.Random with
+    the same seed.
+    """
+
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self.seed_value = a
+        self.words = 0
+        # words // CHECKPOINT_WORDS -> (words, state) of the first draw past it
+        self.checkpoints = {}
+        self.next_checkpoint = CHECKPOINT_WORDS
+
+    def random(self):
+        self.words += 2
+        value = super().random()
+        if self.words >= self.next_checkpoint:
+            self._checkpoint()
+        return value
+
+    def getrandbits(self, k):
+        self.words += (k + 31) // 32
+        value = super().getrandbits(k)
+        if self.words >= self.next_checkpoint:
+            self._checkpoint()
+        return value
+
+    def _checkpoint(self):
+        slot = self.words // CHECKPOINT_WORDS
+        self.next_checkpoint = (slot + 1) * CHECKPOINT_WORDS
+        if slot in self.checkpoints:
+            return
+        version, internal, gauss_next = self.getstate()
+        self.checkpoints[slot] = (self.words, array.array("I", internal), version, gauss_next)
+        if len(self.checkpoints) > MAX_CHECKPOINTS:
+            # Undo walks backwards from the latest states, so drop the earliest
+            del self.checkpoints[min(self.checkpoints)]
+
+    def rewind(self, words):
+        """Return to the state after `words` draws since the seed"""
+        start = 0
+        for slot in range(words // CHECKPOINT_WORDS, min(self.checkpoints, default=0) - 1, -1):
+            checkpoint = self.checkpoints.get(slot)
+            if checkpoint is not None and checkpoint[0] <= words:
+                start, internal, version, gauss_next = checkpoint
+                random.Random.setstate(self, (version, tuple(internal), gauss_next))
+                break
+        if not start:
+            random.Random.seed(self, self.seed_value)
+        if words > start:
+            random.Random.getrandbits(self, 32 * (words - start))
+        self.words = words
+        self.next_checkpoint = (words // CHECKPOINT_WORDS + 1) * CHECKPOINT_WORDS
+
+
+class History:
+    def __init__(self, engine, capacity=DEFAULT_CAPACITY):
+        self.engine = engine
+        self.board_bytes = engine.CELLS // 2
+        self.record = struct.Struct(f"<{self.board_bytes}sQIIBQ")
+        self.capacity = capacity
+        self.buffer = bytearray(self.record.size * capacity)
+        self.clear()
+
+    def __len__(self):
+        return self.length
+
+    def clear(self):
+        self.start = 0
+        self.length = 0
+        # Position of the current state, counted from the oldest snapshot
+        self.current = -1
+
+    def nbytes(self):
+        return len(self.buffer)
+
+    def _offset(self, position):
+        return ((self.start + position) % self.capacity) * self.record.size
+
+    def push(self, board, score, moves, turn, direction, rng_words):
+        """Record the state after a move, dropping any redo states"""
+        self.length = self.current + 1
+        if self.length == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+            self.length -= 1
+        self.record.pack_into(
+            self.buffer, self._offset(self.length),
+            board.to_bytes(self.board_bytes, "little"), score, moves, turn,
+            NO_DIRECTION if direction is None else direction, rng_words,
+        )
+        self.length += 1
+        self.current = self.length - 1
+
+    def _read(self, position):
+        packed, score, moves, turn, direction, rng_words = self.record.unpack_from(
+            self.buffer, self._offset(position)
+        )
+        board = int.from_bytes(packed, "little")
+        return board, score, moves, turn, None if direction == NO_DIRECTION else direction, rng_words
+
+    def can_undo(self):
+        return self.current > 0
+
+    def can_redo(self):
+        return self.current < self.length - 1
+
+    def undo(self):
+        """(board, score, moves, turn, direction, rng_words) one step back, or None"""
+        if not self.can_undo():
+            return None
+        self.current -= 1
+        return self._read(self.current)
+
+    def redo(self):
+        """The state one step forward again, or None"""
+        if not self.can_redo():
+            return None
+        self.current += 1
+        return self._read(self.current)
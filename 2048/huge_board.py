@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Sparse 2048 board for huge grids (up to 256x256).
+
+Only occupied cells are stored: a sorted int32 array of flat positions
+(row * size + col) and a matching uint8 array of exponents. A move groups the
+tiles by row or column, orders them along the move and runs the usual stack
+merge (a merged tile can merge again, like Game2048.move_tile) over all lines
+at once, one NumPy pass per tile rank. Memory and move cost grow with the
+number of tiles, not with the area of the grid.
+
+Spawns draw from a random.Random(seed) exactly like add_random_tile, picking
+the k-th empty cell in row-major order, so small boards play out identically
+to the packed engines and games are recorded as a replay.MoveLog.
+
+    python huge_board.py --size 256 --moves 20000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from replay import MoveLog, new_seed
+from spawns import DEFAULT_SPAWN, check_spawn, pick_value
+
+MAX_SIZE = 256
+
+# Directions match Game2048.move: 0: up, 1: right, 2: down, 3: left
+UP, RIGHT, DOWN, LEFT = 0, 1, 2, 3
+
+
+def slide_lines(lines, along, exponents):
+    """Slide tiles towards position 0 of their line
+
+    lines, along and exponents describe one tile each. Returns the surviving
+    tiles as (lines, slots, exponents) plus the points scored by the merges.
+    """
+    order = np.lexsort((along, lines))
+    lines = lines[order]
+    exponents = exponents[order]
+    count = len(lines)
+
+    starts = np.flatnonzero(np.r_[True, lines[1:] != lines[:-1]])
+    lengths = np.diff(np.r_[starts, count])
+    group = np.repeat(np.arange(len(starts)), lengths)
+    rank = np.arange(count) - starts[group]
+
+    # Visit the first tile of every line, then the second, and so on; a line
+    # never has two tiles in the same step, so the scatters cannot collide
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+    out = np.zeros(count, dtype=np.uint8)
+    top = np.zeros(len(starts), dtype=np.intp)
+    score = 0
+    for step in range(len(bounds) - 1):
+        items = by_rank[bounds[step]:bounds[step + 1]]
+        groups = group[items]
+        values = exponents[items]
+        heights = top[groups]
+        slots = starts[groups] + heights
+        merge = (heights > 0) & (out[np.maximum(slots - 1, 0)] == values)
+        out[slots[merge] - 1] += 1
+        score += int(np.left_shift(2, values[merge].astype(np.int64)).sum())
+        push = ~merge
+        out[slots[push]] = values[push]
+        top[groups[push]] += 1
+
+    keep = rank < top[group]
+    return lines[keep], rank[keep], out[keep], score
+
+
+class _EmptyCells:
+    """The empty cells of a SparseBoard as a row-major sequence for rng.choice"""
+
+    def __init__(self, board):
+        self.area = board.area
+        # Empty cells before the i-th occupied cell
+        self.gaps = board.positions - np.arange(len(board.positions), dtype=np.int32)
+        self.length = board.area - len(board.positions)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, k):
+        if not 0 <= k < self.length:
+            raise IndexError("empty cell index out of range")
+        return k + int(np.searchsorted(self.gaps, k, side="right"))
+
+
+class SparseBoard:
+    def __init__(self, size, seed=None, spawn=DEFAULT_SPAWN):
+        if not 2 <= size <= MAX_SIZE:
+            raise ValueError(f"Board size must be between 2 and {MAX_SIZE}, got {size}")
+        self.size = size
+        self.spawn_distribution = check_spawn(spawn)
+        self.area = size * size
+        self.seed = new_seed() if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.log = MoveLog(size, self.seed)
+        self.positions = np.zeros(0, dtype=np.int32)
+        self.exponents = np.zeros(0, dtype=np.uint8)
+        self.score = 0
+        self.game_over = False
+        self.spawn()
+        self.spawn()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def nbytes(self):
+        return self.positions.nbytes + self.exponents.nbytes + len(self.log.packed)
+
+    def get(self, row, col):
+        """Tile value at a cell, 0 if empty"""
+        position = row * self.size + col
+        index = int(np.searchsorted(self.positions, position))
+        if index < len(self.positions) and self.positions[index] == position:
+            return 1 << int(self.exponents[index])
+        return 0
+
+    def tiles(self):
+        """(rows, cols, exponents) arrays of every occupied cell"""
+        rows, cols = np.divmod(self.positions, self.size)
+        return rows, cols, self.exponents
+
+    def max_tile(self):
+        return 1 << int(self.exponents.max()) if len(self.exponents) else 0
+
+    def to_grid(self):
+        """Dense list-of-lists grid of tile values, for small boards"""
+        grid = [[0] * self.size for _ in range(self.size)]
+        for row, col, exponent in zip(*(a.tolist() for a in self.tiles())):
+            grid[row][col] = 1 << exponent
+        return grid
+
+    def spawn(self):
+        # Same draw order as Game2048.add_random_tile
+        empty = _EmptyCells(self)
+        if not len(empty):
+            return False
+        position = self.rng.choice(empty)
+        exponent = pick_value(self.spawn_distribution, self.rng.random()).bit_length() - 1
+        index = int(np.searchsorted(self.positions, position))
+        self.positions = np.insert(self.positions, index, position)
+        self.exponents = np.insert(self.exponents, index, exponent)
+        return True
+
+    def move(self, direction):
+        """Slide, spawn and log one move; returns False if nothing moved"""
+        if self.game_over or not len(self.positions):
+            return False
+        size = self.size
+        rows, cols = np.divmod(self.positions, size)
+        horizontal = direction in (LEFT, RIGHT)
+        lines, along = (rows, cols) if horizontal else (cols, rows)
+        if direction in (RIGHT, DOWN):
+            along = size - 1 - along
+
+        lines, slots, exponents, gained = slide_lines(lines, along, self.exponents)
+        if direction in (RIGHT, DOWN):
+            slots = size - 1 - slots
+        positions = (lines * size + slots) if horizontal else (slots * size + lines)
+        order = np.argsort(positions)
+        positions = positions[order].astype(np.int32)
+        exponents = exponents[order]
+        if np.array_equal(positions, self.positions) and np.array_equal(exponents, self.exponents):
+            return False
+
+        self.positions = positions
+        self.exponents = exponents
+        self.score += gained
+        self.log.append(direction)
+        self.spawn()
+        self.game_over = not self.can_move()
+        return True
+
+    def can_move(self):
+        if len(self.positions) < self.area:
+            return True
+        # A full board is dense, so the exponents are already in grid order
+        grid = self.exponents.reshape(self.size, self.size)
+        return bool((grid[:, 1:] == grid[:, :-1]).any() or (grid[1:, :] == grid[:-1, :]).any())
+
+
+def stress(size, moves, seed=0):
+    """Play random moves on a huge board and return a summary dictionary"""
+    board = SparseBoard(size, seed)
+    rng = random.Random(seed + 1)
+    start = time.perf_counter()
+    played = 0
+    while played < moves and not board.game_over:
+        directions = [UP, RIGHT, DOWN, LEFT]
+        rng.shuffle(directions)
+        if not any(board.move(direction) for direction in directions):
+            break
+        played += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "size": size,
+        "moves": played,
+        "seconds": elapsed,
+        "moves_per_second": played / elapsed if elapsed else 0.0,
+        "tiles": len(board),
+        "bytes": board.nbytes(),
+        "score": board.score,
+        "max_tile": board.max_tile(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Huge-board 2048 stress session")
+    parser.add_argument("--size", type=int, default=MAX_SIZE)
+    parser.add_argument("--moves", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    summary = stress(args.size, args.moves, args.seed)
+    print(f"{summary['moves']:,} moves on {summary['size']}x{summary['size']} in {summary['seconds']:.1f}s")
+    print(f"  {summary['moves_per_second']:,.0f} moves/sec, score {summary['score']:,}, max tile {summary['max_tile']:,}")
+    print(f"  {summary['tiles']:,} tiles in {summary['bytes']:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""N-tuple network evaluator for 2048 with TD(0)/TD(lambda) self-play training.
+
+Each n-tuple is a small group of cells whose exponents form an index into a
+lookup table of weights. The tuple is also applied to its 8 rotations and
+reflections, all sharing one table. The value of an afterstate (the board right
+after a move, before the spawn) is the sum of the weights selected on it.
+
+All tables live in one flat float32 NumPy array. save() writes it as a .npy file
+next to a small JSON description, and load() can memory-map it back without
+copying, so a trained network is ready as soon as the file is mapped.
+
+    python ntuple.py train --episodes 20000 --out ntuple_weights_4
+    python ntuple.py play --weights ntuple_weights_4
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from bitboard import DIRECTIONS
+from engines import engine_for_size
+from expectimax import ExpectimaxSolver
+
+# Tuple shapes as (row, col) cells, anchored in the top-left corner
+PATTERN_SETS = {
+    # The four 6-tuples of Yeh et al.: 4 x 16^6 weights (64 MiB each)
+    "yeh6": [
+        ((0, 0), (0, 1), (0, 2), (0, 3), (1, 0), (1, 1)),
+        ((1, 0), (1, 1), (1, 2), (1, 3), (2, 0), (2, 1)),
+        ((0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (1, 2)),
+        ((1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (2, 2)),
+    ],
+    # Rows and 2x2 squares: 5 x 16^4 weights, quick to train and to load
+    "small4": [
+        ((0, 0), (0, 1), (0, 2), (0, 3)),
+        ((1, 0), (1, 1), (1, 2), (1, 3)),
+        ((0, 0), (0, 1), (1, 0), (1, 1)),
+        ((0, 1), (0, 2), (1, 1), (1, 2)),
+        ((1, 1), (1, 2), (2, 1), (2, 2)),
+    ],
+}
+DEFAULT_PATTERN_SET = "yeh6"
+DEFAULT_LEARNING_RATE = 0.1
+WEIGHTS_FILE = "weights.npy"
+META_FILE = "ntuple.json"
+
+
+def _symmetric_cells(pattern, size):
+    """The pattern's cells under each of the 8 board symmetries"""
+    last = size - 1
+    maps = (
+        lambda r, c: (r, c),
+        lambda r, c: (r, last - c),
+        lambda r, c: (last - r, c),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (c, r),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - c, r),
+        lambda r, c: (last - c, last - r),
+    )
+    return [[row * size + col for row, col in (m(r, c) for r, c in pattern)] for m in maps]
+
+
+def unpack_boards(engine, boards):
+    """(N, cells) int64 array of exponents for a sequence of packed boards"""
+    width = engine.CELLS // 2
+    raw = np.frombuffer(b"".join(board.to_bytes(width, "little") for board in boards), dtype=np.uint8)
+    raw = raw.reshape(len(boards), width)
+    cells = np.empty((len(boards), engine.CELLS), dtype=np.int64)
+    cells[:, 0::2] = raw & 0xF
+    cells[:, 1::2] = raw >> 4
+    return cells
+
+
+class NTupleNetwork:
+    def __init__(self, size=4, patterns=DEFAULT_PATTERN_SET, weights=None):
+        self.size = size
+        self.engine = engine_for_size(size)
+        self.patterns = PATTERN_SETS[patterns] if isinstance(patterns, str) else [tuple(map(tuple, p)) for p in patterns]
+
+        # One row of cell indices per (tuple, symmetry), with the offset of
+        # that tuple's table inside the flat weight array
+        cells = []
+        offsets = []
+        offset = 0
+        for pattern in self.patterns:
+            for variant in _symmetric_cells(pattern, size):
+                cells.append(variant)
+                offsets.append(offset)
+            offset += 16 ** len(pattern)
+        self.table_size = offset
+        self.features = len(cells)
+        self.variant_cells = cells
+        self.variant_offsets = offsets
+        # Vectorised form: cells[:, variant_index] @ place values gives the index
+        width = max(len(pattern) for pattern in self.patterns)
+        self._cells = np.zeros((self.features, width), dtype=np.intp)
+        self._places = np.zeros((self.features, width), dtype=np.int64)
+        for i, variant in enumerate(cells):
+            self._cells[i, : len(variant)] = variant
+            self._places[i, : len(variant)] = 16 ** np.arange(len(variant))
+        self._offsets = np.array(offsets, dtype=np.int64)
+
+        if weights is None:
+            weights = np.zeros(self.table_size, dtype=np.float32)
+        elif len(weights) != self.table_size:
+            raise ValueError(f"Expected {self.table_size} weights, got {len(weights)}")
+        self.weights = weights
+
+    def indices(self, boards):
+        """(N, features) positions in the flat weight array for packed boards"""
+        cells = unpack_boards(self.engine, boards)
+        gathered = cells[:, self._cells]
+        return (gathered * self._places).sum(axis=2) + self._offsets
+
+    def evaluate_batch(self, boards):
+        if not len(boards):
+            return np.zeros(0, dtype=np.float64)
+        return self.weights[self.indices(boards)].sum(axis=1, dtype=np.float64)
+
+    def evaluate(self, board):
+        """Value of a single packed afterstate, for use inside expectimax"""
+        weights = self.weights
+        total = 0.0
+        for variant, offset in zip(self.variant_cells, self.variant_offsets):
+            index = 0
+            for place, cell in enumerate(variant):
+                index |= ((board >> (4 * cell)) & 0xF) << (4 * place)
+            total += weights[offset + index]
+        return float(total)
+
+    def afterstates(self, board):
+        """Afterstates, rewards and values of all legal moves, looked up together"""
+        moves = []
+        for direction in DIRECTIONS:
+            new, reward = self.engine.move(board, direction)
+            if new != board:
+                moves.append((direction, new, reward))
+        values = self.evaluate_batch([new for _, new, _ in moves])
+        return moves, values
+
+    def best_move(self, board):
+        moves, values = self.afterstates(board)
+        if not moves:
+            return None
+        scores = [reward + value for (_, _, reward), value in zip(moves, values)]
+        return moves[int(np.argmax(scores))][0]
+
+    def update(self, boards, deltas):
+        """Move the value of each board by its delta, spread over its features"""
+        indices = self.indices(boards)
+        steps = np.repeat(np.asarray(deltas, dtype=np.float32) / self.features, self.features)
+        np.add.at(self.weights, indices.ravel(), steps)
+
+    def play_episode(self, rng, learning_rate=DEFAULT_LEARNING_RATE, lam=0.0):
+        """Play one self-play game, learning from it; returns (score, max_tile)"""
+        engine = self.engine
+        board = engine.new_board(rng)
+        score = 0
+        # (afterstate, reward that led to it, its value when chosen) per move
+        trajectory = []
+        while True:
+            moves, values = self.afterstates(board)
+            if not moves:
+                break
+            choice = int(np.argmax([reward + value for (_, _, reward), value in zip(moves, values)]))
+            _, after, reward = moves[choice]
+            if lam == 0.0 and trajectory:
+                # Online TD(0): V(s') moves towards r + V(s'') of the next afterstate
+                previous, _, previous_value = trajectory[-1]
+                self.update([previous], [learning_rate * (reward + values[choice] - previous_value)])
+            trajectory.append((after, reward, values[choice]))
+            score += reward
+            board = engine.spawn(after, rng)
+
+        if lam == 0.0:
+            if trajectory:
+                last, _, last_value = trajectory[-1]
+                self.update([last], [-learning_rate * last_value])
+        else:
+            self._learn_lambda(trajectory, learning_rate, lam)
+        return score, engine.max_tile(board)
+
+    def _learn_lambda(self, trajectory, learning_rate, lam):
+        # Offline TD(lambda): the return of afterstate t mixes the next reward,
+        # the next afterstate's value and its return; the game ends at zero
+        if not trajectory:
+            return
+        boards = [after for after, _, _ in trajectory]
+        values = self.evaluate_batch(boards)
+        returns = np.zeros(len(boards))
+        for t in range(len(boards) - 2, -1, -1):
+            reward = trajectory[t + 1][1]
+            returns[t] = reward + (1 - lam) * values[t + 1] + lam * returns[t + 1]
+        self.update(boards, learning_rate * (returns - values))
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, WEIGHTS_FILE), np.asarray(self.weights, dtype=np.float32))
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump({"size": self.size, "patterns": self.patterns}, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True, writable=False):
+        """Load saved weights, memory-mapped (zero-copy) unless mmap is False"""
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        mode = ("r+" if writable else "r") if mmap else None
+        weights = np.load(os.path.join(directory, WEIGHTS_FILE), mmap_mode=mode)
+        return cls(meta["size"], meta["patterns"], weights)
+
+
+def train(network, episodes, seed=0, learning_rate=DEFAULT_LEARNING_RATE, lam=0.0, report_every=1000):
+    rng = random.Random(seed)
+    recent = []
+    start = time.perf_counter()
+    for episode in range(1, episodes + 1):
+        score, tile = network.play_episode(rng, learning_rate, lam)
+        recent.append((score, tile))
+        if report_every and episode % report_every == 0:
+            mean = sum(s for s, _ in recent) / len(recent)
+            reached = sum(1 for _, t in recent if t >= 2048) / len(recent)
+            print(
+                f"episode {episode}: mean score {mean:,.0f}, 2048 rate {reached:.1%}, "
+                f"{time.perf_counter() - start:.0f}s"
+            )
+            recent = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or play with an n-tuple network")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser("train")
+    train_parser.add_argument("--episodes", type=int, default=10000)
+    train_parser.add_argument("--size", type=int, default=4, choices=(4, 8))
+    train_parser.add_argument("--patterns", default=DEFAULT_PATTERN_SET, choices=sorted(PATTERN_SETS))
+    train_parser.add_argument("--alpha", type=float, default=DEFAULT_LEARNING_RATE)
+    train_parser.add_argument("--lam", type=float, default=0.0, help="0 for online TD(0)")
+    train_parser.add_argument("--seed", type=int, default=0)
+    train_parser.add_argument("--resume", action="store_true", help="continue from --out")
+    train_parser.add_argument("--out", required=True)
+
+    play_parser = commands.add_parser("play")
+    play_parser.add_argument("--weights", required=True)
+    play_parser.add_argument("--budget", type=float, default=50, help="expectimax ms per move, 0 for greedy")
+    play_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "train":
+        if args.resume:
+            network = NTupleNetwork.load(args.out, mmap=False)
+        else:
+            network = NTupleNetwork(args.size, args.patterns)
+        train(network, args.episodes, args.seed, args.alpha, args.lam)
+        network.save(args.out)
+    else:
+        network = NTupleNetwork.load(args.weights)
+        engine = network.engine
+        rng = random.Random(args.seed)
+        solver = None
+        if args.budget:
+            # The network values afterstates, trained on reward + V(s')
+            solver = ExpectimaxSolver(engine, args.budget, evaluate=network.evaluate, add_rewards=True)
+        board = engine.new_board(rng)
+        score = 0
+        while True:
+            direction = solver.best_move(board) if solver else network.best_move(board)
+            if direction is None:
+                break
+            board, reward = engine.move(board, direction)
+            score += reward
+            board = engine.spawn(board, rng)
+        print(f"score {score:,}, max tile {engine.max_tile(board)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Board helpers shared by the packed engines (bitboard and rowpack).
+
+Both engines keep one 4-bit exponent per cell, cell (row, col) in nibble
+row * SIZE + col, and differ only in their size and move function.
+PackedHelpers builds everything else from those, and each engine re-exports
+the bound methods under its own module names.
+"""
+import random
+import time
+
+from spawns import DEFAULT_SPAWN, pick_value
+
+MAX_EXPONENT = 15
+
+
+class PackedHelpers:
+    def __init__(self, size, move):
+        self.size = size
+        self.cells = size * size
+        self.move = move
+        self.shifts = tuple(range(0, self.cells * 4, 4))
+        self.nibble_low_bits = int("1" * self.cells, 16)
+
+    def get_cell(self, board, index):
+        return (board >> (4 * index)) & 0xF
+
+    def set_cell(self, board, index, exponent):
+        shift = 4 * index
+        return (board & ~(0xF << shift)) | (exponent << shift)
+
+    def count_empty(self, board):
+        """Count empty cells without unpacking the board"""
+        occupied = board | (board >> 1)
+        occupied |= occupied >> 2
+        return self.cells - (occupied & self.nibble_low_bits).bit_count()
+
+    def empty_cells(self, board):
+        """Indices of empty cells in row-major order"""
+        return [i for i, shift in enumerate(self.shifts) if not (board >> shift) & 0xF]
+
+    def spawn(self, board, rng=random, spawn=DEFAULT_SPAWN):
+        """Add a tile drawn from spawn in a random empty cell, like add_random_tile"""
+        cells = self.empty_cells(board)
+        if not cells:
+            return board
+        # Same draw order as Game2048.add_random_tile so seeded games line up
+        index = rng.choice(cells)
+        exponent = pick_value(spawn, rng.random()).bit_length() - 1
+        return board | (exponent << (4 * index))
+
+    def new_board(self, rng=random, spawn=DEFAULT_SPAWN):
+        return self.spawn(self.spawn(0, rng, spawn), rng, spawn)
+
+    def can_move(self, board):
+        move = self.move
+        return any(move(board, direction)[0] != board for direction in range(4))
+
+    def is_game_over(self, board):
+        return self.count_empty(board) == 0 and not self.can_move(board)
+
+    def max_exponent(self, board):
+        return max((board >> shift) & 0xF for shift in self.shifts)
+
+    def max_tile(self, board):
+        exponent = self.max_exponent(board)
+        return 1 << exponent if exponent else 0
+
+    def from_grid(self, grid):
+        """Pack a Game2048-style list-of-lists of tile values"""
+        size = self.size
+        board = 0
+        for row in range(size):
+            for col in range(size):
+                value = grid[row][col]
+                if value:
+                    exponent = value.bit_length() - 1
+                    if exponent > MAX_EXPONENT:
+                        raise ValueError(f"Tile {value} does not fit in a 4-bit exponent")
+                    board |= exponent << (4 * (row * size + col))
+        return board
+
+    def to_grid(self, board):
+        """Unpack a board into a list-of-lists of tile values"""
+        size = self.size
+        grid = []
+        for row in range(size):
+            exponents = [(board >> (4 * (row * size + col))) & 0xF for col in range(size)]
+            grid.append([1 << exponent if exponent else 0 for exponent in exponents])
+        return grid
+
+    def sample_boards(self, count, seed=0):
+        """Collect positions from random play, for benchmarking and testing"""
+        rng = random.Random(seed)
+        board = self.new_board(rng)
+        boards = []
+        while len(boards) < count:
+            new, _ = self.move(board, rng.randrange(4))
+            if new != board:
+                board = self.spawn(new, rng)
+                boards.append(board)
+            elif self.is_game_over(board):
+                board = self.new_board(rng)
+        return boards
+
+    def benchmark(self, seconds=2.0, seed=0, positions=2000):
+        """Apply moves to sampled positions for a while and return moves per second"""
+        boards = self.sample_boards(positions, seed)
+        move = self.move
+        moves = 0
+        start = time.perf_counter()
+        deadline = start + seconds
+        while time.perf_counter() < deadline:
+            for board in boards:
+                move(board, 0)
+                move(board, 1)
+                move(board, 2)
+                move(board, 3)
+            moves += 4 * len(boards)
+        return moves / (time.perf_counter() - start)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Background writing of fixed-size NumPy records, shared by dataset.py and
+telemetry.py.
+
+The producer fills rows of the current buffer and hands it over with flush();
+a daemon thread passes each full buffer to a write callback and returns it to
+the free queue. Only a fixed set of buffers exists and they cycle between the
+two sides, so memory stays flat however much is written.
+"""
+import queue
+import threading
+
+import numpy as np
+
+
+class RecordWriter:
+    def __init__(self, dtype, records, buffers, write):
+        # write(rows, tag) runs on the writer thread, once per flushed buffer
+        self.write = write
+        self.records = records
+        self.filled = 0
+        self._error = None
+        self._free = queue.Queue()
+        for _ in range(buffers):
+            self._free.put(np.zeros(records, dtype=dtype))
+        self._full = queue.Queue()
+        self.buffer = self._free.get()
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def flush(self, tag=None):
+        """Queue the filled rows for writing; returns how many were queued"""
+        if self._error is not None:
+            raise self._error
+        count = self.filled
+        if count:
+            self._full.put((self.buffer, count, tag))
+            # Blocks while the writer thread still holds every buffer
+            self.buffer = self._free.get()
+            self.filled = 0
+        return count
+
+    def _drain(self):
+        while True:
+            item = self._full.get()
+            if item is None:
+                return
+            buffer, count, tag = item
+            try:
+                self.write(buffer[:count], tag)
+            except OSError as e:
+                self._error = e
+            self._free.put(buffer)
+
+    def close(self, tag=None):
+        """Queue any partial buffer and wait for the writer thread; returns the rows queued"""
+        if self._thread is None:
+            return 0
+        count = self.flush(tag)
+        self._full.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._error is not None:
+            raise self._error
+        return count
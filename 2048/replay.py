@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Seeded 2048 sessions recorded as a seed plus a 2-bit-per-move log.
+
+Every game draws its spawns from its own random.Random(seed), in the same order
+as Game2048.add_random_tile and the packed engines' spawn(). The seed and the
+moves that changed the board are therefore enough to rebuild the whole game:
+simulate() re-runs a log headlessly at engine speed, and the game modules can
+play it back on screen with --replay.
+
+File layout (little-endian):
+    header: magic, version, board size, seed, move count
+    moves:  4 moves per byte, first move in the low bits
+
+    python replay.py record --policy greedy --seed 7 greedy_7.replay
+    python replay.py run greedy_7.replay
+"""
+import argparse
+import random
+import struct
+import sys
+import time
+
+from engines import engine_for_size
+
+LOG_MAGIC = b"2048LOG\0"
+LOG_VERSION = 1
+HEADER = struct.Struct("<8sIIQQ")
+
+
+def new_seed():
+    return random.SystemRandom().randrange(1 << 63)
+
+
+class MoveLog:
+    def __init__(self, size, seed, moves=b"", count=0):
+        self.size = size
+        self.seed = seed
+        self.packed = bytearray(moves)
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        packed = self.packed
+        for i in range(self.count):
+            yield (packed[i >> 2] >> (2 * (i & 3))) & 3
+
+    def append(self, direction):
+        slot = self.count & 3
+        if slot == 0:
+            self.packed.append(direction)
+        else:
+            self.packed[-1] |= direction << (2 * slot)
+        self.count += 1
+
+    def truncate(self, count):
+        """Drop every move after the first count, as when a move is undone"""
+        if count < self.count:
+            del self.packed[(count + 3) // 4:]
+            if count & 3:
+                self.packed[-1] &= (1 << (2 * (count & 3))) - 1
+            self.count = count
+
+    def rng(self):
+        """A fresh random.Random positioned at the start of this game"""
+        return random.Random(self.seed)
+
+    def to_bytes(self):
+        return HEADER.pack(LOG_MAGIC, LOG_VERSION, self.size, self.seed, self.count) + bytes(self.packed)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, size, seed, count = HEADER.unpack_from(data, 0)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError("Not a 2048 move log")
+        moves = data[HEADER.size:HEADER.size + (count + 3) // 4]
+        if len(moves) * 4 < count:
+            raise ValueError("Move log is truncated")
+        return cls(size, seed, moves, count)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def simulate(log, engine=None):
+    """Re-run a log on a packed engine and return (board, score)
+
+    Raises ValueError if a logged move does not change the board, which means
+    the log does not belong to this seed or the engine disagrees with it.
+    """
+    engine = engine or engine_for_size(log.size)
+    rng = log.rng()
+    board = engine.new_board(rng)
+    score = 0
+    move = engine.move
+    spawn = engine.spawn
+    for index, direction in enumerate(log):
+        new, gained = move(board, direction)
+        if new == board:
+            raise ValueError(f"Move {index} ({direction}) does not change the board")
+        score += gained
+        board = spawn(new, rng)
+    return board, score
+
+
+def record(size, policy_name, seed, max_moves=None):
+    """Play a seeded game with a selfplay policy and return its MoveLog"""
+    from selfplay import POLICIES
+
+    engine = engine_for_size(size)
+    log = MoveLog(size, seed)
+    rng = log.rng()
+    # The policy gets its own generator so it cannot disturb the spawns
+    policy = POLICIES[policy_name](engine, random.Random(seed ^ 0x5EED))
+    board = engine.new_board(rng)
+    while max_moves is None or len(log) < max_moves:
+        direction = policy(board)
+        if direction is None:
+            break
+        board = engine.spawn(engine.move(board, direction)[0], rng)
+        log.append(direction)
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and re-run seeded 2048 games")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("--size", type=int, default=4, choices=(4, 8))
+    record_parser.add_argument("--policy", default="greedy")
+    record_parser.add_argument("--seed", type=int, default=None)
+    record_parser.add_argument("--max-moves", type=int, default=None)
+    record_parser.add_argument("out")
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--repeat", type=int, default=1, help="re-run the log this many times for timing")
+    run_parser.add_argument("log")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        seed = new_seed() if args.seed is None else args.seed
+        log = record(args.size, args.policy, seed, args.max_moves)
+        log.save(args.out)
+        print(f"{len(log):,} moves from seed {seed} written to {args.out}")
+        return
+
+    log = MoveLog.load(args.log)
+    engine = engine_for_size(log.size)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        try:
+            board, score = simulate(log, engine)
+        except ValueError as e:
+            sys.exit(f"{args.log}: {e}")
+    elapsed = time.perf_counter() - start
+    print(f"{log.size}x{log.size} seed {log.seed}: {len(log):,} moves, score {score:,}, max tile {engine.max_tile(board)}")
+    print(f"  {len(log) * args.repeat / elapsed:,.0f} moves/sec")
+
+
+if __name__ == "__main__":
+    main()
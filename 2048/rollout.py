@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Monte Carlo rollout hints for 2048.
+
+Instead of a tree search, each legal move is scored by the mean outcome of
+many short playouts from its successor board: the points the move scores now
+plus the points a random or greedy policy scores over the next HORIZON moves
+(a board that dies stops scoring). Playouts run in NumPy batches through
+batch_numpy, and the batches are spread over a multiprocessing.Pool.
+
+RolloutWorker has the same submit/cancel/poll/stop interface as
+ai_worker.HintWorker, so the game can use either. poll() never blocks: it
+collects finished batches, hands out new ones to keep every process busy and
+stops once the time budget runs out or the confidence interval of the best
+move no longer overlaps any other's. It only names a move once every legal
+move has at least one finished batch; if the budget runs out before that, the
+batches still missing are waited for and timed_out is set. Use best_move() for
+a blocking answer:
+
+    python rollout.py --size 8 --policy greedy --budget 500
+"""
+import argparse
+import math
+import multiprocessing
+import random
+import signal
+import time
+
+import numpy as np
+
+import batch_numpy
+from bitboard import DIRECTION_NAMES, DIRECTIONS
+from engines import engine_for_size
+from spawns import DEFAULT_SPAWN
+
+POLICIES = ("random", "greedy")
+DEFAULT_TIME_BUDGET_MS = 1000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_HORIZON = 32
+# Rollouts every move needs before the confidence test may stop the search
+MIN_ROLLOUTS = 256
+# Two-sided 99% normal quantile
+CONFIDENCE_Z = 2.576
+# Batches kept queued per process, so none sits idle between polls
+BATCHES_PER_WORKER = 2
+
+
+def board_cells(engine, board):
+    """A packed board as a (size, size) array of exponents"""
+    exponents = [(board >> (4 * index)) & 0xF for index in range(engine.CELLS)]
+    return np.array(exponents, dtype=np.uint8).reshape(engine.SIZE, engine.SIZE)
+
+
+def rollout_batch(cells, count, policy, horizon, seed, spawn=DEFAULT_SPAWN):
+    """Play count rollouts from a slid board that still needs its spawn
+
+    Returns the sum and the sum of squares of the points scored, so batches
+    from any process can be pooled into a mean and a variance.
+    """
+    rng = np.random.default_rng(seed)
+    boards = np.repeat(cells[None], count, axis=0)
+    batch_numpy.spawn(boards, rng, distribution=spawn)
+    scores = np.zeros(count, dtype=np.float64)
+    alive = np.ones(count, dtype=bool)
+    for _ in range(horizon):
+        live = np.flatnonzero(alive)
+        if not len(live):
+            break
+        current = boards[live]
+        options = []
+        gains = []
+        moved = []
+        for direction in DIRECTIONS:
+            new, gained, did_move = batch_numpy.move_boards(current, direction)
+            options.append(new)
+            gains.append(gained)
+            moved.append(did_move)
+        moved = np.stack(moved, axis=1)
+        gains = np.stack(gains, axis=1)
+        # Random keys pick a random legal move, or break ties between the
+        # best-scoring ones for greedy (gains are multiples of 4)
+        keys = rng.random(moved.shape)
+        if policy == "greedy":
+            keys += gains
+        keys[~moved] = -1.0
+        choice = keys.argmax(axis=1)
+        rows = np.arange(len(live))
+        stuck = ~moved.any(axis=1)
+
+        boards[live] = np.stack(options, axis=1)[rows, choice]
+        scores[live] += np.where(stuck, 0, gains[rows, choice])
+        alive[live[stuck]] = False
+        spawn_mask = np.zeros(count, dtype=bool)
+        spawn_mask[live[~stuck]] = True
+        batch_numpy.spawn(boards, rng, spawn_mask, spawn)
+    return float(scores.sum()), float(np.square(scores).sum())
+
+
+def _init_pool_worker():
+    # Same reasoning as ai_worker: forked children must not inherit pygame's
+    # signal handlers or react to the player's Ctrl-C
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class RolloutWorker:
+    def __init__(self, size, policy="random", time_budget_ms=DEFAULT_TIME_BUDGET_MS, workers=None,
+                 batch_size=DEFAULT_BATCH_SIZE, horizon=DEFAULT_HORIZON, spawn=DEFAULT_SPAWN):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown rollout policy {policy!r}")
+        self.engine = engine_for_size(size)
+        self.size = size
+        self.policy = policy
+        self.time_budget_ms = time_budget_ms
+        # workers=0 runs every batch in this process, one per poll
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        self.batch_size = batch_size
+        self.horizon = horizon
+        self.spawn = spawn
+        self.pool = None
+        self.pending = []
+        self.moves = {}
+        self.best = None
+        self.done = True
+        # The budget ran out before the best move's interval separated
+        self.timed_out = False
+        self.batches = 0
+
+    def start(self):
+        if self.pool is None and self.workers:
+            self.pool = multiprocessing.Pool(self.workers, initializer=_init_pool_worker)
+
+    def submit(self, board):
+        """Start scoring the moves of a packed board, dropping any old search"""
+        self.start()
+        self.cancel()
+        for direction in DIRECTIONS:
+            after, gained = self.engine.move(board, direction)
+            if after != board:
+                # [cells, points of the move itself, rollouts, sum, sum of squares]
+                self.moves[direction] = [board_cells(self.engine, after), gained, 0, 0.0, 0.0]
+        self.deadline = time.perf_counter() + self.time_budget_ms / 1000
+        self.done = not self.moves
+        if len(self.moves) == 1:
+            # Nothing to compare, so there is nothing to roll out
+            self.best = (0, next(iter(self.moves)))
+            self.done = True
+        self._dispatch()
+
+    def cancel(self):
+        """Drop the current search; batches still running are ignored"""
+        self.pending = []
+        self.moves = {}
+        self.best = None
+        self.done = True
+        self.timed_out = False
+
+    def _dispatch(self):
+        in_flight = {direction: 0 for direction in self.moves}
+        for direction, _ in self.pending:
+            in_flight[direction] += 1
+        limit = max(1, self.workers * BATCHES_PER_WORKER)
+        while not self.done and len(self.pending) < limit:
+            # Keep the moves level, so each interval narrows at the same rate
+            direction = min(self.moves, key=lambda d: self.moves[d][2] + in_flight[d] * self.batch_size)
+            in_flight[direction] += 1
+            self._start_batch(direction)
+            if self.pool is None:
+                return
+
+    def _start_batch(self, direction):
+        self.batches += 1
+        args = (self.moves[direction][0], self.batch_size, self.policy, self.horizon, self.batches, self.spawn)
+        if self.pool is None:
+            self._record(direction, rollout_batch(*args))
+        else:
+            self.pending.append((direction, self.pool.apply_async(rollout_batch, args)))
+
+    def _record(self, direction, result):
+        total, squares = result
+        stats = self.moves[direction]
+        stats[2] += self.batch_size
+        stats[3] += total
+        stats[4] += squares
+
+    def intervals(self):
+        """{direction: (mean, half_width, rollouts)} for every move rolled out so far"""
+        intervals = {}
+        for direction, (_, gained, count, total, squares) in self.moves.items():
+            if not count:
+                continue
+            mean = total / count
+            variance = max(0.0, squares / count - mean * mean)
+            intervals[direction] = (gained + mean, CONFIDENCE_Z * math.sqrt(variance / count), count)
+        return intervals
+
+    def _separated(self, intervals):
+        if len(intervals) < len(self.moves) or min(count for _, _, count in intervals.values()) < MIN_ROLLOUTS:
+            return False
+        best = max(intervals, key=lambda d: intervals[d][0])
+        low = intervals[best][0] - intervals[best][1]
+        return all(mean + width < low for d, (mean, width, _) in intervals.items() if d != best)
+
+    def poll(self):
+        """Return the best (rollouts, direction) so far without blocking"""
+        if self.done:
+            return self.best
+        still_running = []
+        for direction, result in self.pending:
+            if result.ready():
+                self._record(direction, result.get())
+            else:
+                still_running.append((direction, result))
+        self.pending = still_running
+
+        intervals = self.intervals()
+        # A move without a finished batch has no mean to compare yet
+        covered = len(intervals) == len(self.moves)
+        if covered:
+            best = max(intervals, key=lambda d: intervals[d][0])
+            self.best = (sum(count for _, _, count in intervals.values()), best)
+        expired = time.perf_counter() >= self.deadline
+        if covered and (expired or self._separated(intervals)):
+            self.timed_out = expired
+            self.done = True
+            self.pending = []
+        elif not expired:
+            self._dispatch()
+        else:
+            # Out of time: only wait for the moves still missing a batch
+            in_flight = {direction for direction, _ in self.pending}
+            for direction in self.moves:
+                if direction not in intervals and direction not in in_flight:
+                    self._start_batch(direction)
+        return self.best
+
+    def stop(self):
+        self.cancel()
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+def best_move(board, size, policy="random", time_budget_ms=DEFAULT_TIME_BUDGET_MS, workers=None, worker=None):
+    """Blocking search; returns (direction or None, intervals, timed_out)
+
+    direction is None only when there is no legal move. Pass a started
+    RolloutWorker to reuse its pool across calls.
+    """
+    own_worker = worker is None
+    if own_worker:
+        worker = RolloutWorker(size, policy, time_budget_ms, workers)
+    try:
+        worker.submit(board)
+        while not worker.done:
+            worker.poll()
+            if worker.pending:
+                time.sleep(0.001)
+        best = worker.best
+        return (best[1] if best else None), worker.intervals(), worker.timed_out
+    finally:
+        if own_worker:
+            worker.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo rollout hint for a random 2048 position")
+    parser.add_argument("--size", type=int, default=8, choices=(4, 8))
+    parser.add_argument("--policy", default="random", choices=POLICIES)
+    parser.add_argument("--budget", type=int, default=DEFAULT_TIME_BUDGET_MS, help="time budget in ms")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to all cores, 0 runs in-process")
+    parser.add_argument("--moves", type=int, default=200, help="random moves played to reach the position")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = engine_for_size(args.size)
+    rng = random.Random(args.seed)
+    board = engine.new_board(rng)
+    for _ in range(args.moves):
+        directions = [d for d in DIRECTIONS if engine.move(board, d)[0] != board]
+        if not directions:
+            break
+        board = engine.spawn(engine.move(board, rng.choice(directions))[0], rng)
+    for row in engine.to_grid(board):
+        print(" ".join(f"{value:>5}" for value in row))
+
+    start = time.perf_counter()
+    direction, intervals, timed_out = best_move(board, args.size, args.policy, args.budget, args.workers)
+    elapsed = time.perf_counter() - start
+    for d, (mean, width, count) in sorted(intervals.items()):
+        print(f"{DIRECTION_NAMES[d]:>5}: {mean:10.1f} +/- {width:8.1f} over {count:,} rollouts")
+    if direction is None:
+        print("No legal move")
+        return
+    print(f"Best move: {DIRECTION_NAMES[direction]} ({elapsed * 1000:.0f} ms)")
+    if timed_out:
+        print("Time budget ran out before the best move's interval separated from the others")
+
+
+if __name__ == "__main__":
+    main()
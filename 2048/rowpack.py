@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Display-free packed-row engine for the 8x8 2048 edition.
+
+Each 8-cell row is packed into a 32-bit integer of 4-bit exponents and the
+eight rows are stacked into one 256-bit integer, so cell (row, col) lives in
+nibble row * 8 + col just like the 4x4 bitboard. A full 2^32-entry row table is
+impractical, so row results come from a bounded LRU cache. On a miss the row is
+split into two 16-bit halves and resolved through the 4x4 tables whenever the
+halves cannot interact; only the remaining rows are slid cell by cell.
+"""
+import functools
+import sys
+
+from bitboard import (
+    DOWN,
+    LEFT,
+    RIGHT,
+    ROW_LEFT,
+    ROW_LENGTH,
+    ROW_REVERSE,
+    ROW_SCORE,
+    UP,
+    pack_row,
+    slide_exponents,
+    unpack_row,
+)
+from packed import PackedHelpers
+from table_cache import load_tables
+
+SIZE = 8
+CELLS = SIZE * SIZE
+ROW_BITS = 32
+ROW_MASK = 0xFFFFFFFF
+ROW_CACHE_SIZE = 1 << 16
+_ROW_SHIFTS = tuple(range(0, CELLS * 4, ROW_BITS))
+
+
+def _first_tile(half):
+    for shift in (0, 4, 8, 12):
+        if (half >> shift) & 0xF:
+            return (half >> shift) & 0xF
+    return 0
+
+
+# First tile of every 16-bit half row, used to test whether the left half's
+# last tile could merge into the right half
+TABLE_VERSION = 1
+HALF_FIRST_TILE = load_tables(
+    "rowpack-halves", TABLE_VERSION, 1, 65536, lambda: [[_first_tile(half) for half in range(65536)]]
+)[0].tolist()
+
+# How row cache misses were resolved: through the half-row tables or cell by cell
+_miss_paths = {"split": 0, "full": 0}
+
+
+def _nibble_mask(predicate):
+    mask = 0
+    for row in range(SIZE):
+        for col in range(SIZE):
+            if predicate(row, col):
+                mask |= 0xF << (4 * (row * SIZE + col))
+    return mask
+
+
+# Delta swaps for a nibble transpose: swap 1x1, then 2x2, then 4x4 blocks
+_TRANSPOSE_STEPS = (
+    (28, _nibble_mask(lambda r, c: r % 2 == 0 and c % 2 == 1)),
+    (56, _nibble_mask(lambda r, c: r % 4 < 2 and c % 4 >= 2)),
+    (112, _nibble_mask(lambda r, c: r < 4 and c >= 4)),
+)
+
+
+def transpose(board):
+    """Swap rows and columns of a packed 8x8 board"""
+    for distance, mask in _TRANSPOSE_STEPS:
+        t = (board ^ (board >> distance)) & mask
+        board ^= t ^ (t << distance)
+    return board
+
+
+def reverse_row(row):
+    """Reverse the nibble order of a 32-bit row"""
+    return (ROW_REVERSE[row & 0xFFFF] << 16) | ROW_REVERSE[row >> 16]
+
+
+def mirror(board):
+    """Reverse every row (left-right reflection)"""
+    result = 0
+    for shift in _ROW_SHIFTS:
+        result |= reverse_row((board >> shift) & ROW_MASK) << shift
+    return result
+
+
+def flip(board):
+    """Reverse the order of the rows (top-bottom reflection)"""
+    result = 0
+    for shift in _ROW_SHIFTS:
+        result = (result << ROW_BITS) | ((board >> shift) & ROW_MASK)
+    return result
+
+
+def _slide_full(row):
+    cells, score = slide_exponents(unpack_row(row, SIZE))
+    _miss_paths["full"] += 1
+    return pack_row(cells), score
+
+
+@functools.lru_cache(maxsize=ROW_CACHE_SIZE)
+def row_left(row):
+    """Slide a 32-bit row towards nibble 0 and return (row, score)"""
+    left = row & 0xFFFF
+    right = row >> 16
+    length = ROW_LENGTH[left]
+    if length:
+        top = (ROW_LEFT[left] >> (4 * (length - 1))) & 0xF
+        # The halves only interact when the left half's last tile merges with
+        # the right half's first one; any gap is closed by the shift below
+        if right and top == HALF_FIRST_TILE[right]:
+            return _slide_full(row)
+    _miss_paths["split"] += 1
+    return (
+        ROW_LEFT[left] | (ROW_LEFT[right] << (4 * length)),
+        ROW_SCORE[left] + ROW_SCORE[right],
+    )
+
+
+@functools.lru_cache(maxsize=ROW_CACHE_SIZE)
+def row_right(row):
+    """Slide a 32-bit row towards nibble 7 and return (row, score)"""
+    result, score = row_left(reverse_row(row))
+    return reverse_row(result), score
+
+
+def cache_stats():
+    """Hit rates of the row caches and how misses were resolved"""
+    left = row_left.cache_info()
+    right = row_right.cache_info()
+    hits = left.hits + right.hits
+    misses = left.misses + right.misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "entries": left.currsize + right.currsize,
+        "split_resolved": _miss_paths["split"],
+        "full_resolved": _miss_paths["full"],
+    }
+
+
+def clear_cache():
+    row_left.cache_clear()
+    row_right.cache_clear()
+    _miss_paths["split"] = 0
+    _miss_paths["full"] = 0
+
+
+def move(board, direction):
+    """Apply a move and return (new_board, score_gained)"""
+    vertical = direction == UP or direction == DOWN
+    if vertical:
+        board = transpose(board)
+    slide = row_left if direction == LEFT or direction == UP else row_right
+    new = 0
+    score = 0
+    for shift in _ROW_SHIFTS:
+        row = (board >> shift) & ROW_MASK
+        if row:
+            result, gained = slide(row)
+            new |= result << shift
+            score += gained
+    if vertical:
+        new = transpose(new)
+    return new, score
+
+
+# Everything else only needs the move function; see packed.py
+_helpers = PackedHelpers(SIZE, move)
+get_cell = _helpers.get_cell
+set_cell = _helpers.set_cell
+count_empty = _helpers.count_empty
+empty_cells = _helpers.empty_cells
+spawn = _helpers.spawn
+new_board = _helpers.new_board
+can_move = _helpers.can_move
+is_game_over = _helpers.is_game_over
+max_exponent = _helpers.max_exponent
+max_tile = _helpers.max_tile
+from_grid = _helpers.from_grid
+to_grid = _helpers.to_grid
+sample_boards = _helpers.sample_boards
+
+
+def benchmark(seconds=2.0, seed=0):
+    """Apply moves to sampled positions for a while and return moves per second"""
+    return _helpers.benchmark(seconds, seed, 2000)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"{benchmark(seconds):,.0f} moves/sec")
+    stats = cache_stats()
+    print(
+        f"row cache: {stats['hit_rate']:.1%} hits, {stats['entries']:,} entries, "
+        f"misses resolved {stats['split_resolved']:,} split / {stats['full_resolved']:,} full"
+    )
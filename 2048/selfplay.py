@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Headless batch self-play for 2048, spread over a process pool.
+
+Games run on the packed engines, so nothing here imports pygame. Each worker
+gets its own seeded random.Random, which makes a run reproducible for a given
+--seed, --games and --workers. With --dataset every move is also streamed to
+a training dataset (see dataset.py).
+
+    python selfplay.py --games 2000 --size 4 --policy greedy
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+from bitboard import DIRECTIONS
+from dataset import DatasetWriter, create_dataset
+from engines import engine_for_size
+from expectimax import ExpectimaxSolver
+
+MILESTONES = (2048, 4096, 8192)
+
+
+def random_policy(engine, rng):
+    def choose(board):
+        directions = [d for d in DIRECTIONS if engine.move(board, d)[0] != board]
+        return rng.choice(directions) if directions else None
+    return choose
+
+
+def greedy_policy(engine, rng):
+    # Take the move with the largest immediate score, breaking ties at random
+    def choose(board):
+        best = []
+        best_score = -1
+        for direction in DIRECTIONS:
+            new, score = engine.move(board, direction)
+            if new == board:
+                continue
+            if score > best_score:
+                best = [direction]
+                best_score = score
+            elif score == best_score:
+                best.append(direction)
+        return rng.choice(best) if best else None
+    return choose
+
+
+def expectimax_policy(engine, rng, time_budget_ms=20):
+    solver = ExpectimaxSolver(engine, time_budget_ms)
+    return solver.best_move
+
+
+POLICIES = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "expectimax": expectimax_policy,
+}
+
+
+def play_game(engine, policy, rng, writer=None):
+    """Play one game to the end and return (score, max_tile, moves)"""
+    board = engine.new_board(rng)
+    score = 0
+    moves = 0
+    while True:
+        direction = policy(board)
+        if direction is None:
+            break
+        after, gained = engine.move(board, direction)
+        if writer is not None:
+            writer.record(board, direction, gained)
+        board = after
+        score += gained
+        moves += 1
+        board = engine.spawn(board, rng)
+    if writer is not None:
+        writer.end_game(score, engine.max_tile(board))
+    return score, engine.max_tile(board), moves
+
+
+def _run_worker(args):
+    size, policy_name, games, seed, dataset, worker_id = args
+    engine = engine_for_size(size)
+    rng = random.Random(seed)
+    policy = POLICIES[policy_name](engine, rng)
+    if dataset is None:
+        return [play_game(engine, policy, rng) for _ in range(games)]
+    with DatasetWriter(dataset, size, worker_id, create=False) as writer:
+        return [play_game(engine, policy, rng, writer) for _ in range(games)]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run(size=4, policy="random", games=1000, workers=None, seed=0, dataset=None):
+    """Play games across a process pool and return a summary dictionary"""
+    if games < 1:
+        raise ValueError(f"Need at least one game, got {games}")
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, games)
+    # Split the games as evenly as possible, one seed per worker
+    shares = [games // workers + (1 if i < games % workers else 0) for i in range(workers)]
+    if dataset is not None:
+        # Once, before the workers start writing into it
+        create_dataset(dataset, size)
+    jobs = [(size, policy, share, seed * 1000003 + i, dataset, i) for i, share in enumerate(shares)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        chunks = [_run_worker(jobs[0])]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            chunks = pool.map(_run_worker, jobs)
+    elapsed = time.perf_counter() - start
+
+    results = [result for chunk in chunks for result in chunk]
+    scores = sorted(score for score, _, _ in results)
+    total_moves = sum(moves for _, _, moves in results)
+    return {
+        "size": size,
+        "policy": policy,
+        "games": len(results),
+        "workers": workers,
+        "seconds": elapsed,
+        "games_per_second": len(results) / elapsed,
+        "moves_per_second": total_moves / elapsed,
+        "mean_score": statistics.mean(scores),
+        "score_percentiles": {p: percentile(scores, p / 100) for p in (10, 25, 50, 75, 90, 99)},
+        "max_score": scores[-1],
+        "reached": {tile: sum(1 for _, top, _ in results if top >= tile) / len(results) for tile in MILESTONES},
+    }
+
+
+def print_summary(summary):
+    print(
+        f"{summary['games']} games of {summary['size']}x{summary['size']} with the "
+        f"{summary['policy']} policy on {summary['workers']} workers in {summary['seconds']:.1f}s"
+    )
+    print(f"  {summary['games_per_second']:,.2f} games/sec, {summary['moves_per_second']:,.0f} moves/sec")
+    print(f"  mean score {summary['mean_score']:,.0f}, max {summary['max_score']:,}")
+    print("  score percentiles: " + ", ".join(
+        f"p{p} {value:,}" for p, value in summary["score_percentiles"].items()
+    ))
+    print("  reached: " + ", ".join(
+        f"{tile} {rate:.1%}" for tile, rate in summary["reached"].items()
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless 2048 self-play")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=4, choices=(4, 8))
+    parser.add_argument("--policy", default="random", choices=sorted(POLICIES))
+    parser.add_argument("--workers", type=int, default=None, help="defaults to all cores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dataset", default=None, help="directory to stream training records to")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    try:
+        summary = run(args.size, args.policy, args.games, args.workers, args.seed, args.dataset)
+    except FileExistsError as e:
+        parser.error(str(e))
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
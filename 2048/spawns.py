@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Spawn distributions shared by the rules, the engines and the searches.
+
+A distribution is a tuple of (tile value, probability) pairs, like
+GameConfig.spawn. Every implementation turns one uniform draw into a tile the
+same way, walking the pairs in order, so a seeded game spawns the same tiles on
+the list grid, the packed engines and the sparse board. Values must be powers
+of two the 4-bit packed cells can hold.
+"""
+
+DEFAULT_SPAWN = ((2, 0.9), (4, 0.1))
+# Largest exponent a packed cell holds (32768)
+MAX_SPAWN_EXPONENT = 15
+
+
+def check_spawn(spawn):
+    """Validate a distribution and return it as a tuple of pairs"""
+    spawn = tuple((value, weight) for value, weight in spawn)
+    if not spawn:
+        raise ValueError("A spawn distribution needs at least one tile")
+    for value, weight in spawn:
+        if value < 2 or value & (value - 1) or value.bit_length() - 1 > MAX_SPAWN_EXPONENT:
+            raise ValueError(f"Spawned tiles must be powers of two from 2 to 32768, got {value}")
+        if weight < 0:
+            raise ValueError(f"Spawn probabilities cannot be negative, got {weight}")
+    if abs(sum(weight for _, weight in spawn) - 1.0) > 1e-9:
+        raise ValueError("Spawn probabilities must add up to 1")
+    return spawn
+
+
+def pick_value(spawn, draw):
+    """The tile value a uniform draw in [0, 1) selects"""
+    for value, weight in spawn:
+        if draw < weight:
+            return value
+        draw -= weight
+    return spawn[-1][0]
+
+
+def spawn_exponents(spawn):
+    """The distribution as (exponent, probability) pairs"""
+    return tuple((value.bit_length() - 1, weight) for value, weight in spawn)
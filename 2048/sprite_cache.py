@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Size-capped LRU cache of pre-rendered pygame surfaces.
+
+The board renderer keys tile sprites by value, on-screen cell size and
+quantized animation scale. A sprite is rendered once on a miss and reused
+until it falls out of the byte budget. stats() reports how well it is doing.
+"""
+from collections import OrderedDict
+
+DEFAULT_CAPACITY_BYTES = 32 << 20
+# Spawn animation scales are rounded to this many steps between 0 and 1
+SCALE_STEPS = 10
+
+
+def quantize_scale(scale):
+    return max(1, min(SCALE_STEPS, round(scale * SCALE_STEPS)))
+
+
+class SpriteCache:
+    def __init__(self, capacity_bytes=DEFAULT_CAPACITY_BYTES):
+        self.capacity_bytes = capacity_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, build):
+        """The surface for key, calling build() to render it on a miss"""
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = build()
+        size = surface.get_bytesize() * surface.get_width() * surface.get_height()
+        while self.entries and self.bytes + size > self.capacity_bytes:
+            _, old = self.entries.popitem(last=False)
+            self.bytes -= old.get_bytesize() * old.get_width() * old.get_height()
+            self.evictions += 1
+        self.entries[key] = surface
+        self.bytes += size
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+        }
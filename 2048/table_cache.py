@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Versioned on-disk cache for the engines' precomputed lookup tables.
+
+Building the bitboard row tables in Python takes a few hundred milliseconds
+at every launch. The first launch builds them once and writes them to a cache
+file; later launches memory-map that file and read the tables straight out of
+it. A file is only used if its header matches the table name, the builder's
+version, the table shape and the machine's byte order, so bumping a builder's
+version is enough to rebuild stale tables. If the cache directory cannot be
+written, the freshly built tables are used from memory instead.
+
+The cache lives in ~/.cache/2048, or wherever GAME2048_CACHE points.
+"""
+import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+CACHE_DIR_ENV = "GAME2048_CACHE"
+TABLE_MAGIC = b"2048TBL\0"
+FORMAT_VERSION = 1
+# magic, format version, builder version, number of tables, entries per table
+HEADER = struct.Struct("<8sIIII")
+# Entries are native-endian uint64, which fits every table the engines keep
+TYPECODE = "Q"
+
+
+def cache_dir():
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "2048")
+
+
+def cache_path(name, version):
+    return os.path.join(cache_dir(), f"{name}.v{version}.{sys.byteorder}.tbl")
+
+
+def _split(data, count, entries):
+    return [data[i * entries:(i + 1) * entries] for i in range(count)]
+
+
+def _map(path, version, count, entries):
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    size = HEADER.size + count * entries * 8
+    if len(mapped) != size or HEADER.unpack_from(mapped) != (TABLE_MAGIC, FORMAT_VERSION, version, count, entries):
+        mapped.close()
+        return None
+    return _split(memoryview(mapped)[HEADER.size:].cast(TYPECODE), count, entries)
+
+
+def _write(path, version, count, entries, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write beside the target and rename, so a reader never maps half a file
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(TABLE_MAGIC, FORMAT_VERSION, version, count, entries))
+            f.write(data)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def load_tables(name, version, count, entries, build):
+    """count tables of entries uint64 values each, mapped from the cache
+
+    build() is only called on a cache miss and must return count sequences of
+    entries integers. The tables come back as read-only memoryviews; callers
+    that index them in a hot loop should take .tolist() once.
+    """
+    path = cache_path(name, version)
+    tables = _map(path, version, count, entries)
+    if tables is not None:
+        return tables
+
+    data = array.array(TYPECODE)
+    for table in build():
+        if len(table) != entries:
+            raise ValueError(f"Table {name!r} has {len(table)} entries, expected {entries}")
+        data.extend(table)
+    if len(data) != count * entries:
+        raise ValueError(f"Expected {count} tables for {name!r}")
+    try:
+        _write(path, version, count, entries, data)
+    except OSError:
+        return _split(memoryview(data), count, entries)
+    return _map(path, version, count, entries) or _split(memoryview(data), count, entries)
+
+
+def clear(name=None):
+    """Delete cached tables (all of them, or every version of one name)"""
+    directory = cache_dir()
+    if not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if filename.endswith(".tbl") and (name is None or filename.startswith(name + ".")):
+            os.unlink(os.path.join(directory, filename))
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Per-move gameplay telemetry for 2048: an append-only binary log per session.
+
+Each committed turn becomes one fixed-size record: when it happened, the move,
+how many merges it made, the points it scored, the max tile and the number of
+empty cells after the spawn, the time since the previous keypress and how long
+the keypress waited on a running animation before the move could start.
+
+The game loop only copies the values into the next row of a preallocated
+NumPy buffer, which costs a few microseconds. Full buffers go to a
+record_writer.RecordWriter thread that appends them to the session's log file,
+so memory stays flat.
+
+The offline side reads any number of logs and aggregates them into histograms:
+
+    python game_2048_updated.py --telemetry logs
+    python telemetry.py logs --json summary.json
+"""
+import argparse
+import glob
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from record_writer import RecordWriter
+
+LOG_MAGIC = b"2048TLM\0"
+LOG_VERSION = 1
+# magic, version, board size, record size, session start (unix time)
+HEADER = struct.Struct("<8sIIId")
+LOG_SUFFIX = ".tlm"
+DEFAULT_BUFFER_RECORDS = 1024
+DEFAULT_BUFFERS = 3
+NO_DIRECTION = 255
+NO_INTERVAL = float("nan")
+
+RECORD_DTYPE = np.dtype([
+    ("game", "<u4"),
+    ("turn", "<u4"),
+    # Seconds since the session started, on the monotonic clock
+    ("time", "<f8"),
+    ("direction", "u1"),
+    ("merges", "u1"),
+    ("empty", "<u2"),
+    ("gained", "<u4"),
+    ("max_tile", "<u4"),
+    # Seconds since the previous keypress; NaN for moves without one (replays)
+    ("key_interval", "<f4"),
+    # Seconds the keypress waited for the previous animation to finish
+    ("stall", "<f4"),
+])
+
+# Histogram bins for the offline summary
+INTERVAL_BINS = np.array([0, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 1, 2, 5, 10, np.inf])
+STALL_BINS = np.array([0, 0.001, 0.02, 0.04, 0.06, 0.08, 0.1, 0.15, 0.2, np.inf])
+TIMELINE_STEP = 100
+
+
+class TelemetryRecorder:
+    def __init__(self, directory, size, buffer_records=DEFAULT_BUFFER_RECORDS, buffers=DEFAULT_BUFFERS):
+        self.size = size
+        self.buffer_records = buffer_records
+        self.records_written = 0
+        self.game = 0
+        self.clock = time.monotonic
+        self.start = self.clock()
+
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(directory, f"session_{stamp}_{os.getpid()}{LOG_SUFFIX}")
+        with open(self.path, "ab") as f:
+            f.write(HEADER.pack(LOG_MAGIC, LOG_VERSION, size, RECORD_DTYPE.itemsize, time.time()))
+
+        self._writer = RecordWriter(RECORD_DTYPE, buffer_records, buffers, self._append)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def new_game(self):
+        self.game += 1
+
+    def record(self, turn, direction, merges, empty, gained, max_tile, key_interval, stall):
+        """Add one committed turn; called from the game loop"""
+        writer = self._writer
+        writer.buffer[writer.filled] = (
+            self.game, turn, self.clock() - self.start,
+            NO_DIRECTION if direction is None else direction,
+            min(merges, 255), empty, gained, max_tile, key_interval, stall,
+        )
+        writer.filled += 1
+        if writer.filled == self.buffer_records:
+            self.records_written += writer.flush()
+
+    def _append(self, rows, _):
+        with open(self.path, "ab") as f:
+            rows.tofile(f)
+
+    def close(self):
+        """Write the partial buffer and wait for the writer thread"""
+        self.records_written += self._writer.close()
+
+
+def read_log(path):
+    """(header dict, record array) of one session log
+
+    A record cut short by a crash at the end of the file is ignored.
+    """
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.size)
+        if len(raw) < HEADER.size:
+            raise ValueError(f"{path} is not a telemetry log")
+        magic, version, size, record_size, started = HEADER.unpack(raw)
+        if magic != LOG_MAGIC or version != LOG_VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} is not a version {LOG_VERSION} telemetry log")
+        data = f.read()
+    count = len(data) // RECORD_DTYPE.itemsize
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count)
+    return {"size": size, "started": started}, records
+
+
+def find_logs(paths):
+    """Expand directories into the logs they contain"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(sorted(glob.glob(os.path.join(path, "*" + LOG_SUFFIX))))
+        else:
+            found.append(path)
+    return found
+
+
+def _add_counts(total, values):
+    """total plus np.bincount(values), growing total as needed"""
+    counts = np.bincount(values)
+    if len(counts) > len(total):
+        total = np.pad(total, (0, len(counts) - len(total)))
+    total[:len(counts)] += counts
+    return total
+
+
+def aggregate(paths):
+    """Histograms over every turn of the given logs
+
+    Logs are folded in one at a time, so thousands of them never need to be
+    in memory together.
+    """
+    merges = np.zeros(0, dtype=np.int64)
+    empty = np.zeros(0, dtype=np.int64)
+    interval_counts = np.zeros(len(INTERVAL_BINS) - 1, dtype=np.int64)
+    stall_counts = np.zeros(len(STALL_BINS) - 1, dtype=np.int64)
+    # Max-tile timeline: how often each max tile is held, per block of turns
+    timeline = {}
+    stalled = 0
+    sessions = 0
+    games = 0
+    records = 0
+    for path in paths:
+        _, log = read_log(path)
+        sessions += 1
+        if not len(log):
+            continue
+        records += len(log)
+        games += len(np.unique(log["game"]))
+        merges = _add_counts(merges, log["merges"])
+        empty = _add_counts(empty, log["empty"])
+        pressed = log["key_interval"]
+        interval_counts += np.histogram(pressed[~np.isnan(pressed)], bins=INTERVAL_BINS)[0]
+        stall_counts += np.histogram(log["stall"], bins=STALL_BINS)[0]
+        stalled += int((log["stall"] > 0).sum())
+
+        blocks = log["turn"] // TIMELINE_STEP
+        exponents = np.log2(np.maximum(log["max_tile"], 1)).astype(np.int64)
+        for block in np.unique(blocks).tolist():
+            counts = timeline.setdefault(block * TIMELINE_STEP, {})
+            for exponent, count in enumerate(np.bincount(exponents[blocks == block]).tolist()):
+                if count:
+                    counts[1 << exponent] = counts.get(1 << exponent, 0) + count
+
+    summary = {"sessions": sessions, "games": games, "moves": records}
+    if not records:
+        return summary
+    summary.update({
+        "merges_per_move": merges.tolist(),
+        "empty_cells": empty.tolist(),
+        "key_interval": {"bins": INTERVAL_BINS.tolist(), "counts": interval_counts.tolist()},
+        "stall": {"bins": STALL_BINS.tolist(), "counts": stall_counts.tolist()},
+        "stalled_moves": stalled,
+        "max_tile_timeline": dict(sorted(timeline.items())),
+    })
+    return summary
+
+
+def _bar(count, largest, width=40):
+    return "#" * max(1 if count else 0, round(width * count / largest)) if largest else ""
+
+
+def print_summary(summary):
+    print(f"{summary['moves']:,} moves in {summary['games']:,} games from {summary['sessions']:,} sessions")
+    if not summary["moves"]:
+        return
+    print("\nMerges per move")
+    counts = summary["merges_per_move"]
+    for merges, count in enumerate(counts):
+        print(f"  {merges:>3}  {count:>9,}  {_bar(count, max(counts))}")
+    print("\nEmpty cells after the spawn")
+    counts = summary["empty_cells"]
+    for cells, count in enumerate(counts):
+        if count:
+            print(f"  {cells:>3}  {count:>9,}  {_bar(count, max(counts))}")
+    for name, title in (("key_interval", "Time between keypresses (s)"), ("stall", "Animation stall (s)")):
+        print(f"\n{title}")
+        bins = summary[name]["bins"]
+        counts = summary[name]["counts"]
+        for low, high, count in zip(bins, bins[1:], counts):
+            print(f"  {low:>6g} - {high:<6g} {count:>9,}  {_bar(count, max(counts))}")
+    print(f"\nMax tile by turn (every {TIMELINE_STEP} turns, most common tile)")
+    for turn, tiles in summary["max_tile_timeline"].items():
+        common = max(tiles, key=tiles.get)
+        print(f"  {turn:>6}  {common:>6}  ({sum(tiles.values()):,} moves)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate 2048 telemetry logs into histograms")
+    parser.add_argument("paths", nargs="+", help="log files or directories of logs")
+    parser.add_argument("--json", default=None, help="also write the summary here")
+    args = parser.parse_args()
+    summary = aggregate(find_logs(args.paths))
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
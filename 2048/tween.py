@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Precomputed easing tables for time-based tile animation.
+
+A tween's progress is elapsed / duration, measured on a monotonic clock, so
+an animation takes the same time at any frame rate. The easing curve is
+sampled once into a table at import; a frame then costs one lookup and a
+linear interpolation instead of evaluating the curve.
+"""
+
+TABLE_SIZE = 256
+
+
+def ease_out_cubic(t):
+    return 1 - (1 - t) ** 3
+
+
+def ease_out_quad(t):
+    return 1 - (1 - t) ** 2
+
+
+def make_table(curve, size=TABLE_SIZE):
+    return [curve(i / size) for i in range(size + 1)]
+
+
+EASE_OUT_CUBIC = make_table(ease_out_cubic)
+EASE_OUT_QUAD = make_table(ease_out_quad)
+
+
+def sample(table, t):
+    """Eased value at progress t (clamped to 0..1), interpolated between entries"""
+    if t <= 0.0:
+        return table[0]
+    if t >= 1.0:
+        return table[-1]
+    position = t * (len(table) - 1)
+    index = int(position)
+    low = table[index]
+    return low + (table[index + 1] - low) * (position - index)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Camera and culling board renderer for large 2048 grids.
+
+Tiles live in "board space": pixel coordinates of the grid at zoom 1 with its
+top-left corner at (0, 0). The Camera maps board space into a screen viewport
+with pan and zoom. The renderer only draws cells and tiles that intersect the
+viewport, blits tiles from a sprite cache in one batch, and drops detail as
+cells get smaller on screen:
+
+- full: rounded tiles with their value, fonts scaled with the zoom
+- blocks: coloured squares without text, separated by grid lines
+- pixels: the same squares without the grid lines
+
+Sparse boards draw blocks and pixels as one pixel per visible cell, built with
+NumPy and scaled up in a single blit, so a zoomed-out 256x256 board costs about
+as much as a small one.
+"""
+import numpy as np
+import pygame
+
+from sprite_cache import SCALE_STEPS, SpriteCache, quantize_scale
+
+MAX_ZOOM = 3.0
+ZOOM_STEP = 1.15
+# On-screen cell sizes (pixels) below which each level of detail is dropped
+TEXT_MIN_PIXELS = 28
+BLOCK_MIN_PIXELS = 8
+DEFAULT_TILE_COLOR = (60, 58, 50)
+
+
+class Camera:
+    def __init__(self, view, cell_size, padding, board_size):
+        self.view = pygame.Rect(view)
+        self.cell_size = cell_size
+        self.padding = padding
+        self.pitch = cell_size + padding
+        self.board_size = board_size
+        self.extent = self.pitch * board_size + padding
+        fit_zoom = min(self.view.width, self.view.height) / self.extent
+        self.min_zoom = min(1.0, fit_zoom)
+        self.zoom = 1.0
+        # Board-space point shown at the viewport's top-left corner
+        self.x = 0.0
+        self.y = 0.0
+
+    def home(self, origin):
+        """Zoom 1 with the board's top-left corner at a screen position"""
+        self.zoom = 1.0
+        self.x = self.view.left - origin[0]
+        self.y = self.view.top - origin[1]
+
+    def fit(self):
+        """Centre the whole board, zoomed out as far as needed"""
+        self.zoom = self.min_zoom
+        self.x = self.extent / 2 - self.view.width / 2 / self.zoom
+        self.y = self.extent / 2 - self.view.height / 2 / self.zoom
+
+    def to_screen(self, bx, by):
+        return (self.view.left + (bx - self.x) * self.zoom, self.view.top + (by - self.y) * self.zoom)
+
+    def to_board(self, sx, sy):
+        return (self.x + (sx - self.view.left) / self.zoom, self.y + (sy - self.view.top) / self.zoom)
+
+    def pan(self, dx, dy):
+        """Move the view by a screen-pixel drag"""
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+        self._clamp()
+
+    def zoom_at(self, factor, screen_pos):
+        """Zoom by factor, keeping the board point under screen_pos in place"""
+        bx, by = self.to_board(*screen_pos)
+        self.zoom = max(self.min_zoom, min(MAX_ZOOM, self.zoom * factor))
+        self.x = bx - (screen_pos[0] - self.view.left) / self.zoom
+        self.y = by - (screen_pos[1] - self.view.top) / self.zoom
+        self._clamp()
+
+    def _clamp(self):
+        # Always leave at least one cell of the board in view
+        width = self.view.width / self.zoom
+        height = self.view.height / self.zoom
+        self.x = max(self.pitch - width, min(self.extent - self.pitch, self.x))
+        self.y = max(self.pitch - height, min(self.extent - self.pitch, self.y))
+
+    def cell_pixels(self):
+        return self.cell_size * self.zoom
+
+    def visible_cells(self):
+        """(first_row, end_row, first_col, end_col) of cells touching the view"""
+        size = self.board_size
+        col0 = int((self.x - self.padding) // self.pitch)
+        row0 = int((self.y - self.padding) // self.pitch)
+        col1 = int((self.x + self.view.width / self.zoom) // self.pitch) + 1
+        row1 = int((self.y + self.view.height / self.zoom) // self.pitch) + 1
+        return max(0, row0), min(size, row1), max(0, col0), min(size, col1)
+
+    def rect(self, bx, by, width, height):
+        """Screen rectangle of a board-space rectangle"""
+        sx, sy = self.to_screen(bx, by)
+        return pygame.Rect(round(sx), round(sy), max(1, round(width * self.zoom)), max(1, round(height * self.zoom)))
+
+
+class BoardRenderer:
+    def __init__(self, camera, tile_colors, text_colors, font_size, grid_color, empty_color, sprites=None):
+        self.camera = camera
+        self.sprites = sprites if sprites is not None else SpriteCache()
+        self.tile_colors = tile_colors
+        self.text_colors = text_colors
+        self.font_size = font_size
+        self.grid_color = grid_color
+        self.empty_color = empty_color
+        self.fonts = {}
+        # Exponent -> colour lookup for the pixel level of detail
+        self.palette = np.array(
+            [empty_color] + [tile_colors.get(1 << e, DEFAULT_TILE_COLOR) for e in range(1, 256)],
+            dtype=np.uint8,
+        )
+
+    def _font(self, pixels):
+        font = self.fonts.get(pixels)
+        if font is None:
+            font = self.fonts[pixels] = pygame.font.SysFont('Arial', pixels, bold=True)
+        return font
+
+    def draw_grid(self, surface):
+        """Board background and the visible empty cells"""
+        camera = self.camera
+        cell = camera.cell_pixels()
+        pygame.draw.rect(surface, self.grid_color, camera.rect(0, 0, camera.extent, camera.extent), 0, 5)
+        if cell < BLOCK_MIN_PIXELS:
+            return
+        rounded = cell >= TEXT_MIN_PIXELS
+        row0, row1, col0, col1 = camera.visible_cells()
+        for row in range(row0, row1):
+            for col in range(col0, col1):
+                rect = camera.rect(col * camera.pitch + camera.padding, row * camera.pitch + camera.padding,
+                                   camera.cell_size, camera.cell_size)
+                if rounded:
+                    pygame.draw.rect(surface, self.empty_color, rect, 0, 5)
+                else:
+                    surface.fill(self.empty_color, rect)
+
+    def _render_sprite(self, value, pixels, step):
+        # Full-cell canvas so the value stays centred while the tile grows
+        sprite = pygame.Surface((pixels, pixels), pygame.SRCALPHA)
+        size = max(1, round(pixels * step / SCALE_STEPS))
+        rect = pygame.Rect(0, 0, size, size)
+        rect.center = (pixels // 2, pixels // 2)
+        color = self.tile_colors.get(value, DEFAULT_TILE_COLOR)
+        if pixels < TEXT_MIN_PIXELS:
+            sprite.fill(color, rect)
+            return sprite
+        pygame.draw.rect(sprite, color, rect, 0, 5)
+        font = self._font(max(1, int(self.font_size(value) * pixels / self.camera.cell_size)))
+        text = font.render(str(value), True, self.text_colors.get(value, (255, 255, 255)))
+        sprite.blit(text, text.get_rect(center=(pixels // 2, pixels // 2)))
+        return sprite
+
+    def draw_tiles(self, surface, tiles):
+        """Draw (value, bx, by, scale) tiles from board space in one blits call
+
+        Tiles off screen are skipped; the rest come from the sprite cache.
+        """
+        camera = self.camera
+        view = camera.view
+        pixels = max(1, round(camera.cell_pixels()))
+        sprites = self.sprites
+        render = self._render_sprite
+        batch = []
+        for value, bx, by, scale in tiles:
+            sx, sy = camera.to_screen(bx, by)
+            dest = (round(sx), round(sy))
+            if not view.colliderect((dest, (pixels, pixels))):
+                continue
+            step = quantize_scale(scale)
+            sprite = sprites.get((value, pixels, step), lambda: render(value, pixels, step))
+            batch.append((sprite, dest))
+        surface.blits(batch, False)
+
+    def draw_sparse(self, surface, rows, cols, exponents):
+        """Grid plus the tiles of a sparse board, given as parallel arrays"""
+        camera = self.camera
+        row0, row1, col0, col1 = camera.visible_cells()
+        if row0 >= row1 or col0 >= col1:
+            return
+        visible = (rows >= row0) & (rows < row1) & (cols >= col0) & (cols < col1)
+        rows, cols, exponents = rows[visible], cols[visible], exponents[visible]
+
+        if camera.cell_pixels() < TEXT_MIN_PIXELS:
+            # One pixel per cell, indexed [x, y] as surfarray expects; each
+            # cell stretches over its pitch, centred on the padding
+            pixels = np.empty((col1 - col0, row1 - row0, 3), dtype=np.uint8)
+            pixels[:] = self.empty_color
+            pixels[cols - col0, rows - row0] = self.palette[exponents]
+            half = camera.padding / 2
+            left, top = camera.to_screen(col0 * camera.pitch + half, row0 * camera.pitch + half)
+            right, bottom = camera.to_screen(col1 * camera.pitch + half, row1 * camera.pitch + half)
+            scaled = pygame.transform.scale(
+                pygame.surfarray.make_surface(pixels), (max(1, round(right - left)), max(1, round(bottom - top)))
+            )
+            surface.blit(scaled, (round(left), round(top)))
+            if camera.cell_pixels() >= BLOCK_MIN_PIXELS:
+                # Grid lines over the cell borders turn the pixels into blocks
+                width = max(1, round(camera.padding * camera.zoom))
+                for col in range(col0, col1 + 1):
+                    x = camera.to_screen(col * camera.pitch + half, 0)[0]
+                    surface.fill(self.grid_color, (round(x - width / 2), round(top), width, round(bottom - top)))
+                for row in range(row0, row1 + 1):
+                    y = camera.to_screen(0, row * camera.pitch + half)[1]
+                    surface.fill(self.grid_color, (round(left), round(y - width / 2), round(right - left), width))
+            return
+
+        self.draw_grid(surface)
+        pitch = camera.pitch
+        padding = camera.padding
+        self.draw_tiles(surface, (
+            (1 << exponent, col * pitch + padding, row * pitch + padding, 1.0)
+            for row, col, exponent in zip(rows.tolist(), cols.tolist(), exponents.tolist())
+        ))
@@ -0,0 +1,185 @@
+"""Additive pattern databases for the 4x4 slide puzzle.
+
+The 15 tiles are split into disjoint groups (6-6-3). A group's database holds,
+for every placement of its tiles, the fewest moves of those tiles needed to
+bring them home; moves of other tiles are free. No move is counted by two
+groups, so the three values add up to a lower bound on the solution length
+that is far tighter than Manhattan distance with linear conflicts.
+
+Each database is built once by a breadth-first search from the solved board
+over (tile positions, empty space) states. The search is vectorised with NumPy
+and runs level by level: moves of the empty space into cells without a group
+tile cost nothing and are closed over within a level, moves of a group tile
+lead to the next level. The minimum over the empty space's position is then
+stored as a uint8 array indexed by the tiles' positions, 4 bits each, and
+loaded with numpy.memmap, so only the pages the solver touches are read.
+
+The databases live in ~/.cache/slide_puzzle, or wherever SLIDE_PUZZLE_CACHE
+points. Build them once; solver.py uses them from then on:
+
+    python pattern_db.py
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+BOARD_SIZE = 4
+CELLS = BOARD_SIZE * BOARD_SIZE
+# Tile groups (SlidePuzzle tile values); together they cover every tile once
+PARTITION = ((1, 5, 6, 9, 10, 13), (7, 8, 11, 12, 14, 15), (2, 3, 4))
+FORMAT_VERSION = 1
+CACHE_DIR_ENV = "SLIDE_PUZZLE_CACHE"
+UNSEEN = 255
+POSITION_MASK = CELLS - 1
+
+
+def cache_dir():
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(
+        os.path.expanduser("~"), ".cache", "slide_puzzle"
+    )
+
+
+def table_path(tiles):
+    name = "-".join(str(tile) for tile in tiles)
+    return os.path.join(cache_dir(), f"pdb{BOARD_SIZE}-{name}.v{FORMAT_VERSION}.u8")
+
+
+def table_entries(tiles):
+    return 1 << (4 * len(tiles))
+
+
+def _neighbor_table():
+    # targets[direction][blank]: the cell the empty space moves to, or -1
+    targets = np.full((4, CELLS), -1, dtype=np.int64)
+    for blank in range(CELLS):
+        row, col = divmod(blank, BOARD_SIZE)
+        for direction, (d_row, d_col) in enumerate(((-1, 0), (1, 0), (0, -1), (0, 1))):
+            if 0 <= row + d_row < BOARD_SIZE and 0 <= col + d_col < BOARD_SIZE:
+                targets[direction, blank] = blank + d_row * BOARD_SIZE + d_col
+    return targets
+
+
+def _expand(states, count, targets):
+    """Successors of packed states: (free moves, moves of a group tile)
+
+    A state packs the empty space in its low 4 bits and tile i of the group
+    in bits 4 * (i + 1).
+    """
+    free = []
+    paid = []
+    blanks = states & POSITION_MASK
+    for direction in range(4):
+        target = targets[direction][blanks]
+        valid = target >= 0
+        source = states[valid]
+        blank = blanks[valid]
+        target = target[valid]
+        result = (source & ~POSITION_MASK) | target
+        hit_any = np.zeros(len(source), dtype=bool)
+        for i in range(count):
+            shift = 4 * (i + 1)
+            # A group tile in the target cell slides into the empty space
+            hit = ((source >> shift) & POSITION_MASK) == target
+            result ^= np.where(hit, (target ^ blank) << shift, 0)
+            hit_any |= hit
+        free.append(result[~hit_any])
+        paid.append(result[hit_any])
+    return np.concatenate(free), np.concatenate(paid)
+
+
+def build_table(tiles, progress=None):
+    """The database for one group of tiles, as a uint8 array"""
+    count = len(tiles)
+    targets = _neighbor_table()
+    distance = np.full(1 << (4 * (count + 1)), UNSEEN, dtype=np.uint8)
+    start = CELLS - 1
+    for i, tile in enumerate(tiles):
+        start |= (tile - 1) << (4 * (i + 1))
+    frontier = np.array([start], dtype=np.int64)
+    distance[start] = 0
+    depth = 0
+    while len(frontier):
+        # Close the level over free moves of the empty space
+        current = frontier
+        paid = []
+        size = len(frontier)
+        while len(current):
+            free, moved = _expand(current, count, targets)
+            paid.append(moved)
+            free = np.unique(free[distance[free] == UNSEEN])
+            distance[free] = depth
+            size += len(free)
+            current = free
+        if progress:
+            progress(depth, size)
+        frontier = np.concatenate(paid)
+        frontier = np.unique(frontier[distance[frontier] == UNSEEN])
+        depth += 1
+        distance[frontier] = depth
+    # Where the empty space ends up does not matter to the bound
+    return distance.reshape(-1, CELLS).min(axis=1)
+
+
+def save_table(tiles, table):
+    path = table_path(tiles)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write beside the target and rename, so a reader never maps half a file
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            table.astype(np.uint8).tofile(f)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return path
+
+
+def load_table(tiles):
+    """The memory-mapped database for a group, or None if it is not built"""
+    path = table_path(tiles)
+    try:
+        if os.path.getsize(path) != table_entries(tiles):
+            return None
+        return np.memmap(path, dtype=np.uint8, mode="r", shape=(table_entries(tiles),))
+    except (OSError, ValueError):
+        return None
+
+
+def load(partition=PARTITION):
+    """[(tiles, table), ...] for every group, or None unless all are built"""
+    databases = []
+    for tiles in partition:
+        table = load_table(tiles)
+        if table is None:
+            return None
+        databases.append((tiles, table))
+    return databases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the 4x4 slide puzzle pattern databases")
+    parser.add_argument("--force", action="store_true", help="rebuild databases that exist")
+    args = parser.parse_args()
+
+    for tiles in PARTITION:
+        if not args.force and load_table(tiles) is not None:
+            print(f"{table_path(tiles)} is already built")
+            continue
+        print(f"Building the database for tiles {', '.join(map(str, tiles))}")
+        start = time.perf_counter()
+        table = build_table(
+            tiles, lambda depth, size: print(f"  depth {depth:>2}: {size:>10,} states")
+        )
+        path = save_table(tiles, table)
+        elapsed = time.perf_counter() - start
+        print(f"  wrote {path} in {elapsed:.1f}s (max {int(table[table != UNSEEN].max())} moves)")
+
+
+if __name__ == "__main__":
+    main()
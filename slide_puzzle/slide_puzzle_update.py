@@ -2,8 +2,11 @@ import pygame
 import sys
 import random
 import os
+import threading
 from pygame.locals import *
 
+from solver import IDAStarSolver, SearchCancelled, SearchLimit
+
 # Initialize pygame
 pygame.init()
 pygame.mixer.init(frequency=44100, size=-16, channels=1, buffer=512)
@@ -18,6 +21,13 @@ TEXT_COLOR = (255, 255, 255)
 BUTTON_COLOR = (70, 130, 180)  # Steel blue
 BUTTON_HOVER_COLOR = (30, 144, 255)  # Dodger blue
 BUTTON_TEXT_COLOR = (255, 255, 255)
+HINT_COLOR = (255, 215, 0)  # Gold
+
+# Solver settings: an optimal search first, then weighted searches that trade
+# solution length for speed, each stopped after SOLVER_NODE_LIMIT nodes
+SOLVER_WEIGHTS = [1.0, 2.0, 3.0, 5.0]
+SOLVER_NODE_LIMIT = 2000000
+SOLVE_MOVE_INTERVAL = 150  # Milliseconds between moves while auto-solving
 
 # Image options
 IMAGE_OPTIONS = ["Numbers"]
@@ -38,6 +48,46 @@ except (FileNotFoundError, pygame.error):
     SLIDE_SOUND.set_volume(0.3)
 
 
+def find_solution(board_size, board, should_stop=None):
+    """(moves, optimal) solving board, or None if every search gave up"""
+    for weight in SOLVER_WEIGHTS:
+        solver = IDAStarSolver(board_size, SOLVER_NODE_LIMIT, weight)
+        solver.should_stop = should_stop
+        try:
+            return solver.solve(board), weight == 1.0
+        except SearchCancelled:
+            return None
+        except SearchLimit:
+            continue
+    return None
+
+
+class SolverTask:
+    """find_solution on a daemon thread, so the window keeps responding
+
+    The game loop polls done() every frame; cancel() makes the search give up
+    at its next limit check.
+    """
+
+    def __init__(self, board_size, board, action):
+        self.board = list(board)
+        # What to do with the plan once it arrives: "hint" or "solve"
+        self.action = action
+        self.result = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(board_size,), daemon=True)
+        self._thread.start()
+
+    def _run(self, board_size):
+        self.result = find_solution(board_size, self.board, self._cancel.is_set)
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        self._cancel.set()
+
+
 # Check for image files in the current directory
 def find_image_files():
     image_files = []
@@ -177,6 +227,13 @@ class Game:
         self.current_image = "Numbers"
         self.images = {}  # Will store loaded images
         self.tile_images = {}  # Will store the split image tiles
+        self.solution = None  # Planned moves for solution_board
+        self.solution_board = None
+        self.solution_optimal = False
+        self.solver_task = None  # Search running on a worker thread
+        self.show_hint = False
+        self.solving = False
+        self.last_solve_move = 0
         self.setup_window()
 
     def setup_window(self):
@@ -449,6 +506,14 @@ class Game:
                         )
                         self.window.blit(text, text_rect)
 
+        # Outline the tile the hint says to move next
+        hint = self.current_hint() if self.show_hint else None
+        if hint is not None:
+            row, col = divmod(hint, self.puzzle.board_size)
+            x = offset_x + col * (TILE_SIZE + MARGIN) + MARGIN
+            y = offset_y + row * (TILE_SIZE + MARGIN) + MARGIN
+            pygame.draw.rect(self.window, HINT_COLOR, (x, y, TILE_SIZE, TILE_SIZE), 4)
+
         # Draw menu button in top left
         menu_button = self.create_menu_button()
         menu_button.draw(self.window)
@@ -463,15 +528,103 @@ class Game:
         self.window.blit(style_text, style_rect)
 
         # Draw restart instruction
-        restart_text = TINY_FONT.render("Press 'R' to restart", True, TEXT_COLOR)
+        restart_text = TINY_FONT.render(
+            "Press 'R' to restart, 'H' for a hint, 'S' to solve", True, TEXT_COLOR
+        )
         restart_rect = restart_text.get_rect(
             bottomright=(self.window_size - 10, self.window_size + 50)
         )
         self.window.blit(restart_text, restart_rect)
 
+        # Draw the length of the planned solution
+        if self.current_hint() is not None and (self.show_hint or self.solving):
+            moves = len(self.solution)
+            label = "optimal" if self.solution_optimal else "not optimal"
+            solution_text = TINY_FONT.render(
+                f"{moves} moves to solve ({label})", True, TEXT_COLOR
+            )
+            solution_rect = solution_text.get_rect(
+                bottomleft=(10, self.window_size + 50)
+            )
+            self.window.blit(solution_text, solution_rect)
+
+        if self.solver_task is not None:
+            self.draw_solving_message()
+
         pygame.display.update()
         return menu_button
 
+    def draw_solving_message(self):
+        solving_text = SMALL_FONT.render("Solving... (Esc to cancel)", True, HINT_COLOR)
+        solving_rect = solving_text.get_rect(
+            center=(self.window_size // 2, self.window_size + 20)
+        )
+        self.window.blit(solving_text, solving_rect)
+
+    def current_hint(self):
+        """Next planned move, or None if there is no plan for this board"""
+        if self.solution and self.solution_board == self.puzzle.board:
+            return self.solution[0]
+        return None
+
+    def plan_solution(self, action):
+        """Show the hint or start solving ("hint" or "solve") once there is a plan
+
+        A plan for this board is used straight away; otherwise a search starts
+        on a worker thread and poll_solver() acts on its result.
+        """
+        if self.current_hint() is not None:
+            self.apply_plan(action)
+            return
+        task = self.solver_task
+        if task is not None and task.board == self.puzzle.board:
+            # Already searching this board; S after H auto-solves the result
+            if action == "solve":
+                task.action = action
+            return
+        self.cancel_search()
+        self.solver_task = SolverTask(self.board_size, self.puzzle.board, action)
+
+    def apply_plan(self, action):
+        if action == "hint":
+            self.show_hint = True
+        else:
+            self.solving = True
+            self.last_solve_move = pygame.time.get_ticks()
+
+    def poll_solver(self):
+        """Pick up a finished search, if its board is still on screen"""
+        task = self.solver_task
+        if task is None or not task.done():
+            return
+        self.solver_task = None
+        if task.result is None or task.board != self.puzzle.board:
+            return
+        self.solution, self.solution_optimal = task.result
+        self.solution_board = task.board
+        if self.solution:
+            self.apply_plan(task.action)
+
+    def cancel_search(self):
+        if self.solver_task is not None:
+            self.solver_task.cancel()
+            self.solver_task = None
+
+    def play_move(self, position):
+        """Move a tile, keeping the plan if the move was the planned one"""
+        on_plan = self.current_hint() == position
+        if not self.puzzle.move_tile(position):
+            return False
+        if on_plan:
+            self.solution = self.solution[1:]
+            self.solution_board = list(self.puzzle.board)
+        return True
+
+    def stop_solver(self):
+        self.cancel_search()
+        self.solving = False
+        self.show_hint = False
+
     def draw_win_screen(self):
         # Draw semi-transparent overlay
         overlay = pygame.Surface(
@@ -528,6 +681,7 @@ class Game:
         self.board_size = board_size
         self.puzzle = SlidePuzzle(board_size)
         self.puzzle.shuffle()
+        self.stop_solver()
         self.resize_window()
 
         # Split the image into tiles if using an image style
@@ -582,25 +736,54 @@ class Game:
             if event.type == MOUSEBUTTONDOWN:
                 # Check if menu button was clicked
                 if menu_button.is_clicked(mouse_pos, True):
+                    self.stop_solver()
                     self.state = "menu"
                     self.setup_window()
                     return True
 
                 clicked_pos = self.get_clicked_position(mouse_pos)
                 if clicked_pos is not None:
-                    # Normal move
-                    self.puzzle.move_tile(clicked_pos)
+                    # Normal move; a click takes over from the solver
+                    self.solving = False
+                    if self.play_move(clicked_pos):
+                        self.cancel_search()
 
             if event.type == KEYDOWN:
                 if event.key == K_r:
                     self.puzzle = SlidePuzzle(self.board_size)
                     self.puzzle.shuffle()
+                    self.stop_solver()
                 elif event.key == K_m:
+                    self.stop_solver()
                     self.state = "menu"
                     self.setup_window()
+                elif event.key == K_h:
+                    self.plan_solution("hint")
+                elif event.key == K_s:
+                    if self.solving or self.solver_task is not None:
+                        self.solving = False
+                        self.cancel_search()
+                    else:
+                        self.plan_solution("solve")
+                elif event.key == K_ESCAPE:
+                    self.cancel_search()
+
+        self.poll_solver()
+
+        # Play the planned solution one move at a time
+        if self.solving:
+            now = pygame.time.get_ticks()
+            if now - self.last_solve_move >= SOLVE_MOVE_INTERVAL:
+                hint = self.current_hint()
+                if hint is None:
+                    self.solving = False
+                else:
+                    self.play_move(hint)
+                    self.last_solve_move = now
 
         # Check for win condition
         if self.puzzle.is_solved():
+            self.stop_solver()
             self.state = "win"
 
         return True
@@ -0,0 +1,421 @@
+"""IDA* solver for SlidePuzzle boards.
+
+Boards use SlidePuzzle's layout: a flat list of tile values 1..N in row-major
+order, where N (board_size * board_size) is the empty space and the solved
+board is [1, 2, ..., N]. A solution is the list of positions to pass to
+SlidePuzzle.move_tile, one per move.
+
+The heuristic is Manhattan distance plus linear conflicts: two tiles in their
+goal row (or column) but in the wrong order cannot pass each other without one
+stepping out of the line and back, which costs two moves that Manhattan
+distance does not count. Both terms are updated per move from the one tile
+that moved instead of being recomputed, and the search never moves the empty
+space straight back to where it just came from.
+
+Once the 4x4 pattern databases are built (see pattern_db.py), 4x4 boards use
+their sum as the heuristic instead, which expands far fewer nodes.
+
+    python solver.py --size 4 --seed 1
+"""
+
+import argparse
+import random
+import time
+
+try:
+    import pattern_db
+except ImportError:
+    # NumPy is only needed for the 4x4 pattern databases
+    pattern_db = None
+
+FOUND = -1
+# Nodes expanded between two checks of the node limit and should_stop
+LIMIT_CHECK_INTERVAL = 4096
+# Line conflicts remembered per row or column before the table starts over
+CONFLICT_TABLE_SIZE = 1 << 18
+
+
+class SearchLimit(Exception):
+    """Raised when a search expands more nodes than it was allowed"""
+
+
+class SearchCancelled(SearchLimit):
+    """Raised when should_stop asks a running search to give up"""
+
+
+def is_solvable(board, board_size):
+    """Same inversion test as SlidePuzzle.is_solvable"""
+    empty = board_size * board_size
+    tiles = [tile for tile in board if tile != empty]
+    inversions = sum(
+        1
+        for i in range(len(tiles))
+        for j in range(i + 1, len(tiles))
+        if tiles[i] > tiles[j]
+    )
+    if board_size % 2 == 1:
+        return inversions % 2 == 0
+    from_bottom = board_size - board.index(empty) // board_size
+    return (from_bottom + inversions) % 2 == 1
+
+
+def line_conflict(goals):
+    """Extra moves needed to put the tiles of one line in order
+
+    goals lists the goal offsets, along the line, of the tiles that belong to
+    it, in the order they sit. Every tile outside the longest increasing run
+    has to leave the line and come back: two moves each.
+    """
+    # Longest increasing subsequence by patience sorting
+    piles = []
+    for goal in goals:
+        for i, top in enumerate(piles):
+            if goal < top:
+                piles[i] = goal
+                break
+        else:
+            piles.append(goal)
+    return 2 * (len(goals) - len(piles))
+
+
+class IDAStarSolver:
+    def __init__(self, board_size, max_nodes=None, weight=1.0, use_databases=True):
+        self.board_size = board_size
+        self.cells = board_size * board_size
+        # Stop with SearchLimit after this many expanded nodes
+        self.max_nodes = max_nodes
+        # f = g + weight * h; any weight above 1 trades optimality for speed
+        self.weight = weight
+        # Optional callable polled during the search; SearchCancelled once it
+        # returns True (the game sets it to cancel a search on another thread)
+        self.should_stop = None
+        self.nodes = 0
+        self.iterations = 0
+
+        size = board_size
+        cells = self.cells
+        self.neighbors = []
+        for position in range(cells):
+            row, col = divmod(position, size)
+            adjacent = []
+            if row > 0:
+                adjacent.append(position - size)
+            if row < size - 1:
+                adjacent.append(position + size)
+            if col > 0:
+                adjacent.append(position - 1)
+            if col < size - 1:
+                adjacent.append(position + 1)
+            self.neighbors.append(tuple(adjacent))
+        # distance[tile][position]: Manhattan distance of a tile (its goal
+        # position) standing at position
+        self.distance = [
+            [
+                abs(goal // size - position // size) + abs(goal % size - position % size)
+                for position in range(cells)
+            ]
+            for goal in range(cells)
+        ]
+        self._row_conflicts = [{} for _ in range(size)]
+        self._col_conflicts = [{} for _ in range(size)]
+        # Built pattern databases replace Manhattan distance and linear
+        # conflicts as the heuristic (see pattern_db.py)
+        self.databases = None
+        if use_databases and pattern_db is not None and size == pattern_db.BOARD_SIZE:
+            self.databases = pattern_db.load()
+
+    def _check_limits(self):
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchLimit()
+        if self.should_stop is not None and self.should_stop():
+            raise SearchCancelled()
+
+    def _conflict(self, state, index, along_rows):
+        """Linear conflict of one row (along_rows) or column of state"""
+        size = self.board_size
+        if along_rows:
+            cells = tuple(state[index * size:(index + 1) * size])
+            table = self._row_conflicts[index]
+        else:
+            cells = tuple(state[index::size])
+            table = self._col_conflicts[index]
+        # Keyed by the line's raw cells, so a hit costs one slice
+        value = table.get(cells)
+        if value is None:
+            if along_rows:
+                goals = [goal % size for goal in cells if goal >= 0 and goal // size == index]
+            else:
+                goals = [goal // size for goal in cells if goal >= 0 and goal % size == index]
+            if len(table) >= CONFLICT_TABLE_SIZE:
+                table.clear()
+            value = table[cells] = line_conflict(goals)
+        return value
+
+    def heuristic(self, board):
+        """Lower bound on the moves left: the pattern databases' sum if
+        loaded, else Manhattan distance plus linear conflicts"""
+        state, _ = self._state(board)
+        if self.databases is not None:
+            return self._database_search(state, [])[0]
+        manhattan = sum(
+            self.distance[goal][position]
+            for position, goal in enumerate(state)
+            if goal >= 0
+        )
+        conflicts = sum(
+            self._conflict(state, i, True) + self._conflict(state, i, False)
+            for i in range(self.board_size)
+        )
+        return manhattan + conflicts
+
+    def _state(self, board):
+        # Tiles become their goal positions and the empty space -1
+        if sorted(board) != list(range(1, self.cells + 1)):
+            raise ValueError(f"Not a {self.board_size}x{self.board_size} board")
+        state = [tile - 1 if tile != self.cells else -1 for tile in board]
+        return state, state.index(-1)
+
+    def solve(self, board):
+        """Positions to pass to SlidePuzzle.move_tile, in order, to solve board
+
+        The solution is optimal when weight is 1. Raises ValueError for an
+        unsolvable board, SearchLimit when max_nodes runs out and
+        SearchCancelled when should_stop returns True.
+        """
+        if not is_solvable(board, self.board_size):
+            raise ValueError("This board cannot be solved")
+        state, blank = self._state(board)
+        path = []
+        self.nodes = 0
+        self.iterations = 0
+        if self.databases is None:
+            h, search = self._conflict_search(state, path)
+        else:
+            h, search = self._database_search(state, path)
+        if h == 0:
+            return path
+        bound = self.weight * h
+        while True:
+            self.iterations += 1
+            result = search(blank, bound)
+            if result == FOUND:
+                return path
+            bound = result
+
+    def _conflict_search(self, state, path):
+        """(h, search) for Manhattan distance plus linear conflicts"""
+        size = self.board_size
+        weight = self.weight
+        neighbors = self.neighbors
+        distance = self.distance
+        conflict = self._conflict
+        check_limits = self._check_limits
+        row_conflicts = [conflict(state, i, True) for i in range(size)]
+        col_conflicts = [conflict(state, i, False) for i in range(size)]
+        manhattan = sum(
+            distance[goal][position] for position, goal in enumerate(state) if goal >= 0
+        )
+        conflicts = sum(row_conflicts) + sum(col_conflicts)
+
+        def search(blank, previous, g, manhattan, conflicts, bound):
+            """The smallest f above bound among the children, or FOUND
+
+            The caller has checked that this state is within bound.
+            """
+            self.nodes += 1
+            if self.nodes % LIMIT_CHECK_INTERVAL == 0:
+                check_limits()
+            g += 1
+            smallest = float("inf")
+            for position in neighbors[blank]:
+                # Moving the empty space straight back only undoes a move
+                if position == previous:
+                    continue
+                goal = state[position]
+                # The tile slides from position into the empty space
+                state[blank] = goal
+                state[position] = -1
+                new_manhattan = manhattan - distance[goal][position] + distance[goal][blank]
+                new_conflicts = conflicts
+                # Only the tile's own goal line can change its conflicts, and
+                # only if it enters or leaves that line
+                vertical = position % size == blank % size
+                if vertical:
+                    line = goal // size
+                    if line == position // size or line == blank // size:
+                        old = row_conflicts[line]
+                        new = row_conflicts[line] = conflict(state, line, True)
+                        new_conflicts += new - old
+                else:
+                    line = goal % size
+                    if line == position % size or line == blank % size:
+                        old = col_conflicts[line]
+                        new = col_conflicts[line] = conflict(state, line, False)
+                        new_conflicts += new - old
+
+                h = new_manhattan + new_conflicts
+                # Children over the bound are priced here rather than in a
+                # call of their own, which is most of the nodes
+                result = g + weight * h
+                if h == 0:
+                    path.append(position)
+                    return FOUND
+                if result <= bound:
+                    path.append(position)
+                    result = search(position, blank, g, new_manhattan, new_conflicts, bound)
+                    if result == FOUND:
+                        return FOUND
+                    path.pop()
+                if new_conflicts != conflicts:
+                    if vertical:
+                        row_conflicts[line] = old
+                    else:
+                        col_conflicts[line] = old
+                state[position] = goal
+                state[blank] = -1
+                if result < smallest:
+                    smallest = result
+            return smallest
+
+        return manhattan + conflicts, lambda blank, bound: search(
+            blank, None, 0, manhattan, conflicts, bound
+        )
+
+    def _database_search(self, state, path):
+        """(h, search) for the sum of the additive pattern databases
+
+        The board mirrored along the main diagonal needs exactly as many
+        moves, so it is looked up too and the larger sum is used.
+        """
+        weight = self.weight
+        neighbors = self.neighbors
+        check_limits = self._check_limits
+        size = self.board_size
+        cells = self.cells
+        # For each tile (by goal position): its group and the shift of its
+        # 4-bit position within that group's table index
+        tile_group = [0] * cells
+        tile_shift = [0] * cells
+        tables = []
+        for group, (tiles, table) in enumerate(self.databases):
+            tables.append(memoryview(table))
+            for i, tile in enumerate(tiles):
+                tile_group[tile - 1] = group
+                tile_shift[tile - 1] = 4 * i
+        mirror = [(position % size) * size + position // size for position in range(cells)]
+        # The mirrored board has tile mirror[goal] at mirror[position]
+        mirror_group = [tile_group[mirror[goal]] for goal in range(cells)]
+        mirror_shift = [tile_shift[mirror[goal]] for goal in range(cells)]
+
+        indices = [0] * len(tables)
+        mirror_indices = [0] * len(tables)
+        for position, goal in enumerate(state):
+            if goal >= 0:
+                indices[tile_group[goal]] += position << tile_shift[goal]
+                mirror_indices[mirror_group[goal]] += mirror[position] << mirror_shift[goal]
+
+        def search(blank, previous, g, h, mirror_h, bound):
+            """The smallest f above bound among the children, or FOUND
+
+            The caller has checked that this state is within bound.
+            """
+            self.nodes += 1
+            if self.nodes % LIMIT_CHECK_INTERVAL == 0:
+                check_limits()
+            g += 1
+            smallest = float("inf")
+            for position in neighbors[blank]:
+                # Moving the empty space straight back only undoes a move
+                if position == previous:
+                    continue
+                goal = state[position]
+                state[blank] = goal
+                state[position] = -1
+                # Only the moving tile's group changes its value
+                group = tile_group[goal]
+                table = tables[group]
+                old_index = indices[group]
+                new_index = indices[group] = old_index + ((blank - position) << tile_shift[goal])
+                new_h = h - table[old_index] + table[new_index]
+                other = mirror_group[goal]
+                table = tables[other]
+                old_mirror = mirror_indices[other]
+                new_mirror = mirror_indices[other] = old_mirror + (
+                    (mirror[blank] - mirror[position]) << mirror_shift[goal]
+                )
+                new_mirror_h = mirror_h - table[old_mirror] + table[new_mirror]
+                best_h = new_h if new_h > new_mirror_h else new_mirror_h
+
+                result = g + weight * best_h
+                if best_h == 0:
+                    path.append(position)
+                    return FOUND
+                if result <= bound:
+                    path.append(position)
+                    result = search(position, blank, g, new_h, new_mirror_h, bound)
+                    if result == FOUND:
+                        return FOUND
+                    path.pop()
+                indices[group] = old_index
+                mirror_indices[other] = old_mirror
+                state[position] = goal
+                state[blank] = -1
+                if result < smallest:
+                    smallest = result
+            return smallest
+
+        h = sum(table[index] for table, index in zip(tables, indices))
+        mirror_h = sum(table[index] for table, index in zip(tables, mirror_indices))
+        return max(h, mirror_h), lambda blank, bound: search(blank, None, 0, h, mirror_h, bound)
+
+
+def solve(puzzle, max_nodes=None, weight=1.0):
+    """Solution of a SlidePuzzle (anything with .board and .board_size)"""
+    return IDAStarSolver(puzzle.board_size, max_nodes, weight).solve(puzzle.board)
+
+
+def next_move(puzzle, max_nodes=None):
+    """The position to move first on an optimal path, or None if solved"""
+    path = solve(puzzle, max_nodes)
+    return path[0] if path else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve random slide puzzles with IDA*")
+    parser.add_argument("--size", type=int, default=4)
+    parser.add_argument("--shuffle", type=int, default=1000, help="random moves per board")
+    parser.add_argument("--boards", type=int, default=5)
+    parser.add_argument("--weight", type=float, default=1.0)
+    parser.add_argument("--max-nodes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-databases", action="store_true", help="ignore built pattern databases"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    solver = IDAStarSolver(args.size, args.max_nodes, args.weight, not args.no_databases)
+    cells = args.size * args.size
+    for _ in range(args.boards):
+        # The same random walk as SlidePuzzle.shuffle
+        board = list(range(1, cells + 1))
+        blank = cells - 1
+        for _ in range(args.shuffle):
+            position = rng.choice(solver.neighbors[blank])
+            board[blank], board[position] = board[position], board[blank]
+            blank = position
+        start = time.perf_counter()
+        try:
+            path = solver.solve(board)
+        except SearchLimit:
+            print(f"h={solver.heuristic(board):>3}  gave up after {solver.nodes:,} nodes")
+            continue
+        elapsed = time.perf_counter() - start
+        print(
+            f"h={solver.heuristic(board):>3}  {len(path)} moves, {solver.nodes:,} nodes"
+            f" in {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()